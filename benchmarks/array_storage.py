@@ -0,0 +1,80 @@
+"""
+Save and load throughput of numpy array results in `PickleFileCache`,
+comparing the `.npy` storage (read into memory, or memory mapped) to the pickle storage.
+
+    python -m benchmarks.array_storage --max-size 10G
+
+Note that the files are likely to be in the OS page cache when loaded, so the results show the overhead of
+the storage format rather than the disk speed.
+"""
+
+import argparse
+import pathlib
+import shutil
+import tempfile
+
+import numpy as np
+
+from checkpointing.cache import PickleFileCache
+from checkpointing.util import pickle
+from checkpointing.util.timing import timed_run
+
+units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def parse_size(s: str) -> int:
+    if s[-1].upper() in units:
+        return int(float(s[:-1]) * units[s[-1].upper()])
+    return int(s)
+
+
+class PickleOnlyCache(PickleFileCache):
+    """Saves arrays with pickle, as `PickleFileCache` did before having the `.npy` storage."""
+
+    def save(self, context_id, result):
+        with open(self._get_file_path(context_id), mode="wb") as file:
+            pickle.dump(result, file, protocol=5)
+
+
+def bench(cache, arr):
+    _, save_time = timed_run(cache.save, "0", arr)
+    res, load_time = timed_run(cache.retrieve, "0")
+    _, touch_time = timed_run(np.sum, res)
+    return save_time, load_time, load_time + touch_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--min-size", default="1M")
+    parser.add_argument("--max-size", default="1G")
+    parser.add_argument("--directory", default=None, help="Where the cache files are written, a temporary directory by default")
+    args = parser.parse_args()
+
+    directory = pathlib.Path(args.directory or tempfile.mkdtemp())
+    caches = {
+        "pickle": PickleOnlyCache(directory.joinpath("pickle")),
+        "npy": PickleFileCache(directory.joinpath("npy")),
+        "npy-mmap": PickleFileCache(directory.joinpath("npy-mmap"), mmap_mode="r"),
+    }
+
+    print(f"{'size':>8} {'storage':>10} {'save MB/s':>10} {'load MB/s':>10} {'load+read MB/s':>15}")
+
+    size = parse_size(args.min_size)
+    try:
+        while size <= parse_size(args.max_size):
+            arr = np.random.default_rng(0).random(size // 8)
+            mb = arr.nbytes / units["M"]
+
+            for name, cache in caches.items():
+                save_time, load_time, read_time = bench(cache, arr)
+                print(f"{mb:>7.0f}M {name:>10} {mb / save_time:>10.0f} {mb / load_time:>10.0f} {mb / read_time:>15.0f}")
+
+            del arr
+            size *= 10
+    finally:
+        if args.directory is None:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
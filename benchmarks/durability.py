@@ -0,0 +1,48 @@
+"""
+Throughput of saving small entries with `PickleFileCache` under each durability level.
+
+    python -m benchmarks.durability --entries 2000 --directory /mnt/ssd/bench
+
+The directory should be on the disk of interest, the default temporary directory could be in memory.
+"""
+
+import argparse
+import pathlib
+import shutil
+import tempfile
+
+from checkpointing.cache import PickleFileCache
+from checkpointing.util.durability import DURABILITY_LEVELS
+from checkpointing.util.timing import Timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=1024, help="Bytes of each entry")
+    parser.add_argument("--directory", default=None, help="Where the cache files are written, a temporary directory by default")
+    args = parser.parse_args()
+
+    root = pathlib.Path(tempfile.mkdtemp(dir=args.directory))
+    value = b"\x01" * args.size
+
+    print(f"{'durability':>10} {'entries/s':>10} {'incl. flush':>12}")
+    try:
+        for level in DURABILITY_LEVELS:
+            cache = PickleFileCache(root.joinpath(level), durability=level)
+
+            timer = Timer().start()
+            for i in range(args.entries):
+                cache.save(str(i), value)
+            save_time = timer.time
+
+            cache.flush()
+            total_time = timer.time
+
+            print(f"{level:>10} {args.entries / save_time:>10.0f} {args.entries / total_time:>12.0f}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Replay an access trace against `InMemoryCache` with each eviction policy, and report the hit rates.
+
+    python -m benchmarks.eviction_trace --capacity 1000
+    python -m benchmarks.eviction_trace --trace accesses.csv --maxbytes 1000000000
+
+The trace is a CSV file of `key,size,cost` rows, the size in bytes and the cost in seconds of computing the result.
+By default, a synthetic trace mixes a Zipf-distributed working set with periodic sweeps over a parameter grid,
+with log-normal sizes and costs. A miss saves the result with its cost, as the decorator does.
+
+The byte hit rate weighs the hits by the size, and the cost hit rate by the compute time saved.
+"""
+
+import argparse
+import csv
+import random
+from typing import List, Tuple
+
+from checkpointing.cache import InMemoryCache
+from checkpointing.cache.eviction import GDSFPolicy, LRUPolicy, TinyLFUPolicy
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.util.timing import Timer
+
+Access = Tuple[str, int, float]
+
+
+def synthetic_trace(length: int, keys: int, scan_every: int, scan_length: int, seed: int) -> List[Access]:
+    rng = random.Random(seed)
+    sizes = [int(rng.lognormvariate(10, 2)) + 1 for _ in range(keys)]
+    costs = [rng.lognormvariate(0, 2) for _ in range(keys)]
+    weights = [1 / (rank + 1) for rank in range(keys)]
+
+    trace: List[Access] = []
+    scans = 0
+    while len(trace) < length:
+        for i in rng.choices(range(keys), weights, k=scan_every):
+            trace.append((f"key-{i}", sizes[i], costs[i]))
+
+        # Each sweep is over new parameters, which are never accessed again
+        for j in range(scan_length):
+            trace.append((f"scan-{scans}-{j}", int(rng.lognormvariate(10, 2)) + 1, rng.lognormvariate(0, 2)))
+        scans += 1
+
+    return trace[:length]
+
+
+def read_trace(path: str) -> List[Access]:
+    with open(path, newline="") as file:
+        return [(key, int(size), float(cost)) for key, size, cost in csv.reader(file)]
+
+
+def replay(cache: InMemoryCache, trace: List[Access]) -> Tuple[float, float, float]:
+    hits = hit_bytes = hit_cost = 0
+
+    for key, size, cost in trace:
+        try:
+            cache.retrieve(key)
+            hits += 1
+            hit_bytes += size
+            hit_cost += cost
+        except CheckpointNotExist:
+            cache.save_with_context(None, key, size, run_time=cost)
+
+    return (
+        hits / len(trace),
+        hit_bytes / sum(size for _, size, _ in trace),
+        hit_cost / sum(cost for _, _, cost in trace),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trace", default=None, help="CSV file of key,size,cost rows, a synthetic trace by default")
+    parser.add_argument("--capacity", type=int, default=1000, help="Max number of entries")
+    parser.add_argument("--maxbytes", type=int, default=None, help="Max total size, instead of the number of entries")
+    parser.add_argument("--length", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--scan-every", type=int, default=5000)
+    parser.add_argument("--scan-length", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.trace is not None:
+        trace = read_trace(args.trace)
+    else:
+        trace = synthetic_trace(args.length, args.keys, args.scan_every, args.scan_length, args.seed)
+
+    # The cached "result" is its size, which the size estimator returns
+    bounds = dict(maxbytes=args.maxbytes) if args.maxbytes is not None else dict(maxsize=args.capacity)
+
+    print(f"{'policy':>14} {'hit rate':>9} {'byte hit':>9} {'cost hit':>9} {'accesses/s':>11}")
+    for name, policy in [("LRU", LRUPolicy()), ("W-TinyLFU", TinyLFUPolicy()), ("GDSF", GDSFPolicy())]:
+        cache = InMemoryCache(sizeof=lambda size: size, policy=policy, **bounds)
+
+        timer = Timer().start()
+        hit_rate, byte_hit_rate, cost_hit_rate = replay(cache, trace)
+        speed = len(trace) / timer.time
+
+        print(f"{name:>14} {hit_rate:>9.2%} {byte_hit_rate:>9.2%} {cost_hit_rate:>9.2%} {speed:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Lookups per second of small entries with `SQLiteCache` and `PickleFileCache`.
+
+    python -m benchmarks.sqlite_lookup --entries 1000000 --directory /mnt/ssd/bench
+
+Filling the caches with a million entries takes a while, most of which is creating the files of `PickleFileCache`.
+The directory should be on the disk of interest, the default temporary directory could be in memory.
+"""
+
+import argparse
+import pathlib
+import random
+import shutil
+import tempfile
+
+from checkpointing.cache import PickleFileCache, SQLiteCache
+from checkpointing.util.timing import Timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--directory", default=None, help="Where the caches are written, a temporary directory by default")
+    args = parser.parse_args()
+
+    root = pathlib.Path(tempfile.mkdtemp(dir=args.directory))
+    keys = [f"{i:032x}" for i in range(args.entries)]
+    lookups = random.Random(0).choices(keys, k=args.lookups)
+    value = {"score": 0.5, "params": [1, 2, 3]}
+
+    print(f"{'cache':>16} {'saves/s':>10} {'lookups/s':>10}")
+    try:
+        for name, cache in [
+            ("SQLiteCache", SQLiteCache(root.joinpath("sqlite"))),
+            ("PickleFileCache", PickleFileCache(root.joinpath("pickle"), layout="sharded")),
+        ]:
+            timer = Timer().start()
+            for key in keys:
+                cache.save(key, value)
+            save_time = timer.time
+
+            timer = Timer().start()
+            for key in lookups:
+                cache.retrieve(key)
+            lookup_time = timer.time
+
+            print(f"{name:>16} {args.entries / save_time:>10.0f} {args.lookups / lookup_time:>10.0f}")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,14 @@
 from checkpointing.cache.base import CacheBase
 from checkpointing.cache.pickle_file import PickleFileCache
+from checkpointing.cache.in_mem import InMemoryCache
 from checkpointing.cache.in_mem_lru import InMemoryLRUCache
+from checkpointing.cache.sqlite import SQLiteCache
+from checkpointing.cache.pack_file import PackFileCache
+from checkpointing.cache.shared_memory import SharedMemoryCache
+from checkpointing.cache.daemon import DaemonCache
+from checkpointing.cache.http import HTTPCache
+from checkpointing.cache.redis import RedisCache
+from checkpointing.cache.bloom import BloomFilterCache
+from checkpointing.cache.overlay import OverlayCache
+from checkpointing.cache.striped import StripedCache
+from checkpointing.cache.tiered import Tier, TieredCache
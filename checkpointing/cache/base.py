@@ -3,6 +3,7 @@ from abc import ABC, abstractmethod
 from typing import Generic, TypeVar, Union
 from checkpointing._typing import ContextId, ReturnValue
 from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
 
 from threading import Lock as ThreadLock
 from multiprocessing import Lock as ProcessLock
@@ -15,6 +16,9 @@ class CacheBase(ABC, Generic[ContextId, ReturnValue]):
     To implement a concrete Cache class, you need to implement the following abstract methods:
     - `save(self, context_id: ContextId, result: ReturnValue) -> None`
     - `retrieve(self, context: Context) -> ReturnValue`
+
+    The decorators call `save_with_context` and `retrieve_with_context`, which also receive the function call context.
+    A cache can override them to organize the results by the function, they call `save` and `retrieve` by default.
     """
 
     @abstractmethod
@@ -42,6 +46,48 @@ class CacheBase(ABC, Generic[ContextId, ReturnValue]):
         """
         pass
 
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: ContextId,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        """
+        Save the result of a function call.
+
+        Args:
+            context: the function call context
+            context_id: identifier of the function call context
+            result: return value of the function call
+            run_time: the seconds it took to compute the result, if known
+        """
+        self.save(context_id, result)
+
+    def retrieve_with_context(self, context: FuncCallContext, context_id: ContextId) -> ReturnValue:
+        """
+        Retrieve the return value of a function call.
+        If there is no cached results for the context_id, throws a checkpointing.exceptions.CheckpointNotExist
+
+        Args:
+            context: the function call context
+            context_id: identifier of the function call context
+
+        Returns:
+            The return value of the function that corresponds to this context id
+        """
+        return self.retrieve(context_id)
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Remove the cached results of the function of the context, or all the cached results if None.
+        Not supported by default.
+
+        Args:
+            context: a call context of the function, whose arguments are not used
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support clearing the cached results")
+
     def synchronize_with(self, lock) -> SynchronizedCache:
         """
         Args:
@@ -74,3 +120,21 @@ class SynchronizedCache(CacheBase, Generic[CacheSubclass]):
     def retrieve(self, context_id: ContextId) -> ReturnValue:
         with self.__lock:
             return self.__cache.retrieve(context_id)
+
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: ContextId,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        with self.__lock:
+            self.__cache.save_with_context(context, context_id, result, run_time)
+
+    def retrieve_with_context(self, context: FuncCallContext, context_id: ContextId) -> ReturnValue:
+        with self.__lock:
+            return self.__cache.retrieve_with_context(context, context_id)
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        with self.__lock:
+            self.__cache.clear(context)
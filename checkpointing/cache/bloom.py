@@ -0,0 +1,217 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing._typing import ContextId, ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.logging import logger
+from checkpointing.util.atomic import atomic_write, file_lock
+from checkpointing.util.bloom import BloomFilter
+from typing import Iterable
+import atexit
+import os
+import pathlib
+import threading
+import weakref
+
+
+class BloomFilterCache(CacheBase):
+    """
+    Wraps a cache with a Bloom filter of the context ids saved, so that a lookup of a context id that was never saved
+    does not reach the cache, e.g. a file system check on NFS, an HTTP request or a Redis command.
+    The lookups of the saved context ids, and the few false positives, are passed to the cache.
+
+    The filter is persisted at `path`, every `flush_every` saves, by `flush`, and when the process exits.
+    Flushing merges the filter with the one persisted, so that the processes sharing the cache share their saves,
+    a process only seeing the saves of the others when it is created. The merge holds a lock on `<path>.lock`,
+    so that the processes flushing at the same time do not overwrite the saves of each other.
+
+    The filter must know all the context ids saved in the cache, so the cache should be wrapped from its creation,
+    or the context ids already saved should be added with `add`. Otherwise they are misses.
+    Clearing a function does not remove its context ids from the filter, which are then false positives.
+
+    ```python
+    from checkpointing.cache import BloomFilterCache, HTTPCache
+
+    cache = BloomFilterCache(HTTPCache("https://store/bucket"), "checkpoints.bloom")
+    ```
+    """
+
+    def __init__(
+        self,
+        cache: CacheBase,
+        path: os.PathLike = None,
+        capacity: int = None,
+        error_rate: float = None,
+        flush_every: int = None,
+    ) -> None:
+        """
+        Args:
+            cache: the cache looked up for the context ids in the filter
+            path: the file persisting the filter, loaded if it exists. If None, the filter is only kept in memory
+            capacity: the expected number of context ids, beyond which the false positive rate grows.
+                      If None, use the global default `cache.bloom.capacity`. Ignored if the filter is loaded.
+            error_rate: the false positive rate at the capacity. If None, use the global default `cache.bloom.error_rate`.
+                        Ignored if the filter is loaded.
+            flush_every: the number of saves between the flushes of the filter.
+                         If None, use the global default `cache.bloom.flush_every`
+        """
+
+        self.__cache = cache
+        self.__path = pathlib.Path(path) if path is not None else None
+        self.__flush_every = flush_every if flush_every is not None else defaults["cache.bloom.flush_every"]
+
+        self.__bloom = self.__load()
+        if self.__bloom is None:
+            self.__bloom = BloomFilter(
+                capacity if capacity is not None else defaults["cache.bloom.capacity"],
+                error_rate if error_rate is not None else defaults["cache.bloom.error_rate"],
+            )
+        self.__open()
+
+    def __open(self) -> None:
+        self.__pending = 0
+        self.__saturated = False
+        self.__lock = threading.Lock()
+        if self.__path is not None:
+            _flush_at_exit(self)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["pending", "saturated", "lock"]:
+            del state[f"_{BloomFilterCache.__name__}__{name}"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__open()
+
+    @property
+    def cache(self) -> CacheBase:
+        return self.__cache
+
+    @property
+    def bloom(self) -> BloomFilter:
+        return self.__bloom
+
+    def __load(self) -> BloomFilter:
+        if self.__path is None:
+            return None
+
+        try:
+            return BloomFilter.loads(self.__path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            logger.warning(f"Ignored the invalid Bloom filter {self.__path}")
+            return None
+
+    def add(self, context_ids: Iterable[ContextId]) -> None:
+        """
+        Add the context ids of the results already saved in the cache.
+        """
+
+        n = 0
+        for context_id in context_ids:
+            self.__bloom.add(str(context_id))
+            n += 1
+
+        with self.__lock:
+            self.__pending += n
+        self.flush()
+
+    def __added(self, context_id: ContextId) -> None:
+        self.__bloom.add(str(context_id))
+
+        if not self.__saturated and len(self.__bloom) > self.__bloom.capacity:
+            self.__saturated = True
+            logger.warning(
+                f"More than {self.__bloom.capacity} context ids were saved in the Bloom filter, "
+                "whose false positive rate grows. Create it with a larger capacity."
+            )
+
+        with self.__lock:
+            self.__pending += 1
+            flush = self.__pending >= self.__flush_every
+        if flush:
+            self.flush()
+
+    def save(self, context_id: ContextId, result: ReturnValue) -> None:
+        self.__cache.save(context_id, result)
+        self.__added(context_id)
+
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: ContextId,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        self.__cache.save_with_context(context, context_id, result, run_time)
+        self.__added(context_id)
+
+    def retrieve(self, context_id: ContextId) -> ReturnValue:
+        if str(context_id) not in self.__bloom:
+            raise CheckpointNotExist
+        return self.__cache.retrieve(context_id)
+
+    def retrieve_with_context(self, context: FuncCallContext, context_id: ContextId) -> ReturnValue:
+        if str(context_id) not in self.__bloom:
+            raise CheckpointNotExist
+        return self.__cache.retrieve_with_context(context, context_id)
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Clear the cache. Clearing all the results also clears the filter, including the persisted one.
+        """
+
+        self.__cache.clear(context)
+        if context is None:
+            self.__bloom.clear()
+            with self.__lock:
+                self.__pending = 0
+                if self.__path is not None:
+                    self.__path.parent.mkdir(parents=True, exist_ok=True)
+                    with file_lock(self.__lock_path()):
+                        self.__write()
+
+    def flush(self) -> None:
+        """
+        Merge the filter with the persisted one, and persist it, if context ids were saved since the last flush.
+        """
+
+        if self.__path is None:
+            return
+
+        with self.__lock:
+            if not self.__pending:
+                return
+
+            self.__path.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(self.__lock_path()):
+                persisted = self.__load()
+                if persisted is not None:
+                    try:
+                        self.__bloom.update(persisted)
+                    except ValueError:
+                        logger.warning(f"Replaced the Bloom filter {self.__path} of a different size")
+
+                self.__write()
+            self.__pending = 0
+
+    def __lock_path(self) -> pathlib.Path:
+        return self.__path.with_name(f"{self.__path.name}.lock")
+
+    def __write(self) -> None:
+        with atomic_write(self.__path) as file:
+            file.write(self.__bloom.dumps())
+
+
+def _flush_at_exit(cache: BloomFilterCache) -> None:
+    ref = weakref.ref(cache)
+
+    def flush():
+        cache = ref()
+        if cache is not None:
+            cache.flush()
+
+    atexit.register(flush)
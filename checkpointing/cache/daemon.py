@@ -0,0 +1,563 @@
+"""
+A local cache daemon, which holds the results in memory and serves the processes of the host over a Unix domain socket,
+and `DaemonCache`, its client.
+
+Short-lived processes thus share one warm in-memory tier. Start the daemon once per host:
+
+    python -m checkpointing.cache.daemon --maxbytes 8000000000
+
+or from Python with `spawn`, then use `DaemonCache()` in the workers, e.g. over a `PickleFileCache` in a `TieredCache`.
+
+The messages are framed as a count of parts, their lengths, then the parts: a pickled control tuple,
+followed by the result pickled with protocol 5 and its out-of-band buffers, which are sent and received without copies.
+Results with buffers larger than `shm_threshold` are instead written by the client to a shared memory segment,
+whose ownership passes to the daemon, and the clients retrieving them map it zero-copy.
+The daemon never unpickles the results, only the control tuples from the processes of the same user,
+as the socket is only accessible to its owner. The clients unpickle the replies, so they only connect to a socket
+owned by the current user, and check that the daemon runs as the current user where the OS tells the peer of a socket.
+The default socket is in a directory only accessible to the current user, so that no one else can listen on it first.
+
+Unix domain sockets and POSIX shared memory are required, i.e. this is not supported on Windows.
+"""
+
+from checkpointing.cache.base import CacheBase
+from checkpointing.cache.eviction import EvictionPolicy, GDSFPolicy, LRUPolicy, TinyLFUPolicy
+from checkpointing.cache.in_mem import InMemoryCache
+from checkpointing._typing import ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointFailedError, CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.logging import logger
+from checkpointing.util import shared_memory
+from typing import Any, List, Optional, Sequence
+import argparse
+import os
+import pathlib
+import pickle
+import signal
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+_COUNT = struct.Struct("<I")
+_LENGTH = struct.Struct("<Q")
+_MAX_PARTS_PER_SEND = 512
+
+
+def default_socket_path() -> pathlib.Path:
+    """
+    The directory of the default socket is `$XDG_RUNTIME_DIR` if it is set, or otherwise `checkpointing-<uid>`
+    in the temporary directory, created only accessible to the current user.
+    Raises PermissionError if the directory is accessible to other users.
+
+    Returns:
+        The global default `cache.daemon.socket`, or a socket of the current user in a private directory
+    """
+
+    path = defaults["cache.daemon.socket"]
+    if path is not None:
+        return pathlib.Path(path)
+
+    runtime_directory = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_directory:
+        directory = pathlib.Path(runtime_directory)
+    else:
+        directory = pathlib.Path(tempfile.gettempdir(), f"checkpointing-{os.getuid()}")
+        try:
+            directory.mkdir(mode=0o700)
+        except FileExistsError:
+            pass
+
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{directory} must be a directory owned by and only accessible to the current user")
+
+    return directory.joinpath("checkpointing.sock")
+
+
+def _check_owner(path: pathlib.Path) -> None:
+    """Raises PermissionError if the socket file is owned by another user."""
+
+    if os.stat(path).st_uid != os.getuid():
+        raise PermissionError(f"The socket {path} is owned by another user")
+
+
+def _peer_uid(sock: socket.socket) -> Optional[int]:
+    """
+    Returns:
+        The user id of the process at the other end of a connected Unix domain socket, None if the OS does not tell it
+    """
+
+    if hasattr(socket, "SO_PEERCRED"):  # Linux, struct ucred
+        credentials = struct.Struct("iII")
+        _, uid, _ = credentials.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, credentials.size))
+        return uid
+
+    if hasattr(socket, "LOCAL_PEERCRED"):  # macOS and BSD, struct xucred, starting with its version and the uid
+        _, uid = struct.unpack_from("II", sock.getsockopt(0, socket.LOCAL_PEERCRED, 128))
+        return uid
+
+    return None
+
+
+def _check_peer(sock: socket.socket) -> None:
+    """Raises PermissionError if the other end of the connection is a process of another user."""
+
+    uid = _peer_uid(sock)
+    if uid is not None and uid != os.getuid():
+        raise PermissionError(f"The peer of the socket is a process of the user {uid}")
+
+
+def _send(sock: socket.socket, parts: Sequence[Any]) -> None:
+    """Send a frame of the parts, which are bytes-like objects, with scatter-gather I/O."""
+
+    views = [memoryview(part).cast("B") for part in parts]
+    header = _COUNT.pack(len(views)) + b"".join(_LENGTH.pack(view.nbytes) for view in views)
+
+    pending = [memoryview(header)] + [view for view in views if view.nbytes]
+    while pending:
+        sent = sock.sendmsg(pending[:_MAX_PARTS_PER_SEND])
+        while sent:
+            if sent >= pending[0].nbytes:
+                sent -= pending[0].nbytes
+                pending.pop(0)
+            else:
+                pending[0] = pending[0][sent:]
+                sent = 0
+
+
+def _recv_into(sock: socket.socket, view: memoryview) -> None:
+    while view.nbytes:
+        received = sock.recv_into(view)
+        if not received:
+            raise ConnectionResetError("The connection is closed in the middle of a frame")
+        view = view[received:]
+
+
+def _recv(sock: socket.socket) -> List[bytearray]:
+    """
+    Receive a frame. Raises EOFError if the connection is closed before the frame.
+
+    Returns:
+        The parts of the frame
+    """
+
+    header = bytearray(_COUNT.size)
+    received = sock.recv_into(header)
+    if not received:
+        raise EOFError
+    _recv_into(sock, memoryview(header)[received:])
+
+    (count,) = _COUNT.unpack(header)
+    lengths = bytearray(_LENGTH.size * count)
+    _recv_into(sock, memoryview(lengths))
+
+    parts = []
+    for (length,) in _LENGTH.iter_unpack(lengths):
+        part = bytearray(length)
+        _recv_into(sock, memoryview(part))
+        parts.append(part)
+
+    return parts
+
+
+def _control(*args) -> bytes:
+    return pickle.dumps(args, protocol=5)
+
+
+class _StoredResult:
+    """A result held by the daemon, as its pickle parts, or as a shared memory segment unlinked when it is dropped."""
+
+    def __init__(self, parts: List[bytearray] = None, segment: str = None, size: int = 0) -> None:
+        self.parts = parts
+        self.segment = segment
+        self.size = size if parts is None else sum(len(part) for part in parts)
+
+        if segment is not None:
+            weakref.finalize(self, shared_memory.unlink_segment, segment)
+
+
+class CacheDaemon:
+    """
+    Serves an `InMemoryCache` of the results, evicted by its policy, to the `DaemonCache` clients.
+    Each connection is served by a thread.
+    """
+
+    def __init__(
+        self,
+        socket_path: os.PathLike = None,
+        maxbytes: int = None,
+        maxsize: int = None,
+        policy: EvictionPolicy = None,
+    ) -> None:
+        """
+        Args:
+            socket_path: the path of the Unix domain socket. If None, use `default_socket_path()`
+            maxbytes: max total size of the results held, including those in shared memory
+            maxsize: max number of results held
+            policy: the eviction policy. If None, use `LRUPolicy`
+        """
+
+        self.__socket_path = pathlib.Path(socket_path) if socket_path is not None else default_socket_path()
+        self.__cache = InMemoryCache(maxsize=maxsize, maxbytes=maxbytes, sizeof=_sizeof, policy=policy)
+        self.__stopped = threading.Event()
+        self.__listener: socket.socket = None
+
+    @property
+    def socket_path(self) -> pathlib.Path:
+        return self.__socket_path
+
+    def bind(self) -> None:
+        """
+        Listen on the socket, replacing a stale socket file left by a daemon that did not exit cleanly.
+        Raises OSError if another daemon is listening on it, or PermissionError if the socket is owned by another user.
+        """
+
+        if self.__socket_path.exists():
+            _check_owner(self.__socket_path)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(str(self.__socket_path))
+                except ConnectionRefusedError:
+                    self.__socket_path.unlink()
+                else:
+                    raise OSError(f"A cache daemon is already listening on {self.__socket_path}")
+
+        self.__listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # Only the owner can connect
+        try:
+            self.__listener.bind(str(self.__socket_path))
+        finally:
+            os.umask(old_umask)
+
+        self.__listener.listen(128)
+        self.__listener.settimeout(0.5)
+        logger.info(f"Cache daemon listening on {self.__socket_path}")
+
+    def serve_forever(self) -> None:
+        """Accept and serve the connections until `shutdown`."""
+
+        if self.__listener is None:
+            self.bind()
+
+        try:
+            while not self.__stopped.is_set():
+                try:
+                    connection, _ = self.__listener.accept()
+                except socket.timeout:
+                    continue
+
+                try:
+                    _check_peer(connection)
+                except PermissionError as e:
+                    logger.warning(f"Cache daemon refused a connection: {e}")
+                    connection.close()
+                    continue
+
+                connection.settimeout(None)
+                threading.Thread(target=self.__serve, args=(connection,), name="checkpointing-daemon-connection", daemon=True).start()
+        finally:
+            self.__listener.close()
+            self.__socket_path.unlink(missing_ok=True)
+            self.__cache.clear()
+
+    def shutdown(self) -> None:
+        """Stop serving, `serve_forever` returns within half a second, after dropping the results."""
+
+        self.__stopped.set()
+
+    def __serve(self, connection: socket.socket) -> None:
+        with connection:
+            while not self.__stopped.is_set():
+                try:
+                    parts = _recv(connection)
+                except (EOFError, ConnectionError):
+                    return
+
+                try:
+                    reply = self.__handle(pickle.loads(parts[0]), parts[1:])
+                except Exception as e:
+                    logger.warning(f"Cache daemon failed to handle a request: {e!r}")
+                    reply = [_control("error", repr(e))]
+
+                try:
+                    _send(connection, reply)
+                except ConnectionError:
+                    return
+
+    def __handle(self, control: tuple, payload: List[bytearray]) -> List[Any]:
+        operation = control[0]
+
+        if operation == "get":
+            try:
+                stored: _StoredResult = self.__cache.retrieve(control[1])
+            except CheckpointNotExist:
+                return [_control("miss")]
+
+            if stored.segment is not None:
+                return [_control("shm", stored.segment)]
+            return [_control("inline")] + stored.parts
+
+        if operation == "put":
+            self.__cache.save_with_context(None, control[1], _StoredResult(parts=payload), control[2])
+        elif operation == "put_shm":
+            self.__cache.save_with_context(None, control[1], _StoredResult(segment=control[3], size=control[4]), control[2])
+        elif operation == "len":
+            return [_control("ok", len(self.__cache))]
+        elif operation == "clear":
+            self.__cache.clear()
+        elif operation == "shutdown":
+            self.shutdown()
+        else:
+            raise ValueError(f"Unknown operation {operation}")
+
+        return [_control("ok")]
+
+
+def _sizeof(stored: _StoredResult) -> int:
+    return stored.size
+
+
+class DaemonCache(CacheBase):
+    """
+    Cache the results in the local `CacheDaemon` listening on the socket.
+
+    Each thread uses its own connection, and a connection is reopened once if it fails, e.g. the daemon restarted.
+    The results of which the out-of-band buffers, e.g. numpy arrays, take at least `shm_threshold` bytes
+    are handed to the daemon in shared memory, and retrieving them maps the memory zero-copy and read-only.
+    Smaller results are copied to and from the daemon, so the retrieved values can be modified.
+    """
+
+    def __init__(self, socket_path: os.PathLike = None, shm_threshold: int = None) -> None:
+        """
+        Args:
+            socket_path: the socket of the daemon. If None, use `default_socket_path()`
+            shm_threshold: the results with at least this many bytes of out-of-band buffers are passed in shared memory.
+                           If None, use the global default `cache.daemon.shm_threshold`
+        """
+
+        self.__socket_path = pathlib.Path(socket_path) if socket_path is not None else default_socket_path()
+        self.__shm_threshold = shm_threshold if shm_threshold is not None else defaults["cache.daemon.shm_threshold"]
+        self.__local = threading.local()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state[f"_{DaemonCache.__name__}__local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__local = threading.local()
+
+    def __connection(self) -> socket.socket:
+        local = self.__local
+        if getattr(local, "pid", None) != os.getpid():
+            local.connection = None
+            local.pid = os.getpid()
+
+        if local.connection is None:
+            # The replies are unpickled, so they must come from a daemon of the current user
+            _check_owner(self.__socket_path)
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                connection.connect(str(self.__socket_path))
+                _check_peer(connection)
+            except OSError:
+                connection.close()
+                raise
+            local.connection = connection
+
+        return local.connection
+
+    def __request(self, parts: Sequence[Any]) -> List[bytearray]:
+        for attempt in range(2):
+            connection = self.__connection()
+            try:
+                _send(connection, parts)
+                reply = _recv(connection)
+            except (EOFError, ConnectionError):
+                connection.close()
+                self.__local.connection = None
+                if attempt:
+                    raise
+                continue
+
+            control = pickle.loads(reply[0])
+            if control[0] == "error":
+                raise CheckpointFailedError(f"The cache daemon failed: {control[1]}")
+
+            return reply
+
+    def save(self, context_id: str, result: ReturnValue) -> None:
+        """
+        Save the result with the given context id.
+
+        Args:
+            context_id: identifier of the function call context
+            result: return value of the function call
+        """
+
+        self.__put(context_id, result, None)
+
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: str,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        # The run time is passed to the eviction policy of the daemon, e.g. GDSFPolicy
+        self.__put(context_id, result, run_time)
+
+    def __put(self, context_id: str, result: ReturnValue, run_time: float) -> None:
+        data, buffers = shared_memory.dumps(result)
+        raws = [buffer.raw() for buffer in buffers]
+
+        if sum(raw.nbytes for raw in raws) < self.__shm_threshold:
+            self.__request([_control("put", context_id, run_time), data] + raws)
+            return
+
+        name = f"ckpt_d_{uuid.uuid4().hex[:20]}"
+        size = shared_memory.segment_size(data, buffers)
+        segment = shared_memory.create(name, size)
+        try:
+            shared_memory.write(segment, data, buffers)
+        finally:
+            segment.close()
+
+        try:
+            self.__request([_control("put_shm", context_id, run_time, name, size)])
+        except BaseException:
+            shared_memory.unlink_segment(name)
+            raise
+
+    def retrieve(self, context_id: str) -> ReturnValue:
+        """
+        Retrieve the function return value with the given context id.
+        If there is no cached results for the context_id, throws a checkpointing.exceptions.CheckpointNotExist
+
+        Args:
+            context_id: identifier of the function call context
+
+        Returns:
+            The return value of the function that corresponds to this context id
+        """
+
+        reply = self.__request([_control("get", context_id)])
+        control = pickle.loads(reply[0])
+
+        if control[0] == "miss":
+            raise CheckpointNotExist
+
+        if control[0] == "shm":
+            try:
+                mapping = shared_memory.map_segment(control[1])
+            except FileNotFoundError:  # Evicted meanwhile
+                raise CheckpointNotExist
+            return shared_memory.load_segment(mapping)
+
+        return shared_memory.loads(reply[1], reply[2:])
+
+    def __len__(self) -> int:
+        reply = self.__request([_control("len")])
+        return pickle.loads(reply[0])[1]
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Remove all the results held by the daemon. The results are not organized by function, so `context` must be None.
+        """
+
+        if context is not None:
+            raise ValueError("DaemonCache does not support clearing the results of a function")
+
+        self.__request([_control("clear")])
+
+    def shutdown_daemon(self) -> None:
+        """Stop the daemon, which drops all the results."""
+
+        self.__request([_control("shutdown")])
+
+
+def spawn(
+    socket_path: os.PathLike = None,
+    maxbytes: int = None,
+    maxsize: int = None,
+    policy: str = "lru",
+    timeout: float = 10.0,
+) -> subprocess.Popen:
+    """
+    Start a daemon in a new process, detached from the current session so that it outlives the current process,
+    and wait until it accepts connections.
+
+    Args:
+        socket_path: the socket to listen on. If None, use `default_socket_path()`
+        maxbytes: max total size of the results held
+        maxsize: max number of results held
+        policy: the eviction policy, one of `POLICIES`
+        timeout: seconds to wait for the daemon
+
+    Returns:
+        The daemon process
+    """
+
+    socket_path = pathlib.Path(socket_path) if socket_path is not None else default_socket_path()
+    command = [sys.executable, "-m", "checkpointing.cache.daemon", "--socket", str(socket_path), "--policy", policy]
+    if maxbytes is not None:
+        command += ["--maxbytes", str(maxbytes)]
+    if maxsize is not None:
+        command += ["--maxsize", str(maxsize)]
+
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    deadline = time.monotonic() + timeout
+    while True:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(socket_path))
+                return process
+            except (FileNotFoundError, ConnectionRefusedError):
+                pass
+
+        if process.poll() is not None:
+            raise CheckpointFailedError(f"The cache daemon exited with code {process.returncode}")
+        if time.monotonic() > deadline:
+            process.kill()
+            raise CheckpointFailedError(f"The cache daemon did not listen on {socket_path} within {timeout}s")
+        time.sleep(0.05)
+
+
+POLICIES = {"lru": LRUPolicy, "tinylfu": TinyLFUPolicy, "gdsf": GDSFPolicy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an in-memory cache to the local processes")
+    parser.add_argument("--socket", default=None, help="The socket path, in a directory private to the user by default")
+    parser.add_argument("--maxbytes", type=int, default=None)
+    parser.add_argument("--maxsize", type=int, default=None)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="lru")
+    args = parser.parse_args()
+
+    daemon = CacheDaemon(args.socket, args.maxbytes, args.maxsize, POLICIES[args.policy]())
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.shutdown())
+    daemon.bind()
+
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Eviction policies of `InMemoryCache`, which decide the entry to remove when the cache is over its bounds.
+
+- `LRUPolicy` removes the least recently used entry.
+- `TinyLFUPolicy` is W-TinyLFU: recent entries go through a small LRU window,
+  and are only admitted to the main segmented LRU if they are accessed more often than the entry they would replace,
+  so that a single sweep over many keys does not flush the frequently used ones.
+- `GDSFPolicy` is GreedyDual-Size-Frequency: it removes the entry with the lowest `frequency * cost / size`,
+  where the cost is the time it took to compute the result, so a cheap large result goes before an expensive small one.
+
+>>> policy = LRUPolicy()
+>>> for key in "abc":
+...     policy.insert(key, size=1, cost=None)
+>>> policy.access("a")
+>>> policy.evict()
+'b'
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Sequence, Tuple
+import heapq
+import itertools
+
+
+class EvictionPolicy(ABC):
+    """
+    Tracks the keys of a cache to choose the one to evict.
+
+    The cache calls `insert` when a key is saved, `access` when it is retrieved,
+    `remove` when it is removed for another reason, and `evict` while it is over its bounds.
+    A key saved again is removed, then inserted.
+    """
+
+    uses_size = False
+    """Whether `insert` needs the size of the result, which is otherwise only estimated if the cache has `maxbytes`"""
+
+    uses_cost = False
+    """Whether `insert` needs the compute time of the result"""
+
+    @abstractmethod
+    def insert(self, key: Hashable, size: int, cost: float) -> None:
+        """
+        Args:
+            key: the saved key, which is not tracked by the policy
+            size: the estimated size of the result in bytes, 0 if not estimated
+            cost: the seconds it took to compute the result, None if unknown
+        """
+        pass
+
+    @abstractmethod
+    def access(self, key: Hashable) -> None:
+        pass
+
+    @abstractmethod
+    def remove(self, key: Hashable) -> None:
+        pass
+
+    @abstractmethod
+    def evict(self) -> Hashable:
+        """
+        Choose a key to evict and stop tracking it. The policy may evict the key just inserted, i.e. not admit it.
+        Only called when at least one key is tracked.
+
+        Returns:
+            The key to evict
+        """
+        pass
+
+    @abstractmethod
+    def by_hotness(self) -> Sequence[Hashable]:
+        """
+        Returns:
+            The tracked keys from the one the policy would evict last to the one it would evict first
+        """
+        pass
+
+    def clear(self) -> None:
+        self.__init__()
+
+
+class LRUPolicy(EvictionPolicy):
+    """Evict the least recently used key."""
+
+    def __init__(self) -> None:
+        self.__keys: Dict[Hashable, None] = OrderedDict()
+
+    def insert(self, key: Hashable, size: int, cost: float) -> None:
+        self.__keys[key] = None
+
+    def access(self, key: Hashable) -> None:
+        self.__keys.move_to_end(key)
+
+    def remove(self, key: Hashable) -> None:
+        del self.__keys[key]
+
+    def evict(self) -> Hashable:
+        key, _ = self.__keys.popitem(last=False)
+        return key
+
+    def by_hotness(self) -> Sequence[Hashable]:
+        return list(reversed(self.__keys))
+
+
+class _FrequencySketch:
+    """
+    Approximate access frequencies of the recently seen keys, including the evicted ones.
+    The counts are halved every `sample_size` increments, so the frequencies follow the changes of the workload,
+    and the keys whose count drops to zero are forgotten, which bounds the memory to `sample_size` keys.
+    """
+
+    def __init__(self, sample_size: int) -> None:
+        self.sample_size = sample_size
+        self.__counts: Dict[int, int] = {}
+        self.__additions = 0
+
+    def increment(self, key: Hashable) -> None:
+        h = hash(key)
+        self.__counts[h] = self.__counts.get(h, 0) + 1
+        self.__additions += 1
+
+        if self.__additions >= self.sample_size:
+            self.__counts = {h: count // 2 for h, count in self.__counts.items() if count > 1}
+            self.__additions //= 2
+
+    def frequency(self, key: Hashable) -> int:
+        return self.__counts.get(hash(key), 0)
+
+
+class TinyLFUPolicy(EvictionPolicy):
+    """
+    W-TinyLFU. New keys enter an LRU window of `window_ratio` of the keys.
+    A key leaving the window enters the probation segment of the main segmented LRU as a candidate,
+    and at the next eviction it is kept only if it is more frequent than the victim, the least recently used main key.
+    A key accessed in probation is promoted to the protected segment, which holds up to `protected_ratio` of the main keys.
+
+    The window keeps the recency-biased workloads working like LRU,
+    while the admission keeps a scan over many keys, each used once, from flushing the frequently used keys.
+    """
+
+    def __init__(self, window_ratio: float = 0.01, protected_ratio: float = 0.8, sample_factor: int = 10) -> None:
+        """
+        Args:
+            window_ratio: the ratio of the keys in the window
+            protected_ratio: the ratio of the main keys in the protected segment
+            sample_factor: the frequencies are aged after this many accesses per tracked key
+        """
+
+        self.__window_ratio = window_ratio
+        self.__protected_ratio = protected_ratio
+        self.__sample_factor = sample_factor
+
+        self.__window: Dict[Hashable, None] = OrderedDict()
+        self.__probation: Dict[Hashable, None] = OrderedDict()
+        self.__protected: Dict[Hashable, None] = OrderedDict()
+        self.__sketch = _FrequencySketch(sample_factor * 64)
+        self.__candidate: Hashable = None
+
+    def clear(self) -> None:
+        self.__init__(self.__window_ratio, self.__protected_ratio, self.__sample_factor)
+
+    def __len__(self) -> int:
+        return len(self.__window) + len(self.__probation) + len(self.__protected)
+
+    def __record(self, key: Hashable) -> None:
+        self.__sketch.sample_size = max(self.__sketch.sample_size, self.__sample_factor * len(self))
+        self.__sketch.increment(key)
+
+    def insert(self, key: Hashable, size: int, cost: float) -> None:
+        self.__record(key)
+        self.__window[key] = None
+
+        # The key leaving the window enters probation, and competes with the victim at the next eviction
+        if len(self.__window) > max(1, int(self.__window_ratio * len(self))):
+            self.__candidate, _ = self.__window.popitem(last=False)
+            self.__probation[self.__candidate] = None
+
+    def access(self, key: Hashable) -> None:
+        self.__record(key)
+
+        if key in self.__window:
+            self.__window.move_to_end(key)
+        elif key in self.__protected:
+            self.__protected.move_to_end(key)
+        else:
+            del self.__probation[key]
+            self.__protected[key] = None
+
+            main = len(self.__probation) + len(self.__protected)
+            if len(self.__protected) > max(1, int(self.__protected_ratio * main)):
+                demoted, _ = self.__protected.popitem(last=False)
+                self.__probation[demoted] = None
+
+    def remove(self, key: Hashable) -> None:
+        for segment in (self.__window, self.__probation, self.__protected):
+            if key in segment:
+                del segment[key]
+                return
+        raise KeyError(key)
+
+    def evict(self) -> Hashable:
+        candidate, self.__candidate = self.__candidate, None
+
+        if candidate is not None and candidate in self.__probation:
+            victim = next(iter(self.__probation))
+            segment = self.__probation
+            if victim == candidate:
+                victim = next(iter(self.__protected), None)
+                segment = self.__protected
+
+            if victim is not None:
+                if self.__sketch.frequency(candidate) <= self.__sketch.frequency(victim):
+                    victim, segment = candidate, self.__probation
+                del segment[victim]
+                return victim
+
+        for segment in (self.__probation, self.__protected, self.__window):
+            if segment:
+                key, _ = segment.popitem(last=False)
+                return key
+
+    def by_hotness(self) -> Sequence[Hashable]:
+        return [key for segment in (self.__protected, self.__window, self.__probation) for key in reversed(segment)]
+
+
+class GDSFPolicy(EvictionPolicy):
+    """
+    GreedyDual-Size-Frequency. Each key has the priority `L + frequency * cost / size`,
+    and the key of the lowest priority is evicted, setting the inflation value `L` to its priority,
+    so that the keys not accessed for a while age compared with the newly inserted or accessed ones.
+
+    The cost is the compute time of the result recorded by the decorator, or `default_cost` if unknown, e.g. when
+    the result is saved by `save` directly. The size is the estimated size of the result, see `InMemoryCache.sizeof`.
+    """
+
+    uses_size = True
+    uses_cost = True
+
+    def __init__(self, default_cost: float = 1.0) -> None:
+        """
+        Args:
+            default_cost: the cost of the results whose compute time is unknown
+        """
+
+        self.__default_cost = default_cost
+        self.__inflation = 0.0
+        self.__entries: Dict[Hashable, List] = {}
+        """Key to [priority, frequency, cost / size]"""
+
+        self.__heap: List[Tuple[float, int, Hashable]] = []
+        self.__counter = itertools.count()
+
+    def clear(self) -> None:
+        self.__init__(self.__default_cost)
+
+    def insert(self, key: Hashable, size: int, cost: float) -> None:
+        cost = cost if cost is not None else self.__default_cost
+        entry = [0.0, 1, cost / max(size, 1)]
+        self.__entries[key] = entry
+        self.__prioritize(key, entry)
+
+    def access(self, key: Hashable) -> None:
+        entry = self.__entries[key]
+        entry[1] += 1
+        self.__prioritize(key, entry)
+
+    def __prioritize(self, key: Hashable, entry: List) -> None:
+        entry[0] = self.__inflation + entry[1] * entry[2]
+        heapq.heappush(self.__heap, (entry[0], next(self.__counter), key))
+
+        # The outdated heap items are skipped when evicting, rebuild the heap before they outnumber the valid ones
+        if len(self.__heap) > 2 * len(self.__entries) + 64:
+            self.__heap = [(entry[0], next(self.__counter), key) for key, entry in self.__entries.items()]
+            heapq.heapify(self.__heap)
+
+    def remove(self, key: Hashable) -> None:
+        del self.__entries[key]
+
+    def evict(self) -> Hashable:
+        while True:
+            priority, _, key = heapq.heappop(self.__heap)
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] == priority:
+                break
+
+        del self.__entries[key]
+        self.__inflation = priority
+        return key
+
+    def by_hotness(self) -> Sequence[Hashable]:
+        return sorted(self.__entries, key=lambda key: self.__entries[key][0], reverse=True)
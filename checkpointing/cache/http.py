@@ -0,0 +1,394 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing._typing import ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointFailedError, CheckpointNotExist
+from checkpointing.logging import logger
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+from urllib.parse import quote, urlsplit
+import http.client
+import io
+import mmap
+import pickle
+import queue
+import tempfile
+import threading
+
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+"""Raised when a pooled keep-alive connection has been closed by the server, the request is retried once"""
+
+
+class _ConnectionPool:
+    """Keeps up to `size` idle keep-alive connections to a host, the most recently used first."""
+
+    def __init__(self, scheme: str, netloc: str, size: int, timeout: float) -> None:
+        self.__connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        self.__netloc = netloc
+        self.__timeout = timeout
+        self.__idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(size)
+
+    @contextmanager
+    def connection(self, fresh: bool = False) -> Iterator[http.client.HTTPConnection]:
+        """
+        A connection, returned to the pool if the request completes and its response is fully read, closed otherwise.
+
+        Args:
+            fresh: whether to open a new connection instead of reusing an idle one
+        """
+
+        connection = None
+        if not fresh:
+            try:
+                connection = self.__idle.get_nowait()
+            except queue.Empty:
+                pass
+
+        if connection is None:
+            connection = self.__connection_class(self.__netloc, timeout=self.__timeout, blocksize=1 << 16)
+
+        try:
+            yield connection
+        except BaseException:
+            connection.close()
+            raise
+
+        try:
+            self.__idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.__idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class _ChunkedWriter(io.RawIOBase):
+    """Writes to the request body with the chunked transfer encoding."""
+
+    def __init__(self, connection: http.client.HTTPConnection) -> None:
+        self.__connection = connection
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        n = memoryview(data).nbytes
+        if n:
+            self.__connection.send(b"%X\r\n" % n)
+            self.__connection.send(data)
+            self.__connection.send(b"\r\n")
+        return n
+
+    def finish(self) -> None:
+        self.__connection.send(b"0\r\n\r\n")
+
+
+def _early_response(connection: http.client.HTTPConnection, error: OSError) -> Tuple[int, bytes]:
+    """
+    Read the response sent before the server closed the connection during an upload, e.g. denying it.
+    Raises the error of the upload if there is none, e.g. the idle connection was closed by the server.
+
+    Returns:
+        The status and the body
+    """
+
+    try:
+        response = connection.getresponse()
+        return response.status, response.read()
+    except (OSError, http.client.HTTPException):
+        raise error from None
+
+
+class HTTPCache(CacheBase):
+    """
+    Cache the results as objects in an HTTP object store, e.g. an S3-compatible bucket or a plain HTTP server
+    accepting `PUT`, at `<url>/<context id>.pickle`.
+
+    The connections are kept alive in a pool shared by the threads. The results are pickled directly to the request,
+    and unpickled directly from the response, so the pickled payload is never held in memory in full:
+    - With `chunked`, the upload uses the chunked transfer encoding. S3 requires a known length instead,
+      then the result is pickled to a temporary file, in memory up to `part_size`, and streamed from it.
+    - The objects of at least `multipart_threshold` bytes are downloaded in `part_size` ranges concurrently,
+      if the server accepts ranges, into a temporary file they are then unpickled from.
+
+    `exists` checks an object with a `HEAD` request, without downloading it.
+    Authentication, e.g. a bearer token or a presigned query, can be passed as `headers` or in the url.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pickle_protocol: int = None,
+        pool_size: int = None,
+        part_size: int = None,
+        multipart_threshold: int = None,
+        timeout: float = None,
+        headers: Dict[str, str] = None,
+        chunked: bool = True,
+    ) -> None:
+        """
+        Args:
+            url: the url of the directory of the objects, `http://` or `https://`
+            pickle_protocol: the protocol used when pickling the results. If None, use the global default
+                             `cache.pickle_protocol`
+            pool_size: max number of idle connections kept, and of concurrent part downloads.
+                       If None, use the global default `cache.http.pool_size`
+            part_size: the size of the ranges of the concurrent downloads. If None, use the global default `cache.http.part_size`
+            multipart_threshold: the objects of at least this size are downloaded in parts.
+                                 If None, use the global default `cache.http.multipart_threshold`
+            timeout: the socket timeout in seconds. If None, use the global default `cache.http.timeout`
+            headers: added to each request
+            chunked: whether to upload with the chunked transfer encoding, otherwise with a `Content-Length`
+        """
+
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported url {url}, the scheme must be http or https")
+
+        self.__url = url
+        self.__path = parts.path.rstrip("/") + "/"
+        self.__query = f"?{parts.query}" if parts.query else ""
+        self.__pickle_protocol = pickle_protocol if pickle_protocol is not None else defaults["cache.pickle_protocol"]
+        self.__pool_size = pool_size if pool_size is not None else defaults["cache.http.pool_size"]
+        self.__part_size = part_size if part_size is not None else defaults["cache.http.part_size"]
+        self.__multipart_threshold = (
+            multipart_threshold if multipart_threshold is not None else defaults["cache.http.multipart_threshold"]
+        )
+        self.__timeout = timeout if timeout is not None else defaults["cache.http.timeout"]
+        self.__headers = dict(headers or {})
+        self.__chunked = chunked
+        self.__open()
+
+    def __open(self) -> None:
+        parts = urlsplit(self.__url)
+        self.__pool = _ConnectionPool(parts.scheme, parts.netloc, self.__pool_size, self.__timeout)
+        self.__executor: ThreadPoolExecutor = None
+        self.__executor_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["pool", "executor", "executor_lock"]:
+            del state[f"_{HTTPCache.__name__}__{name}"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__open()
+
+    def __object_path(self, context_id: str) -> str:
+        return f"{self.__path}{quote(str(context_id), safe='')}.pickle{self.__query}"
+
+    def __request(self, method: str, context_id: str, headers: Dict[str, str] = None) -> Tuple[int, bytes]:
+        """
+        Send a request without body, and read the response.
+
+        Returns:
+            The status and the body
+        """
+
+        for attempt in range(2):
+            try:
+                with self.__pool.connection(fresh=attempt > 0) as connection:
+                    connection.request(method, self.__object_path(context_id), headers={**self.__headers, **(headers or {})})
+                    response = connection.getresponse()
+                    return response.status, response.read()
+            except _STALE_CONNECTION_ERRORS:
+                if attempt:
+                    raise
+
+    def save(self, context_id: str, result: ReturnValue) -> None:
+        """
+        Save the result with the given context id.
+
+        Args:
+            context_id: identifier of the function call context
+            result: return value of the function call
+        """
+
+        for attempt in range(2):
+            try:
+                with self.__pool.connection(fresh=attempt > 0) as connection:
+                    if self.__chunked:
+                        status, body = self.__put_chunked(connection, context_id, result)
+                    else:
+                        status, body = self.__put_spooled(connection, context_id, result)
+
+                    # Raised within the block to close the connection, the server may not have read the whole body
+                    if status not in (200, 201, 204):
+                        raise CheckpointFailedError(f"Failed to save {context_id} to {self.__url}: HTTP {status} {body[:200]!r}")
+                return
+            except _STALE_CONNECTION_ERRORS:
+                if attempt:
+                    raise
+
+    def __put_chunked(self, connection: http.client.HTTPConnection, context_id: str, result: ReturnValue) -> Tuple[int, bytes]:
+        connection.putrequest("PUT", self.__object_path(context_id), skip_accept_encoding=True)
+        for name, value in {**self.__headers, "Transfer-Encoding": "chunked", "Content-Type": "application/octet-stream"}.items():
+            connection.putheader(name, value)
+        connection.endheaders()
+
+        # Coalesce the small writes of the pickler into chunks, the large buffers are written through
+        writer = _ChunkedWriter(connection)
+        buffered = io.BufferedWriter(writer, buffer_size=1 << 16)
+        try:
+            pickle.dump(result, buffered, protocol=self.__pickle_protocol)
+            buffered.flush()
+            writer.finish()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            return _early_response(connection, e)
+
+        response = connection.getresponse()
+        return response.status, response.read()
+
+    def __put_spooled(self, connection: http.client.HTTPConnection, context_id: str, result: ReturnValue) -> Tuple[int, bytes]:
+        with tempfile.SpooledTemporaryFile(max_size=self.__part_size) as file:
+            pickle.dump(result, file, protocol=self.__pickle_protocol)
+            size = file.tell()
+            file.seek(0)
+
+            headers = {**self.__headers, "Content-Length": str(size), "Content-Type": "application/octet-stream"}
+            try:
+                connection.request("PUT", self.__object_path(context_id), body=file, headers=headers)
+            except (BrokenPipeError, ConnectionResetError) as e:
+                return _early_response(connection, e)
+
+            response = connection.getresponse()
+            return response.status, response.read()
+
+    def retrieve(self, context_id: str) -> ReturnValue:
+        """
+        Retrieve the function return value with the given context id.
+        If there is no cached results for the context_id, throws a checkpointing.exceptions.CheckpointNotExist
+
+        Args:
+            context_id: identifier of the function call context
+
+        Returns:
+            The return value of the function that corresponds to this context id
+        """
+
+        for attempt in range(2):
+            try:
+                return self.__get(context_id, fresh=attempt > 0)
+            except _STALE_CONNECTION_ERRORS:
+                if attempt:
+                    raise
+
+    def __get(self, context_id: str, fresh: bool) -> ReturnValue:
+        with self.__pool.connection(fresh) as connection:
+            connection.request("GET", self.__object_path(context_id), headers=self.__headers)
+            response = connection.getresponse()
+
+            if response.status == 404:
+                response.read()
+            elif response.status != 200:
+                raise CheckpointFailedError(f"Failed to retrieve {context_id} from {self.__url}: HTTP {response.status}")
+            else:
+                length = response.length
+                ranges = "bytes" in (response.getheader("Accept-Ranges") or "")
+                if length is None or length < self.__multipart_threshold or not ranges or length <= self.__part_size:
+                    result = pickle.load(response)
+                    response.read()
+                    return result
+
+                return self.__get_parts(context_id, connection, response)
+
+        # Raised out of the block, so that the drained connection is returned to the pool
+        raise CheckpointNotExist
+
+    def __get_parts(self, context_id: str, connection: http.client.HTTPConnection, response: http.client.HTTPResponse) -> ReturnValue:
+        """
+        Download the object in `part_size` ranges concurrently, the first one from the response,
+        into a temporary file it is then unpickled from.
+        """
+
+        length = response.length
+        etag = response.getheader("ETag")
+
+        with tempfile.TemporaryFile() as file:
+            file.truncate(length)
+            with mmap.mmap(file.fileno(), length) as mapping, memoryview(mapping) as view:
+                parts = [view[start : start + self.__part_size] for start in range(0, length, self.__part_size)]
+                try:
+                    self.__read_into(response, parts[0])
+                    connection.close()  # The rest of the body is not read, so the connection can't be reused
+
+                    futures = [
+                        self.__downloader().submit(self.__get_range, context_id, start, part, etag)
+                        for start, part in zip(range(self.__part_size, length, self.__part_size), parts[1:])
+                    ]
+                    # All the parts are written before the map is closed, even if one fails
+                    wait(futures)
+                    for future in futures:
+                        future.result()
+                finally:
+                    for part in parts:
+                        part.release()
+
+            file.seek(0)
+            return pickle.load(file)
+
+    def __get_range(self, context_id: str, start: int, part: memoryview, etag: str) -> None:
+        headers = {**self.__headers, "Range": f"bytes={start}-{start + part.nbytes - 1}"}
+        if etag is not None:
+            headers["If-Match"] = etag  # The object could be replaced during the download
+
+        with self.__pool.connection() as connection:
+            connection.request("GET", self.__object_path(context_id), headers=headers)
+            response = connection.getresponse()
+
+            if response.status == 206:
+                self.__read_into(response, part)
+                response.read()
+                return
+
+            response.read()
+
+        # Raised out of the block, so that the drained connection is returned to the pool
+        if response.status in (404, 412):
+            raise CheckpointNotExist
+        raise CheckpointFailedError(f"Failed to retrieve a range of {context_id} from {self.__url}: HTTP {response.status}")
+
+    @staticmethod
+    def __read_into(response: http.client.HTTPResponse, view: memoryview) -> None:
+        while view.nbytes:
+            n = response.readinto(view)
+            if not n:
+                raise http.client.IncompleteRead(b"", view.nbytes)
+            view = view[n:]
+
+    def __downloader(self) -> ThreadPoolExecutor:
+        with self.__executor_lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(self.__pool_size, thread_name_prefix="checkpointing-http")
+            return self.__executor
+
+    def exists(self, context_id: str) -> bool:
+        """
+        Returns:
+            Whether there is a result saved with the context id, checked with a `HEAD` request
+        """
+
+        status, _ = self.__request("HEAD", context_id)
+        if status not in (200, 404):
+            raise CheckpointFailedError(f"Failed to check {context_id} in {self.__url}: HTTP {status}")
+        return status == 200
+
+    def delete(self, context_id: str) -> None:
+        """
+        Remove the result saved with the context id, if any.
+        """
+
+        status, body = self.__request("DELETE", context_id)
+        if status not in (200, 202, 204, 404):
+            raise CheckpointFailedError(f"Failed to delete {context_id} from {self.__url}: HTTP {status} {body[:200]!r}")
+
+    def close(self) -> None:
+        """Close the idle connections. The cache can still be used, opening new connections."""
+
+        self.__pool.close()
+        logger.debug(f"Closed the idle connections to {self.__url}")
@@ -0,0 +1,425 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing.cache.eviction import EvictionPolicy, LRUPolicy
+from checkpointing.cache.pickle_file import PickleFileCache
+from checkpointing._typing import ContextId, ReturnValue
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.logging import logger
+from checkpointing.util.atomic import atomic_write
+from checkpointing.util.sizeof import sizeof as default_sizeof
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+import atexit
+import os
+import pathlib
+import pickle
+import threading
+import time
+import weakref
+
+
+class _Entry(NamedTuple):
+    result: ReturnValue
+    size: int
+
+
+class InMemoryCache(CacheBase):
+    """
+    An in-memory cache that has a maximum capacity. When the number of entries cached exceeds the `maxsize`,
+    or their total estimated size exceeds `maxbytes`, the entries chosen by the eviction `policy` will be deleted
+    so that this cache won't consume infinitely large memory. With a `ttl`, the results expire after that many seconds.
+
+    The policies are in `checkpointing.cache.eviction`. For example, to keep the results that took long to compute:
+
+    ```python
+    from checkpointing.cache import InMemoryCache
+    from checkpointing.cache.eviction import GDSFPolicy
+
+    cache = InMemoryCache(maxbytes=1 << 30, policy=GDSFPolicy())
+    ```
+
+    Note that:
+    1. This is an in-memory cache so the results can't be shared between two executions of the program
+    2. The retrieved value will be the same object every time, and will be the same as the saved value. This
+       means that any change on the saved/retrieved object will affect the objects to be retrieved with the
+       same context id later on.
+    3. If using in multiprocessing, this is not a shared memory object, so the cache will not be shared between
+       multiple processes
+
+    To start warm after a restart, `snapshot` the hot keys, optionally with their results, at shutdown or periodically
+    with `snapshot_every`, and `restore` them at startup in a background thread:
+
+    ```python
+    memory = InMemoryCache(maxsize=10000)
+    cache = TieredCache([memory, PickleFileCache()])
+    memory.restore("hot.snapshot", source=cache)
+    memory.snapshot_every("hot.snapshot", interval=600)
+    ```
+    """
+
+    def __init__(
+        self,
+        maxsize: int = None,
+        maxbytes: int = None,
+        ttl: float = None,
+        sizeof: Callable[[Any], int] = None,
+        policy: EvictionPolicy = None,
+    ) -> None:
+        """
+        Args:
+            maxsize: max number of entries of this cache. If None, the number of entries is not limited
+            maxbytes: max total size in bytes of the cached results, as estimated by `sizeof`.
+                      A result larger than this is not cached. If None, the size is not limited
+            ttl: the number of seconds after which a saved result expires. If None, the results don't expire
+            sizeof: estimates the size of a result in bytes. If None, use `checkpointing.util.sizeof.sizeof`,
+                    which knows about numpy arrays and pandas objects, see `register_sizeof` for other types
+            policy: chooses the entries to evict. If None, use `LRUPolicy`
+        """
+        self.__maxsize = maxsize
+        self.__maxbytes = maxbytes
+        self.__ttl = ttl
+        self.__sizeof = sizeof if sizeof is not None else default_sizeof
+        self.__policy = policy if policy is not None else LRUPolicy()
+        self.__bounded = maxsize is not None or maxbytes is not None
+        self.__nbytes = 0
+
+        self.__d: Dict[ContextId, _Entry] = {}
+        self.__lock = threading.Lock()
+
+        # With a single ttl, the saving order is the expiry order, so the expired entries are at the front
+        self.__expiries: Dict[ContextId, float] = OrderedDict()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state[f"_{InMemoryCache.__name__}__lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.Lock()
+
+    @property
+    def policy(self) -> EvictionPolicy:
+        return self.__policy
+
+    @property
+    def nbytes(self) -> int:
+        """The total estimated size of the cached results, only tracked when `maxbytes` is set."""
+        return self.__nbytes
+
+    def __len__(self) -> int:
+        return len(self.__d)
+
+    def save(self, context_id: ContextId, result: ReturnValue) -> None:
+        self.__put(context_id, result, None)
+
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: ContextId,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        if self.__bounded and self.__policy.uses_cost:
+            self.__put(context_id, result, run_time)
+        else:
+            self.save(context_id, result)
+
+    def __put(self, context_id: ContextId, result: ReturnValue, cost: float) -> None:
+        measured = self.__maxbytes is not None or (self.__bounded and self.__policy.uses_size)
+        size = self.__sizeof(result) if measured else 0
+
+        with self.__lock:
+            self.__discard(context_id)
+
+            if self.__maxbytes is not None and size > self.__maxbytes:
+                logger.debug(f"Not caching the result of {context_id}, its size {size} exceeds maxbytes {self.__maxbytes}")
+                return
+
+            self.__insert(context_id, result, size, cost)
+            self.__evict()
+
+    def __insert(self, context_id: ContextId, result: ReturnValue, size: int, cost: float) -> None:
+        self.__d[context_id] = _Entry(result, size)
+        self.__nbytes += size
+        if self.__ttl is not None:
+            self.__expiries[context_id] = time.monotonic() + self.__ttl
+        if self.__bounded:
+            self.__policy.insert(context_id, size, cost)
+
+    def retrieve(self, context_id: ContextId) -> ReturnValue:
+        with self.__lock:
+            entry = self.__d.get(context_id)
+            if entry is None:
+                raise CheckpointNotExist
+
+            if self.__ttl is not None and self.__expiries[context_id] <= time.monotonic():
+                self.__discard(context_id)
+                raise CheckpointNotExist
+
+            if self.__bounded:
+                self.__policy.access(context_id)
+
+            return entry.result
+
+    def __discard(self, context_id: ContextId) -> None:
+        entry = self.__d.pop(context_id, None)
+        if entry is None:
+            return
+
+        self.__nbytes -= entry.size
+        if self.__ttl is not None:
+            del self.__expiries[context_id]
+        if self.__bounded:
+            self.__policy.remove(context_id)
+
+    def __evict(self) -> None:
+        """
+        Remove the expired entries, then the entries chosen by the policy while the cache is over its bounds.
+        Each entry is removed at most once after being saved, so this is O(1) amortized per save with `LRUPolicy`.
+        """
+
+        if self.__ttl is not None:
+            now = time.monotonic()
+            while self.__expiries:
+                context_id, expiry = next(iter(self.__expiries.items()))
+                if expiry > now:
+                    break
+                self.__discard(context_id)
+
+        while self.__d and (
+            (self.__maxsize is not None and len(self.__d) > self.__maxsize)
+            or (self.__maxbytes is not None and self.__nbytes > self.__maxbytes)
+        ):
+            context_id = self.__policy.evict()
+            entry = self.__d.pop(context_id)
+            self.__nbytes -= entry.size
+            if self.__ttl is not None:
+                del self.__expiries[context_id]
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Remove all the cached results. The results are not organized by function, so `context` must be None.
+        """
+
+        if context is not None:
+            raise ValueError(f"{self.__class__.__name__} does not support clearing the results of a function")
+
+        with self.__lock:
+            self.__d.clear()
+            self.__expiries.clear()
+            self.__policy.clear()
+            self.__nbytes = 0
+
+    def snapshot(self, path: os.PathLike, values: bool = False) -> int:
+        """
+        Write the keys, from the hottest to the coldest according to the eviction policy, to a file for `restore`.
+        The file is replaced atomically, so a snapshot interrupted by a crash leaves the previous one.
+
+        Args:
+            path: the snapshot file
+            values: whether to also write the results, otherwise they are retrieved from the `source` of `restore`.
+                    The results that can't be pickled are written without their values.
+
+        Returns:
+            The number of keys written
+        """
+
+        with self.__lock:
+            keys = self.__policy.by_hotness() if self.__bounded else list(reversed(self.__d))
+            entries = [(key, self.__d[key].result) for key in keys]
+
+        path = pathlib.Path(path)
+        with atomic_write(path) as file:
+            # Each record is a separate pickle, so that a result which can't be pickled does not corrupt the stream
+            pickle.dump({"version": 1, "values": values}, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+            for key, result in entries:
+                if values:
+                    try:
+                        data = pickle.dumps((key, True, result), protocol=pickle.HIGHEST_PROTOCOL)
+                    except Exception as e:
+                        logger.debug(f"Snapshot {key} without its value, which can't be pickled: {e!r}")
+                    else:
+                        file.write(data)
+                        continue
+
+                pickle.dump((key, False, None), file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return len(entries)
+
+    def restore(self, path: os.PathLike, source: CacheBase = None, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load the entries of a `snapshot`, from the hottest, while the cache keeps serving.
+        The keys saved meanwhile are not overwritten, and the restoration stops when the cache is full,
+        so the restored entries never evict any. A missing snapshot file restores nothing.
+
+        Args:
+            path: the snapshot file
+            source: the cache to retrieve the results not in the snapshot from, e.g. the slower tiers.
+                    If None, only the results in the snapshot are restored.
+                    If it is a `TieredCache` including this cache, the results are retrieved from its other tiers,
+                    without promoting them. The results of a `namespaced` `PickleFileCache` are found in any version
+                    directory, the most recently used first.
+            background: whether to restore in a daemon thread, otherwise restore before returning
+
+        Returns:
+            The restoring thread, which can be joined to wait for the restoration, or None if not in background
+        """
+
+        if not background:
+            self.__restore(pathlib.Path(path), source)
+            return None
+
+        thread = threading.Thread(
+            target=self.__restore,
+            args=(pathlib.Path(path), source),
+            name="checkpointing-warm-restore",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def __restore(self, path: pathlib.Path, source: Optional[CacheBase]) -> None:
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            logger.info(f"No snapshot to restore at {path}")
+            return
+
+        sources = self.__restore_sources(source)
+        restored = 0
+        with file:
+            pickle.load(file)  # Header
+
+            while True:
+                try:
+                    key, has_value, result = pickle.load(file)
+                except EOFError:
+                    break
+
+                if key in self.__d:
+                    continue
+
+                if not has_value:
+                    try:
+                        result = _retrieve_first(sources, key)
+                    except CheckpointNotExist:
+                        continue
+                    except Exception as e:
+                        logger.warning(f"Failed to restore {key} from {source}: {e!r}")
+                        continue
+
+                measured = self.__maxbytes is not None or (self.__bounded and self.__policy.uses_size)
+                size = self.__sizeof(result) if measured else 0
+
+                with self.__lock:
+                    if (self.__maxsize is not None and len(self.__d) >= self.__maxsize) or (
+                        self.__maxbytes is not None and self.__nbytes + size > self.__maxbytes
+                    ):
+                        break
+
+                    if key not in self.__d:
+                        self.__insert(key, result, size, None)
+                        restored += 1
+
+        logger.info(f"Restored {restored} entries from the snapshot {path}")
+
+    def __restore_sources(self, source: Optional[CacheBase]) -> List[CacheBase]:
+        """
+        Returns:
+            The caches to retrieve the results from. A `TieredCache` is replaced by its tiers other than this cache,
+            as retrieving from it would promote the results into this cache, evicting the entries being served.
+        """
+
+        from checkpointing.cache.tiered import TieredCache  # Which imports this module
+
+        if source is None:
+            return []
+        if isinstance(source, TieredCache):
+            return [tier.cache for tier in source.tiers if tier.cache is not self]
+        return [source]
+
+    def snapshot_every(self, path: os.PathLike, interval: float, values: bool = False) -> "PeriodicSnapshot":
+        """
+        Snapshot the cache in a daemon thread every `interval` seconds, and when the interpreter exits.
+
+        Args:
+            path: the snapshot file
+            interval: seconds between the snapshots
+            values: whether to also write the results, see `snapshot`
+
+        Returns:
+            The periodic snapshot, which can be stopped
+        """
+
+        return PeriodicSnapshot(self, path, interval, values)
+
+
+class PeriodicSnapshot:
+    """Snapshots an `InMemoryCache` periodically, without keeping it alive."""
+
+    def __init__(self, cache: InMemoryCache, path: os.PathLike, interval: float, values: bool) -> None:
+        self.__cache = weakref.ref(cache)
+        self.__path = path
+        self.__interval = interval
+        self.__values = values
+        self.__stopped = threading.Event()
+        self.__snapshot_lock = threading.Lock()
+
+        self.__thread = threading.Thread(target=self.__run, name="checkpointing-snapshot", daemon=True)
+        self.__thread.start()
+        atexit.register(self.stop)
+
+    def __run(self) -> None:
+        while not self.__stopped.wait(self.__interval):
+            if not self.__snapshot():
+                return
+
+    def __snapshot(self) -> bool:
+        cache = self.__cache()
+        if cache is None:
+            return False
+
+        with self.__snapshot_lock:
+            try:
+                cache.snapshot(self.__path, self.__values)
+            except Exception as e:
+                logger.warning(f"Failed to snapshot the cache to {self.__path}: {e!r}")
+
+        return True
+
+    def stop(self, final: bool = True) -> None:
+        """
+        Stop snapshotting.
+
+        Args:
+            final: whether to take a last snapshot
+        """
+
+        if self.__stopped.is_set():
+            return
+
+        self.__stopped.set()
+        atexit.unregister(self.stop)
+        self.__thread.join()
+
+        if final:
+            self.__snapshot()
+
+
+def _retrieve_first(caches: Sequence[CacheBase], context_id: ContextId) -> ReturnValue:
+    """
+    Returns:
+        The result from the first cache that has it, raises CheckpointNotExist if none has
+    """
+
+    for cache in caches:
+        try:
+            if isinstance(cache, PickleFileCache):
+                return cache._retrieve_any_version(context_id)
+            return cache.retrieve(context_id)
+        except CheckpointNotExist:
+            continue
+
+    raise CheckpointNotExist
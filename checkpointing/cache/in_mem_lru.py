@@ -1,13 +1,13 @@
-from checkpointing.cache.base import CacheBase
-from checkpointing._typing import ContextId, ReturnValue
-from checkpointing.exceptions import CheckpointNotExist
-from collections import OrderedDict
+from checkpointing.cache.eviction import LRUPolicy
+from checkpointing.cache.in_mem import InMemoryCache
+from typing import Any, Callable
 
 
-class InMemoryLRUCache(CacheBase):
+class InMemoryLRUCache(InMemoryCache):
     """
     An in-memory cache that has a maximum capacity. When the number of entries cached exceeds the `maxsize`,
-    the Least Recently Used entry will be deleted so that this cache won't consume infinitely large memory.
+    or their total estimated size exceeds `maxbytes`, the Least Recently Used entries will be deleted
+    so that this cache won't consume infinitely large memory. With a `ttl`, the results expire after that many seconds.
 
     Note that:
     1. This is an in-memory cache so the results can't be shared between two executions of the program
@@ -21,34 +21,24 @@ class InMemoryLRUCache(CacheBase):
        with this cache.
     4. If using in multiprocessing, this is not a shared memory object, so the cache will not be shared between
        multiple processes
+
+    See `InMemoryCache` for the other eviction policies.
     """
 
-    def __init__(self, maxsize=None) -> None:
+    def __init__(
+        self,
+        maxsize: int = None,
+        maxbytes: int = None,
+        ttl: float = None,
+        sizeof: Callable[[Any], int] = None,
+    ) -> None:
         """
         Args:
-            maxsize: max size of this cache. If None, the size will be infinite
+            maxsize: max number of entries of this cache. If None, the number of entries is not limited
+            maxbytes: max total size in bytes of the cached results, as estimated by `sizeof`.
+                      A result larger than this is not cached. If None, the size is not limited
+            ttl: the number of seconds after which a saved result expires. If None, the results don't expire
+            sizeof: estimates the size of a result in bytes. If None, use `checkpointing.util.sizeof.sizeof`,
+                    which knows about numpy arrays and pandas objects, see `register_sizeof` for other types
         """
-        self.__maxsize = maxsize
-
-        if self.__maxsize is None:
-            self.__d = {}
-        else:
-            self.__d = OrderedDict()
-
-    def save(self, context_id: ContextId, result: ReturnValue) -> None:
-        self.__d[context_id] = result
-
-        if self.__maxsize is not None:
-            self.__d.move_to_end(context_id)
-
-            if len(self.__d) > self.__maxsize:
-                self.__d.popitem(last=False)
-
-    def retrieve(self, context_id: ContextId) -> ReturnValue:
-        if context_id not in self.__d:
-            raise CheckpointNotExist
-
-        if self.__maxsize is not None:
-            self.__d.move_to_end(context_id)
-
-        return self.__d[context_id]
+        super().__init__(maxsize, maxbytes, ttl, sizeof, LRUPolicy())
@@ -0,0 +1,128 @@
+"""
+The index of the entry files of `checkpointing.cache.PickleFileCache` used to evict entries under a size budget.
+
+Each entry is recorded with its size, the time it took to compute, and its priority, `last access time + cost weight * cost`.
+The entries with the lowest priority are evicted first, i.e. the least recently used ones,
+unless they were expensive to compute. The total size is maintained by triggers,
+so that checking the budget and finding the victims do not scan the entries.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Iterable, List, Tuple
+
+from checkpointing.util.sqlite import ConnectionPerThread
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    priority REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_priority ON entries (priority);
+
+CREATE TABLE IF NOT EXISTS total (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL);
+INSERT OR IGNORE INTO total VALUES (0, 0);
+
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE total SET size = size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE total SET size = size - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE total SET size = size - old.size + new.size;
+END;
+"""
+
+# Not INSERT OR REPLACE, whose implicit deletion does not fire the delete trigger
+_UPSERT = (
+    "INSERT INTO entries VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (path) DO UPDATE SET size = excluded.size, cost = excluded.cost, priority = excluded.priority"
+)
+
+
+def _initialize(connection: sqlite3.Connection) -> None:
+    connection.executescript(_SCHEMA)
+
+
+class EntryIndex:
+    """Sizes, costs and access priorities of the entry files, by their paths relative to the cache directory."""
+
+    def __init__(self, path: os.PathLike, cost_weight: float) -> None:
+        """
+        Args:
+            path: the database file
+            cost_weight: the seconds of access recency that a second of computation is worth
+        """
+
+        self.__connections = ConnectionPerThread(path, _initialize)
+        self.__cost_weight = cost_weight
+
+    @property
+    def total_size(self) -> int:
+        (size,) = self.__connections.get().execute("SELECT size FROM total").fetchone()
+        return size
+
+    def __len__(self) -> int:
+        (count,) = self.__connections.get().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
+
+    def add(self, path: str, size: int, cost: float = None) -> None:
+        """
+        Record a saved entry, replacing the previous record of the path.
+        """
+
+        cost = cost or 0.0
+        self.__connections.get().execute(_UPSERT, (path, size, cost, time.time() + self.__cost_weight * cost))
+
+    def add_many(self, entries: Iterable[Tuple[str, int, float]]) -> None:
+        """
+        Record many entries of `(path, size, cost)` in one transaction.
+        """
+
+        now = time.time()
+        connection = self.__connections.get()
+
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany(
+                _UPSERT,
+                ((path, size, cost or 0.0, now + self.__cost_weight * (cost or 0.0)) for path, size, cost in entries),
+            )
+
+    def touch(self, path: str) -> None:
+        """
+        Record an access of the entry.
+        """
+
+        self.__connections.get().execute(
+            "UPDATE entries SET priority = ? + ? * cost WHERE path = ?",
+            (time.time(), self.__cost_weight, path),
+        )
+
+    def remove(self, path: str) -> None:
+        self.__connections.get().execute("DELETE FROM entries WHERE path = ?", (path,))
+
+    def remove_prefix(self, prefix: str) -> None:
+        """
+        Remove the records of all the paths starting with the prefix, e.g. the entries in a directory.
+        """
+
+        self.__connections.get().execute(
+            "DELETE FROM entries WHERE path >= ? AND path < ?",
+            (prefix, prefix + "\U0010ffff"),
+        )
+
+    def clear(self) -> None:
+        self.__connections.get().execute("DELETE FROM entries")
+
+    def lowest_priority(self, n: int) -> List[Tuple[str, int]]:
+        """
+        Returns:
+            `(path, size)` of at most n entries with the lowest priority, which should be evicted first
+        """
+
+        return self.__connections.get().execute("SELECT path, size FROM entries ORDER BY priority LIMIT ?", (n,)).fetchall()
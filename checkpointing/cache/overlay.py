@@ -0,0 +1,177 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing.cache.pickle_file import PickleFileCache
+from checkpointing._typing import ContextId, ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.logging import logger
+from collections import Counter
+from typing import List, Sequence
+import threading
+
+PROMOTIONS = ["none", "copy", "link"]
+"""
+- `"none"`: the results found in the layers are not saved in the top cache.
+- `"copy"`: the results are saved in the top cache.
+- `"link"`: the files of the results are hard linked into the top cache, or copied if that is not possible,
+  if the top cache and the layer are `PickleFileCache`. Otherwise the results are saved as with `"copy"`.
+"""
+
+_MAX_TRACKED = 100000
+"""Max number of context ids whose reads are counted, the counts are reset beyond it"""
+
+
+class OverlayCache(CacheBase):
+    """
+    Looks up the results in a writable top cache, then in read-only layers,
+    e.g. a local `PickleFileCache` over a team-wide one on shared storage.
+
+    The results are only saved in, and cleared from, the top cache, the layers are never modified.
+    A result cleared from the top cache is thus still found in the layers.
+
+    A result read from a layer `promote_after` times is promoted to the top cache, see `PROMOTIONS`,
+    so that the next reads are served locally. The reads are counted per process.
+
+    ```python
+    from checkpointing.cache import OverlayCache, PickleFileCache
+
+    cache = OverlayCache(PickleFileCache("local"), [PickleFileCache("/shared/golden")], promote="link")
+    ```
+    """
+
+    def __init__(
+        self,
+        top: CacheBase,
+        layers: Sequence[CacheBase],
+        promote: str = None,
+        promote_after: int = None,
+    ) -> None:
+        """
+        Args:
+            top: the writable cache, looked up first
+            layers: the read-only caches, looked up in order
+            promote: one of `PROMOTIONS`. If None, use the global default `cache.overlay.promote`
+            promote_after: the number of reads from the layers after which a result is promoted.
+                           If None, use the global default `cache.overlay.promote_after`
+        """
+
+        self.__top = top
+        self.__layers = list(layers)
+
+        self.__promote = promote if promote is not None else defaults["cache.overlay.promote"]
+        if self.__promote not in PROMOTIONS:
+            raise ValueError(f"Invalid argument value for promote: {self.__promote}, must be one of {PROMOTIONS}")
+
+        self.__promote_after = promote_after if promote_after is not None else defaults["cache.overlay.promote_after"]
+        self.__open()
+
+    def __open(self) -> None:
+        self.__reads = Counter()
+        self.__lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["reads", "lock"]:
+            del state[f"_{OverlayCache.__name__}__{name}"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__open()
+
+    @property
+    def top(self) -> CacheBase:
+        return self.__top
+
+    @property
+    def layers(self) -> List[CacheBase]:
+        return list(self.__layers)
+
+    def save(self, context_id: ContextId, result: ReturnValue) -> None:
+        self.__top.save(context_id, result)
+
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: ContextId,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        self.__top.save_with_context(context, context_id, result, run_time)
+
+    def retrieve(self, context_id: ContextId) -> ReturnValue:
+        try:
+            return self.__top.retrieve(context_id)
+        except CheckpointNotExist:
+            pass
+
+        for layer in self.__layers:
+            try:
+                result = layer.retrieve(context_id)
+            except CheckpointNotExist:
+                continue
+
+            if self.__hot(context_id):
+                self.__promote_result(layer, None, context_id, result)
+            return result
+
+        raise CheckpointNotExist
+
+    def retrieve_with_context(self, context: FuncCallContext, context_id: ContextId) -> ReturnValue:
+        try:
+            return self.__top.retrieve_with_context(context, context_id)
+        except CheckpointNotExist:
+            pass
+
+        for layer in self.__layers:
+            try:
+                result = layer.retrieve_with_context(context, context_id)
+            except CheckpointNotExist:
+                continue
+
+            if self.__hot(context_id):
+                self.__promote_result(layer, context, context_id, result)
+            return result
+
+        raise CheckpointNotExist
+
+    def __hot(self, context_id: ContextId) -> bool:
+        """
+        Count a read from the layers.
+
+        Returns:
+            Whether the result should be promoted
+        """
+
+        if self.__promote == "none":
+            return False
+
+        with self.__lock:
+            if len(self.__reads) >= _MAX_TRACKED:
+                self.__reads.clear()
+
+            self.__reads[context_id] += 1
+            if self.__reads[context_id] < self.__promote_after:
+                return False
+
+            del self.__reads[context_id]
+            return True
+
+    def __promote_result(self, layer: CacheBase, context: FuncCallContext, context_id: ContextId, result: ReturnValue) -> None:
+        if self.__promote == "link" and isinstance(self.__top, PickleFileCache) and isinstance(layer, PickleFileCache):
+            if self.__top._link_from(layer, context_id, context):
+                logger.debug(f"Linked the result of {context_id} into the top cache")
+                return
+
+        if context is None:
+            self.__top.save(context_id, result)
+        else:
+            self.__top.save_with_context(context, context_id, result)
+        logger.debug(f"Copied the result of {context_id} into the top cache")
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Clear the top cache, the layers are read-only.
+        """
+
+        self.__top.clear(context)
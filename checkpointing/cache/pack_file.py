@@ -0,0 +1,444 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing._typing import ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.logging import logger
+from checkpointing.util.sqlite import ConnectionPerThread
+from typing import BinaryIO, Dict, Tuple
+import mmap
+import os
+import pathlib
+import pickle
+import socket
+import sqlite3
+import threading
+import uuid
+import weakref
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    context_id TEXT PRIMARY KEY,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_segment ON entries (segment);
+
+CREATE TABLE IF NOT EXISTS segments (
+    name TEXT PRIMARY KEY,
+    state INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL
+);
+"""
+
+_OPEN, _SEALED, _COMPACTING, _COMPACTED = range(4)
+"""
+The states of a segment: appended to by the process `pid` on `host`, sealed, being compacted by that process,
+and compacted, with no entry left, until its file is deleted
+"""
+
+
+def _initialize(connection: sqlite3.Connection) -> None:
+    connection.executescript(_SCHEMA)
+
+
+def _writer_alive(host: str, pid: int) -> bool:
+    """
+    Returns:
+        Whether the process that writes a segment may still be running,
+        True if it runs on another host or this can't be told, e.g. on Windows
+    """
+
+    if host != socket.gethostname() or os.name == "nt":
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+class _SegmentWriter:
+    """The segment a process appends to, sealed when it is full or the process exits."""
+
+    def __init__(self, directory: pathlib.Path, connections: ConnectionPerThread) -> None:
+        self.directory = directory
+        self.connections = connections
+        self.lock = threading.Lock()
+        self.name: str = None
+        self.file: BinaryIO = None
+        self.pid = os.getpid()
+
+    def append(self, data: bytes, segment_size: int) -> Tuple[str, int, bool]:
+        """
+        Append the data to the segment, starting a new one if it would exceed the segment size.
+        Must be called with the lock held.
+
+        Returns:
+            The segment name, the offset of the data, and whether the previous segment has been sealed
+        """
+
+        if self.pid != os.getpid():  # Forked, the segment belongs to the parent process
+            self.file, self.name, self.pid = None, None, os.getpid()
+
+        sealed = False
+        if self.file is not None and self.file.tell() > 0 and self.file.tell() + len(data) > segment_size:
+            sealed = self.seal()
+
+        if self.file is None:
+            self.name = uuid.uuid4().hex
+            self.connections.get().execute(
+                "INSERT INTO segments VALUES (?, ?, ?, ?)", (self.name, _OPEN, socket.gethostname(), self.pid)
+            )
+            self.file = open(self.directory.joinpath(f"{self.name}.pack"), "ab")
+
+        offset = self.file.tell()
+        self.file.write(data)
+        self.file.flush()
+        return self.name, offset, sealed
+
+    def seal(self) -> bool:
+        """
+        Close the segment, so that it can be compacted.
+
+        Returns:
+            Whether there was a segment to seal
+        """
+
+        if self.file is None or self.pid != os.getpid():
+            return False
+
+        self.file.close()
+        self.file = None
+        self.connections.get().execute("UPDATE segments SET state = ? WHERE name = ?", (_SEALED, self.name))
+        return True
+
+
+class PackFileCache(CacheBase):
+    """
+    Cache the results by appending them to large segment files, `<uuid>.pack` in the directory,
+    with an SQLite index `checkpointing.sqlite` from the context id to the segment, offset and length.
+
+    Writes are sequential, each process appends to its own segment,
+    and reads are slices of the memory mapped segments, so a handful of large files hold all the results.
+    This suits network filesystems better than many small files.
+
+    Saving a result again, or clearing it, leaves the previous data in its segment.
+    A full segment is sealed and a new one is started, and the sealed segments
+    whose live data is less than `compaction_threshold` are compacted in a background thread,
+    moving the live data to the current segment and deleting them. See `compact`.
+    The segments left open by the processes that exited without sealing them, e.g. killed,
+    are sealed by the compaction on the same host.
+
+    Each process memory maps the segments it reads. The maps of the segments compacted by any process
+    are closed when a segment is mapped again, so that their space is freed.
+    A segment is compacted by one process, which claims it in the index. Its file is deleted by the compaction,
+    or by a later one if it can't be deleted yet, e.g. while it is still mapped on Windows.
+    """
+
+    def __init__(
+        self,
+        directory: os.PathLike = None,
+        pickle_protocol: int = None,
+        segment_size: int = None,
+        compaction_threshold: float = None,
+    ) -> None:
+        """
+        Args:
+            directory: the directory of the segments and the index, created if it does not exist.
+                       If None, use the global default `cache.filesystem.directory`
+            pickle_protocol: the protocol used when pickling the results. If None, use the global default
+                             `cache.pickle_protocol`
+            segment_size: the size in bytes after which a new segment is started.
+                          If None, use the global default `cache.pack.segment_size`
+            compaction_threshold: the sealed segments whose live data is less than this ratio of their size are compacted.
+                                  If None, use the global default `cache.pack.compaction_threshold`
+        """
+
+        self.__directory = pathlib.Path(directory if directory is not None else defaults["cache.filesystem.directory"])
+        self.__directory.mkdir(parents=True, exist_ok=True)
+
+        self.__pickle_protocol = pickle_protocol if pickle_protocol is not None else defaults["cache.pickle_protocol"]
+        self.__segment_size = segment_size if segment_size is not None else defaults["cache.pack.segment_size"]
+        self.__compaction_threshold = (
+            compaction_threshold if compaction_threshold is not None else defaults["cache.pack.compaction_threshold"]
+        )
+
+        self.__connections = ConnectionPerThread(self.__directory.joinpath("checkpointing.sqlite"), _initialize)
+        self.__open()
+
+    def __open(self) -> None:
+        """Initialize the states of this process."""
+
+        self.__writer = _SegmentWriter(self.__directory, self.__connections)
+        self.__maps: Dict[str, Tuple[mmap.mmap, int]] = {}
+        """The maps of the segments and the inodes of their files"""
+        self.__compaction: threading.Thread = None
+
+        # Seal the segment at exit, or when the cache is garbage collected
+        weakref.finalize(self, _seal, self.__writer)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["writer", "maps", "compaction"]:
+            del state[f"_{PackFileCache.__name__}__{name}"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__open()
+
+    def save(self, context_id: str, result: ReturnValue) -> None:
+        """
+        Save the result with the given context id.
+
+        Args:
+            context_id: identifier of the function call context
+            result: return value of the function call
+        """
+
+        data = pickle.dumps(result, protocol=self.__pickle_protocol)
+
+        with self.__writer.lock:
+            segment, offset, sealed = self.__writer.append(data, self.__segment_size)
+            self.__connections.get().execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (context_id, segment, offset, len(data)),
+            )
+
+        if sealed:
+            self.__compact_in_background()
+
+    def retrieve(self, context_id: str) -> ReturnValue:
+        """
+        Retrieve the function return value with the given context id.
+        If there is no cached results for the context_id, throws a checkpointing.exceptions.CheckpointNotExist
+
+        Args:
+            context_id: identifier of the function call context
+
+        Returns:
+            The return value of the function that corresponds to this context id
+        """
+
+        # The segment could be compacted after the lookup, then the entry is looked up again at its new location
+        for _ in range(2):
+            row = self.__connections.get().execute(
+                "SELECT segment, offset, length FROM entries WHERE context_id = ?", (context_id,)
+            ).fetchone()
+
+            if row is None:
+                raise CheckpointNotExist
+
+            segment, offset, length = row
+            try:
+                view = memoryview(self.__map(segment, offset + length))
+            except (FileNotFoundError, ValueError):  # ValueError if the map is closed by another thread meanwhile
+                continue
+
+            with view, view[offset : offset + length] as data:
+                return pickle.loads(data)
+
+        raise CheckpointNotExist
+
+    def __map(self, segment: str, size: int) -> mmap.mmap:
+        """
+        Returns:
+            The segment memory mapped read-only, remapped if it has grown to less than `size` bytes
+        """
+
+        cached = self.__maps.get(segment)
+        if cached is not None and len(cached[0]) >= size:
+            return cached[0]
+
+        with open(self.__directory.joinpath(f"{segment}.pack"), "rb") as file:
+            segment_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            inode = os.fstat(file.fileno()).st_ino
+
+        # The entries have moved, maybe out of the segments compacted by another process
+        self.__drop_stale_maps()
+        self.__maps[segment] = (segment_map, inode)
+        return segment_map
+
+    def __drop_stale_maps(self) -> None:
+        """
+        Close the maps of the segments that are compacted, or whose files are gone or replaced,
+        so that the files can be deleted and their space freed.
+        """
+
+        if not self.__maps:
+            return
+
+        compacted = {
+            name
+            for (name,) in self.__connections.get().execute(
+                "SELECT name FROM segments WHERE state = ? OR state = ?", (_COMPACTING, _COMPACTED)
+            )
+        }
+
+        for segment, (_, inode) in list(self.__maps.items()):
+            try:
+                stale = segment in compacted or self.__directory.joinpath(f"{segment}.pack").stat().st_ino != inode
+            except FileNotFoundError:
+                stale = True
+
+            if stale:
+                self.__close_map(segment)
+
+    def __close_map(self, segment: str) -> None:
+        cached = self.__maps.pop(segment, None)
+        if cached is None:
+            return
+
+        try:
+            cached[0].close()
+        except BufferError:  # Being read by another thread, closed when it is garbage collected
+            pass
+
+    def __len__(self) -> int:
+        (count,) = self.__connections.get().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Remove all the cached results. The results are not organized by function, so `context` must be None.
+        The space is reclaimed when the segments are compacted.
+        """
+
+        if context is not None:
+            raise ValueError("PackFileCache does not support clearing the results of a function")
+
+        self.__connections.get().execute("DELETE FROM entries")
+
+    def compact(self) -> int:
+        """
+        Compact the sealed segments whose live data is less than `compaction_threshold` of their size:
+        append their live entries to the current segment, and delete them.
+        The entries saved again meanwhile are not overwritten.
+        The segments of the dead processes on this host are sealed first,
+        and the compacted segments whose files could not be deleted before are deleted.
+
+        Returns:
+            The number of segments compacted
+        """
+
+        self.__recover_orphans()
+        self.__delete_compacted()
+
+        connection = self.__connections.get()
+        sealed = connection.execute(
+            "SELECT name, COALESCE((SELECT SUM(length) FROM entries WHERE segment = name), 0) "
+            "FROM segments WHERE state = ?",
+            (_SEALED,),
+        ).fetchall()
+
+        compacted = 0
+        for segment, live in sealed:
+            try:
+                size = self.__directory.joinpath(f"{segment}.pack").stat().st_size
+            except FileNotFoundError:  # Compacted by another process
+                continue
+
+            if live >= self.__compaction_threshold * size:
+                continue
+
+            # Claim the segment, so that another process compacting at the same time does not move its entries again
+            claimed = connection.execute(
+                "UPDATE segments SET state = ?, host = ?, pid = ? WHERE name = ? AND state = ?",
+                (_COMPACTING, socket.gethostname(), os.getpid(), segment, _SEALED),
+            ).rowcount
+            if not claimed:
+                continue
+
+            self.__move_live_entries(segment)
+            connection.execute("UPDATE segments SET state = ? WHERE name = ?", (_COMPACTED, segment))
+            compacted += 1
+
+        if compacted:
+            logger.info(f"Compacted {compacted} segments in {self.__directory}")
+
+        self.__drop_stale_maps()
+        self.__delete_compacted()
+        return compacted
+
+    def __recover_orphans(self) -> None:
+        """
+        Seal the segments left open, or being compacted, by the processes that exited, so that they are compacted.
+        """
+
+        connection = self.__connections.get()
+        for segment, state, host, pid in connection.execute(
+            "SELECT name, state, host, pid FROM segments WHERE state = ? OR state = ?", (_OPEN, _COMPACTING)
+        ).fetchall():
+            if not _writer_alive(host, pid):
+                connection.execute("UPDATE segments SET state = ? WHERE name = ? AND state = ?", (_SEALED, segment, state))
+                logger.info(f"Sealed the segment {segment} of the exited process {pid}")
+
+    def __delete_compacted(self) -> None:
+        """
+        Delete the files of the compacted segments, unless they are still mapped on Windows,
+        then they are deleted by a later compaction.
+        """
+
+        connection = self.__connections.get()
+        for (segment,) in connection.execute("SELECT name FROM segments WHERE state = ?", (_COMPACTED,)).fetchall():
+            self.__close_map(segment)
+            try:
+                self.__directory.joinpath(f"{segment}.pack").unlink(missing_ok=True)
+            except PermissionError:  # Mapped by another process on Windows
+                logger.debug(f"The compacted segment {segment} is still in use, deleted later")
+                continue
+
+            connection.execute("DELETE FROM segments WHERE name = ?", (segment,))
+
+    def __move_live_entries(self, segment: str) -> None:
+        connection = self.__connections.get()
+        entries = connection.execute("SELECT context_id, offset, length FROM entries WHERE segment = ?", (segment,)).fetchall()
+        if not entries:
+            return
+
+        try:
+            file = open(self.__directory.joinpath(f"{segment}.pack"), "rb")
+        except FileNotFoundError:  # Compacted by another process or thread
+            return
+
+        with file:
+            for context_id, offset, length in entries:
+                file.seek(offset)
+                data = file.read(length)
+
+                with self.__writer.lock:
+                    new_segment, new_offset, _ = self.__writer.append(data, self.__segment_size)
+                    connection.execute(
+                        "UPDATE entries SET segment = ?, offset = ? WHERE context_id = ? AND segment = ? AND offset = ?",
+                        (new_segment, new_offset, context_id, segment, offset),
+                    )
+
+    def __compact_in_background(self) -> None:
+        if self.__compaction is not None and self.__compaction.is_alive():
+            return
+
+        self.__compaction = threading.Thread(target=self.compact, name="checkpointing-pack-compaction", daemon=True)
+        self.__compaction.start()
+
+    def close(self) -> None:
+        """
+        Seal the current segment, so that it can be compacted. A new segment is started by the next save.
+        """
+
+        with self.__writer.lock:
+            self.__writer.seal()
+
+
+def _seal(writer: _SegmentWriter) -> None:
+    with writer.lock:
+        try:
+            writer.seal()
+        except Exception as e:  # E.g. the directory is removed
+            logger.debug(f"Failed to seal the segment {writer.name}: {e!r}")
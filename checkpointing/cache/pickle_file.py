@@ -2,39 +2,278 @@ from checkpointing.cache.base import CacheBase
 from checkpointing._typing import ReturnValue
 from checkpointing import defaults
 from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.cache.index import EntryIndex
+from checkpointing.cache.serializer import Serializer, SerializerRegistry, pickle_serializer, bytes_serializer, numpy_serializer
+from checkpointing.logging import logger
+from checkpointing.util.atomic import atomic_write, temporary_path
+from checkpointing.util.durability import DURABILITY_LEVELS, group_committer
+from checkpointing.util.compression import open_reader, validate_codec
+from checkpointing.util.dictionary import DictionaryStore, train_dictionary
+from typing import Any, Iterator, List, Tuple
+import hashlib
 import pathlib
 import os
-from checkpointing.util import pickle
+import re
+import shutil
+
+LAYOUTS = ["flat", "sharded"]
+"""
+- `"flat"`: the files are saved as `<context id>.<extension>` in the directory.
+- `"sharded"`: the files are saved as `ab/cd/<context id>.<extension>`, where `abcd` are the first hex digits
+  of the md5 digest of the context id, so that each subdirectory holds about 1/65536 of the entries.
+"""
 
 
 class PickleFileCache(CacheBase):
-    """Cache the result as pickle files saved on the disk."""
+    """
+    Cache the result as pickle files saved on the disk.
+
+    Large buffers in the result, such as the data of numpy arrays or pandas objects, can be written out-of-band
+    after the pickle stream by setting `buffer_threshold`. They are then memory mapped on retrieval,
+    so retrieving a huge result neither reads nor copies the buffers upfront,
+    they are paged in lazily from the OS page cache when accessed.
+
+    Results of some types are saved by other serializers than pickle, see `checkpointing.cache.serializer`.
+    By default,
+
+    - numpy arrays, or tuples, lists or dicts of them, are saved as `.npy` files, see `checkpointing.util.npy`.
+      They can be memory mapped on retrieval by setting `mmap_mode`.
+      If `buffer_threshold` is set but `mmap_mode` is not, they are pickled instead, with their large buffers
+      out-of-band, so that only those are memory mapped. The `.npy` files saved before are still retrieved.
+    - `bytes` are saved as-is.
+
+    More serializers can be added to the `serializers` registry, for example,
+    `cache.serializers.add(checkpointing.cache.serializer.parquet_serializer())` to save pandas DataFrames as parquet.
+    If a serializer other than pickle fails to save a result, the result is pickled instead.
+
+    Each file is written to a temporary file in the same directory, then published with `os.replace`.
+    A reader never sees a partially written entry, and a crash during saving does not leave a corrupt entry.
+    Therefore, many processes can save and retrieve the results in the same directory without a lock.
+    A lock (see `CacheBase.synchronize_with`) is only needed if saving depends on what is retrieved before.
+
+    The pickle files can be compressed by setting `compression`, see `checkpointing.util.compression`.
+    The codec is recorded in each file, so the entries stay readable after the setting changes.
 
-    def __init__(self, directory: os.PathLike = None, pickle_protocol: int = None) -> None:
+    Small pickle files barely compress on their own. With `dictionary_max_entry_size` set,
+    they are compressed with a dictionary trained from the existing entries by `train_dictionary`.
+    The dictionaries are versioned in the `.dictionaries` subdirectory, and the entries record the one they use.
+
+    With millions of entries, a flat directory slows down lookups, listings and backups on many filesystems.
+    The `"sharded"` `layout` spreads the entries over two levels of subdirectories instead, see `LAYOUTS`.
+    An existing cache directory is converted to the layout of a cache by `migrate_layout`.
+
+    With `namespaced`, the results saved by the decorators are laid out as `<function full name>/<fingerprint>/`,
+    where the fingerprint is a digest of the function code (see `FuncCallContext.fingerprint`).
+    The results of a function are then removed at once by `clear`, or `func.clear_cache()` of a decorated function,
+    and setting `keep_versions` removes the directories of the older code versions of a function automatically.
+
+    The size of the cache can be bounded by `max_bytes` and `min_free_bytes`, see `evict`.
+    The entries are tracked in an SQLite index in the directory, so that enforcing the budget does not scan the files.
+
+    Whether a saved entry survives an OS crash or a power loss is controlled by `durability`,
+    see `checkpointing.util.durability.DURABILITY_LEVELS`.
+    """
+
+    def __init__(
+        self,
+        directory: os.PathLike = None,
+        pickle_protocol: int = None,
+        buffer_threshold: int = None,
+        mmap_mode: str = None,
+        layout: str = None,
+        namespaced: bool = None,
+        keep_versions: int = None,
+        compression: str = None,
+        dictionary_max_entry_size: int = None,
+        durability: str = None,
+        max_bytes: int = None,
+        min_free_bytes: int = None,
+    ) -> None:
         """
         Args:
             directory: the directory where the files will be saved. The directory will be created if it does not exist.
                        If None, use the global default `cache.filesystem.directory`
             pickle_protocol: the protocol used when pickling files. If None, use the global default
                              `cache.pickle_protocol`
+            buffer_threshold: the buffers of at least this many bytes are written out-of-band and memory mapped on
+                              retrieval. Requires pickle protocol 5. If None, use the global default
+                              `cache.filesystem.buffer_threshold`, which is None by default, pickling all buffers in-band.
+            mmap_mode: the mode to memory map the arrays saved as `.npy` files on retrieval, `"r"` for read-only,
+                       or `"c"` for copy-on-write. If None, use the global default `cache.filesystem.mmap_mode`,
+                       which is None by default, reading the arrays into memory.
+            layout: `"flat"` or `"sharded"`, see `LAYOUTS`. If None, use the global default `cache.filesystem.layout`.
+            namespaced: whether to save the results of each function in its own directory, by the function code version.
+                        If None, use the global default `cache.filesystem.namespaced`, which is False by default.
+            keep_versions: with `namespaced`, the number of most recently used code versions of a function to keep,
+                           the older ones are removed when a new one is used. If None, use the global default
+                           `cache.filesystem.keep_versions`, which is None by default, keeping all versions.
+            compression: the compression codec of the pickle files, `"none"`, `"auto"`, or a codec name, e.g. `"zlib"`.
+                         `"auto"` compresses with the preferred available codec if the first megabyte is compressible.
+                         Large buffers are not written out-of-band if the files are compressed.
+                         If None, use the global default `cache.filesystem.compression`.
+            dictionary_max_entry_size: the pickle files of at most this many bytes are compressed with the
+                                       dictionary trained by `train_dictionary`, if there is one.
+                                       If None, use the global default `cache.filesystem.dictionary.max_entry_size`,
+                                       which is 0 by default, disabling the dictionary compression.
+            durability: one of `"none"`, `"fsync"` (fsync each entry) and `"group"` (fsync entries in batches
+                        in the background). If None, use the global default `cache.filesystem.durability`.
+            max_bytes: max total size of the entry files. If None, use the global default `cache.filesystem.max_bytes`,
+                       which is None by default, not limiting the size.
+            min_free_bytes: min free space of the filesystem that the cache evicts entries to keep.
+                            If None, use the global default `cache.filesystem.min_free_bytes`,
+                            which is None by default, not considering the free space.
         """
 
         self.__directory = pathlib.Path(directory if directory is not None else defaults["cache.filesystem.directory"])
         self.__directory.mkdir(parents=True, exist_ok=True)
 
         self.__pickle_protocol = pickle_protocol if pickle_protocol is not None else defaults["cache.pickle_protocol"]
+        self.__buffer_threshold = buffer_threshold if buffer_threshold is not None else defaults["cache.filesystem.buffer_threshold"]
+        mmap_mode = mmap_mode if mmap_mode is not None else defaults["cache.filesystem.mmap_mode"]
+
+        self.__durability = durability if durability is not None else defaults["cache.filesystem.durability"]
+        if self.__durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Invalid argument value for durability: {self.__durability}, must be one of {DURABILITY_LEVELS}")
+
+        self.__layout = layout if layout is not None else defaults["cache.filesystem.layout"]
+        if self.__layout not in LAYOUTS:
+            raise ValueError(f"Invalid argument value for layout: {self.__layout}, must be one of {LAYOUTS}")
+
+        self.__namespaced = namespaced if namespaced is not None else defaults["cache.filesystem.namespaced"]
+        self.__keep_versions = keep_versions if keep_versions is not None else defaults["cache.filesystem.keep_versions"]
+        self.__used_versions = set()
+
+        compression = compression if compression is not None else defaults["cache.filesystem.compression"]
+        validate_codec(compression)
+
+        if dictionary_max_entry_size is None:
+            dictionary_max_entry_size = defaults["cache.filesystem.dictionary.max_entry_size"]
+        self.__dictionaries = DictionaryStore(self.__directory.joinpath(".dictionaries"), dictionary_max_entry_size)
+
+        self.__fallback_serializer = pickle_serializer(
+            self.__pickle_protocol, self.__buffer_threshold, compression, self.__dictionaries
+        )
+        numpy = numpy_serializer(mmap_mode)
+        if self.__buffer_threshold is not None and mmap_mode is None:
+            numpy = Serializer(numpy.name, _reject_any, numpy.save, numpy.load, numpy.extension)
+        self.__serializers = SerializerRegistry([numpy, bytes_serializer(), self.__fallback_serializer])
+
+        self.__max_bytes = max_bytes if max_bytes is not None else defaults["cache.filesystem.max_bytes"]
+        self.__min_free_bytes = min_free_bytes if min_free_bytes is not None else defaults["cache.filesystem.min_free_bytes"]
+        self.__index: EntryIndex = None
+
+        if self.__max_bytes is not None or self.__min_free_bytes is not None:
+            index_path = self.__directory.joinpath(".index.sqlite")
+            is_new = not index_path.exists()
+            self.__index = EntryIndex(index_path, defaults["cache.filesystem.eviction.cost_weight"])
+
+            if is_new:
+                self.rebuild_index()
+
+    @property
+    def directory(self) -> pathlib.Path:
+        return self.__directory
+
+    @property
+    def serializers(self) -> SerializerRegistry:
+        """
+        The serializers used to save the results, see `checkpointing.cache.serializer`.
+        """
 
-    def _get_file_path(self, context_id: str) -> pathlib.Path:
+        return self.__serializers
+
+    def _get_file_path(
+        self,
+        context_id: str,
+        extension: str = "pickle",
+        layout: str = None,
+        directory: pathlib.Path = None,
+    ) -> pathlib.Path:
         """
         Args:
             context_id: the file name without the file extension
+            extension: the file extension
+            layout: the layout of the directory, if None, the layout of this cache
+            directory: the directory of the entries, if None, the directory of this cache
 
         Returns:
             The full file path used in this cache that corresponds to the context id
         """
 
-        filename = f"{context_id}.pickle"
-        return self.__directory.joinpath(filename)
+        filename = f"{context_id}.{extension}"
+        directory = directory if directory is not None else self.__directory
+
+        if (layout or self.__layout) == "sharded":
+            digest = hashlib.md5(context_id.encode()).hexdigest()
+            return directory.joinpath(digest[:2], digest[2:4], filename)
+
+        return directory.joinpath(filename)
+
+    def _iter_files(self, layout: str = None, directory: pathlib.Path = None) -> Iterator[Tuple[str, str, pathlib.Path]]:
+        """
+        Iterate the entry files laid out in the given layout, without the hidden temporary files.
+
+        Args:
+            layout: the layout of the directory, if None, the layout of this cache
+            directory: the directory of the entries, if None, the directory of this cache
+
+        Yields:
+            The context id, the file extension and the path of each file
+        """
+
+        extensions = {serializer.extension for serializer in self.__serializers}
+        directory = directory if directory is not None else self.__directory
+
+        if (layout or self.__layout) == "sharded":
+            directories = (
+                os.path.join(top.path, sub.name)
+                for top in _scan_shards(directory)
+                for sub in _scan_shards(top.path)
+            )
+        else:
+            directories = [directory]
+
+        for directory in directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    context_id, _, extension = entry.name.rpartition(".")
+                    if context_id and not entry.name.startswith(".") and extension in extensions and entry.is_file():
+                        yield context_id, extension, pathlib.Path(entry.path)
+
+    def migrate_layout(self) -> int:
+        """
+        Move the entries laid out in the other layouts into the layout of this cache,
+        e.g. to shard an existing flat cache directory. The cache directory should not be in use meanwhile.
+
+        Returns:
+            The number of files moved
+        """
+
+        moved = 0
+
+        for directory in self.__entry_directories():
+            for layout in LAYOUTS:
+                if layout == self.__layout:
+                    continue
+
+                for context_id, extension, path in list(self._iter_files(layout, directory)):
+                    target = self._get_file_path(context_id, extension, directory=directory)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(path, target)
+                    moved += 1
+
+                if layout == "sharded":
+                    for top in list(_scan_shards(directory)):
+                        for sub in list(_scan_shards(top.path)):
+                            _rmdir_if_empty(sub.path)
+                        _rmdir_if_empty(top.path)
+
+        if moved and self.__index is not None:
+            self.rebuild_index()
+
+        logger.info(f"Moved {moved} files into the {self.__layout} layout in {self.__directory}")
+        return moved
 
     def save(self, context_id: str, result: ReturnValue) -> None:
         """
@@ -45,8 +284,193 @@ class PickleFileCache(CacheBase):
             result: return value of the function call
         """
 
-        with open(self._get_file_path(context_id), mode="wb") as file:
-            pickle.dump(result, file, protocol=self.__pickle_protocol)
+        self.__save(self.__directory, context_id, result)
+
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: str,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        """
+        Save the result in the directory of the function code version if `namespaced`, otherwise same as `save`.
+        The `run_time` is recorded as the cost of the entry if the size of the cache is bounded.
+        """
+
+        if not self.__namespaced and self.__index is None:
+            return self.save(context_id, result)
+
+        directory = self.__use_version_directory(context) if self.__namespaced else self.__directory
+        self.__save(directory, context_id, result, run_time)
+
+    def __save(self, directory: pathlib.Path, context_id: str, result: ReturnValue, cost: float = None) -> None:
+        serializer = self.__serializers.find(result)
+
+        try:
+            self.__save_with(serializer, directory, context_id, result, cost)
+
+        except Exception as e:
+            if serializer is self.__fallback_serializer:
+                raise
+
+            logger.warning(f"Serializer {serializer.name} failed to save the result because of {e!r}, pickling it instead")
+            serializer = self.__fallback_serializer
+            self.__save_with(serializer, directory, context_id, result, cost)
+
+        self.__remove_stale(directory, context_id, serializer.extension)
+        self.evict()
+
+    def __remove_stale(self, directory: pathlib.Path, context_id: str, extension: str) -> None:
+        """Remove the files of the entry saved by the other serializers."""
+
+        for stale in self.__serializers:
+            if stale.extension != extension:
+                path = self._get_file_path(context_id, stale.extension, directory=directory)
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+
+                if self.__index is not None:
+                    self.__index.remove(self.__relative(path))
+
+    def __save_with(
+        self,
+        serializer: Serializer,
+        directory: pathlib.Path,
+        context_id: str,
+        result: ReturnValue,
+        cost: float = None,
+    ) -> None:
+        path = self._get_file_path(context_id, serializer.extension, directory=directory)
+
+        if path.parent != self.__directory:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        with atomic_write(path, fsync=self.__durability == "fsync") as file:
+            serializer.save(result, file)
+            size = file.tell()
+
+        if self.__durability == "group":
+            group_committer.add(path)
+
+        if self.__index is not None:
+            self.__index.add(self.__relative(path), size, cost)
+
+    def __relative(self, path: pathlib.Path) -> str:
+        return path.relative_to(self.__directory).as_posix()
+
+    def evict(self) -> int:
+        """
+        Evict the entries until their total size is within `max_bytes`, and the free space is at least `min_free_bytes`.
+        The entries with the lowest `last access time + cost weight * run time` are evicted first,
+        where the cost weight is the global default `cache.filesystem.eviction.cost_weight` (seconds).
+        This is called after each save, evicting the entries incrementally.
+
+        Returns:
+            The number of entries evicted
+        """
+
+        if self.__index is None:
+            return 0
+
+        evicted = 0
+        while self.__over_budget():
+            victims = self.__index.lowest_priority(16)
+            if not victims:
+                break
+
+            for path, _ in victims:
+                self.__directory.joinpath(path).unlink(missing_ok=True)
+                self.__index.remove(path)
+                evicted += 1
+
+                if not self.__over_budget():
+                    break
+
+        if evicted:
+            logger.info(f"Evicted {evicted} entries from {self.__directory}")
+
+        return evicted
+
+    def __over_budget(self) -> bool:
+        if self.__max_bytes is not None and self.__index.total_size > self.__max_bytes:
+            return True
+
+        return self.__min_free_bytes is not None and shutil.disk_usage(self.__directory).free < self.__min_free_bytes
+
+    def rebuild_index(self) -> None:
+        """
+        Rebuild the index of the entries used by the eviction by scanning the directory,
+        e.g. after the entries are saved by a cache without a size budget. The recorded costs are lost.
+        """
+
+        if self.__index is None:
+            raise ValueError("The index is only maintained if max_bytes or min_free_bytes is set")
+
+        self.__index.clear()
+        self.__index.add_many(
+            (self.__relative(path), path.stat().st_size, 0.0)
+            for directory in self.__entry_directories()
+            for _, _, path in self._iter_files(directory=directory)
+        )
+
+    def train_dictionary(self, size: int = None, max_samples: int = 1000) -> str:
+        """
+        Train a compression dictionary from the existing small pickle files, and compress the small entries saved
+        afterwards with it, including by other processes. The entries compressed with the previous dictionaries
+        remain readable.
+
+        Args:
+            size: max size of the dictionary in bytes. If None, use the global default `cache.filesystem.dictionary.size`
+            max_samples: max number of entries sampled
+
+        Returns:
+            The id of the new dictionary
+        """
+
+        max_entry_size = self.__dictionaries.max_entry_size
+        if not max_entry_size:
+            raise ValueError("The dictionary compression is disabled, set dictionary_max_entry_size to enable it")
+
+        samples = []
+        paths = (
+            path
+            for directory in self.__entry_directories()
+            for _, extension, path in self._iter_files(directory=directory)
+            if extension == self.__fallback_serializer.extension
+        )
+
+        for path in paths:
+            if len(samples) >= max_samples:
+                break
+
+            try:
+                with open(path, "rb") as file:
+                    if os.fstat(file.fileno()).st_size > max_entry_size:
+                        continue
+                    sample = open_reader(file, self.__dictionaries.get).read()
+            except FileNotFoundError:  # Removed in the meantime
+                continue
+
+            if len(sample) <= max_entry_size:
+                samples.append(sample)
+
+        if not samples:
+            raise ValueError(f"There is no pickle file of at most {max_entry_size} bytes to train the dictionary with")
+
+        dictionary = train_dictionary(samples, size if size is not None else defaults["cache.filesystem.dictionary.size"])
+        self.__dictionaries.add(dictionary)
+        return dictionary.id
+
+    def flush(self) -> None:
+        """
+        With the `"group"` durability, fsync the saved entries that are pending in the background before returning.
+        """
+
+        if self.__durability == "group":
+            group_committer.flush()
 
     def retrieve(self, context_id: str) -> ReturnValue:
         """
@@ -60,9 +484,290 @@ class PickleFileCache(CacheBase):
             The return value of the function that corresponds to this context id
         """
 
-        path = self._get_file_path(context_id)
-        if not path.exists():
-            raise CheckpointNotExist
+        return self.__retrieve(self.__directory, context_id)
+
+    def retrieve_with_context(self, context: FuncCallContext, context_id: str) -> ReturnValue:
+        """
+        Retrieve the result from the directory of the function code version if `namespaced`, otherwise same as `retrieve`.
+        """
+
+        if not self.__namespaced:
+            return self.retrieve(context_id)
+
+        return self.__retrieve(self.__version_directory(context), context_id)
+
+    def _retrieve_any_version(self, context_id: str) -> ReturnValue:
+        """
+        Retrieve the result from this directory, or from the version directories of the functions if `namespaced`,
+        the most recently used first, when the function of the context id is not known.
+        """
+
+        try:
+            return self.retrieve(context_id)
+        except CheckpointNotExist:
+            if not self.__namespaced:
+                raise
+
+        versions = [version for namespace in self.__namespace_directories() for version in _scan_versions(namespace)]
+        for version in sorted(versions, key=lambda entry: entry.stat().st_mtime_ns, reverse=True):
+            try:
+                return self.__retrieve(pathlib.Path(version.path), context_id)
+            except CheckpointNotExist:
+                continue
+
+        raise CheckpointNotExist
+
+    def __retrieve(self, directory: pathlib.Path, context_id: str) -> ReturnValue:
+        # Starting from the fallback pickle serializer, as most entries are pickle files
+        for serializer in reversed(self.__serializers):
+            file_path = self._get_file_path(context_id, serializer.extension, directory=directory)
+            try:
+                file = open(file_path, mode="rb")
+            except FileNotFoundError:
+                continue
+
+            with file:
+                result = serializer.load(file)
+
+            if self.__index is not None:
+                self.__index.touch(self.__relative(file_path))
+
+            return result
+
+        raise CheckpointNotExist
+
+    def __find_file(self, directory: pathlib.Path, context_id: str) -> Tuple[str, pathlib.Path]:
+        for serializer in reversed(self.__serializers):
+            file_path = self._get_file_path(context_id, serializer.extension, directory=directory)
+            if file_path.is_file():
+                return serializer.extension, file_path
+
+        raise CheckpointNotExist
+
+    def _link_from(self, source: "PickleFileCache", context_id: str, context: FuncCallContext = None) -> bool:
+        """
+        Publish the file of an entry of another cache in this cache, hard linked if possible, otherwise copied,
+        which is much cheaper than loading and saving the result again.
+        The entries compressed with a dictionary are not linked, as the dictionary is in the source directory.
+
+        Args:
+            source: the cache holding the entry
+            context_id: identifier of the function call context
+            context: the function call context, to find the version directories if the caches are `namespaced`
+
+        Returns:
+            Whether the entry is linked or copied
+        """
+
+        if source.__directory.joinpath(".dictionaries").exists():
+            return False
+
+        source_directory = source.__version_directory(context) if source.__namespaced and context else source.__directory
+        try:
+            extension, source_path = source.__find_file(source_directory, context_id)
+        except CheckpointNotExist:
+            return False
+
+        directory = self.__use_version_directory(context) if self.__namespaced and context else self.__directory
+        path = self._get_file_path(context_id, extension, directory=directory)
+        if not _link_or_copy(source_path, path):
+            return False
+
+        if self.__index is not None:
+            self.__index.add(self.__relative(path), path.stat().st_size, None)
+
+        self.__remove_stale(directory, context_id, extension)
+        self.evict()
+        return True
+
+    def _iter_entries(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yields:
+            The context id and the path relative to the directory of each entry file, including the namespaced ones
+        """
+
+        for directory in self.__entry_directories():
+            for context_id, _, path in self._iter_files(directory=directory):
+                yield context_id, self.__relative(path)
+
+    def _move_file(self, target: "PickleFileCache", relative: str) -> bool:
+        """
+        Move an entry file to the same relative path in another cache laid out alike,
+        hard linked if possible, otherwise copied. An entry already saved in the target is kept.
+
+        Args:
+            target: the cache to move the file to
+            relative: the path of the file relative to the directory, see `_iter_entries`
+
+        Returns:
+            Whether the file is moved
+        """
+
+        source_path = self.__directory.joinpath(relative)
+        path = target.__directory.joinpath(relative)
+        moved = not path.exists() and _link_or_copy(source_path, path)
+
+        if moved and target.__index is not None:
+            target.__index.add(relative, path.stat().st_size, None)
+
+        source_path.unlink(missing_ok=True)
+        if self.__index is not None:
+            self.__index.remove(relative)
+
+        if moved:
+            target.evict()
+        return moved
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Remove the cached results of the function of the context, which requires `namespaced`,
+        or all the cached results if None. Each directory is first renamed, so the removal is atomic,
+        and then deleted as a whole.
+
+        Args:
+            context: a call context of the function, whose arguments are not used
+        """
+
+        if context is None:
+            for _, _, path in list(self._iter_files(layout="flat")):
+                path.unlink(missing_ok=True)
+
+            for directory in [*_scan_shards(self.__directory), *self.__namespace_directories()]:
+                _remove_directory(pathlib.Path(directory))
+
+            if self.__index is not None:
+                self.__index.clear()
+
+        elif self.__namespaced:
+            self.__remove_directory(self.__namespace_directory(context))
+
+        else:
+            raise ValueError("Clearing the results of a function requires a namespaced PickleFileCache")
+
+    def __namespace_directory(self, context: FuncCallContext) -> pathlib.Path:
+        return self.__directory.joinpath(re.sub(r"[^\w.-]", "_", context.full_name))
+
+    def __version_directory(self, context: FuncCallContext) -> pathlib.Path:
+        return self.__namespace_directory(context).joinpath(context.fingerprint)
+
+    def __use_version_directory(self, context: FuncCallContext) -> pathlib.Path:
+        """
+        Returns:
+            The version directory of the function, created if it does not exist.
+            The first time it is used by this cache, it is marked as recently used, and the older versions are removed.
+        """
+
+        directory = self.__version_directory(context)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        if directory in self.__used_versions:
+            return directory
+
+        self.__used_versions.add(directory)
+        os.utime(directory)
+
+        if self.__keep_versions is not None:
+            versions = sorted(
+                _scan_versions(directory.parent),
+                key=lambda entry: entry.stat().st_mtime_ns,
+                reverse=True,
+            )
+
+            for version in versions[self.__keep_versions :]:
+                if version.name != directory.name:
+                    logger.info(f"Removing the results of the old version {version.name} of {context.full_name}")
+                    self.__remove_directory(pathlib.Path(version.path))
+
+        return directory
+
+    def __remove_directory(self, directory: pathlib.Path) -> None:
+        _remove_directory(directory)
+
+        if self.__index is not None:
+            self.__index.remove_prefix(self.__relative(directory) + "/")
+
+    def __namespace_directories(self) -> List[pathlib.Path]:
+        with os.scandir(self.__directory) as entries:
+            candidates = [e for e in entries if not e.name.startswith(".") and not _is_shard(e.name) and e.is_dir()]
+
+        return [pathlib.Path(entry.path) for entry in candidates if _scan_versions(entry.path)]
+
+    def __entry_directories(self) -> List[pathlib.Path]:
+        """
+        Returns:
+            The directory of this cache, and the version directories of the functions
+        """
+
+        directories = [self.__directory]
+        for namespace in self.__namespace_directories():
+            directories.extend(pathlib.Path(version.path) for version in _scan_versions(namespace))
+
+        return directories
+
+
+def _reject_any(result: Any) -> bool:
+    """The predicate of the `.npy` serializer when the arrays are pickled, which then only loads the files"""
+    return False
+
+
+def _link_or_copy(source: pathlib.Path, path: pathlib.Path) -> bool:
+    """
+    Publish a file at `path` atomically, hard linked to `source` if possible, otherwise copied.
+
+    Returns:
+        Whether the file is published, False if the source does not exist
+    """
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = temporary_path(path)
+
+    try:
+        try:
+            os.link(source, tmp)
+        except FileNotFoundError:
+            raise
+        except OSError:  # Another filesystem, or no hard link support
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, path)
+    except FileNotFoundError:  # Removed from the source in the meantime
+        tmp.unlink(missing_ok=True)
+        return False
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    return True
+
+
+def _is_shard(name: str) -> bool:
+    return re.fullmatch("[0-9a-f]{2}", name) is not None
+
+
+def _scan_shards(directory: os.PathLike) -> Iterator[os.DirEntry]:
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if _is_shard(entry.name) and entry.is_dir():
+                yield entry
+
+
+def _scan_versions(directory: os.PathLike) -> List[os.DirEntry]:
+    with os.scandir(directory) as entries:
+        return [entry for entry in entries if re.fullmatch("[0-9a-f]{16}", entry.name) and entry.is_dir()]
+
+
+def _remove_directory(directory: pathlib.Path) -> None:
+    tmp = temporary_path(directory)
+
+    try:
+        os.replace(directory, tmp)
+    except FileNotFoundError:  # Removed in the meantime
+        return
+
+    shutil.rmtree(tmp, ignore_errors=True)
+
 
-        with open(path, mode="rb") as file:
-            return pickle.load(file, protocol=self.__pickle_protocol)
+def _rmdir_if_empty(directory: os.PathLike) -> None:
+    try:
+        os.rmdir(directory)
+    except OSError:  # Not empty
+        pass
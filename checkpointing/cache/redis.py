@@ -0,0 +1,241 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing._typing import ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import pickle
+import re
+import struct
+import uuid
+
+_VALUE = b"V"
+_CHUNKED = b"C"
+_MANIFEST = struct.Struct("<16sI")
+"""After the tag, the token in the keys of the chunks and their count"""
+
+_SCAN_BATCH = 1000
+
+
+class RedisCache(CacheBase):
+    """
+    Cache the results in a Redis server, shared with low latency by the workers on any host.
+    It suits small to medium results, which are pickled in memory.
+
+    A result is stored at `<key_prefix>e:<context id>`. The results pickled to more than `chunk_size` bytes,
+    which must be under the `proto-max-bulk-len` of the server (512MB by default), are split into chunks at
+    `<key_prefix>c:<token>:<i>`, set in one transaction with the entry pointing to them.
+    The chunks of a replaced entry are deleted, and an entry whose chunks were evicted by the server is a miss.
+
+    The connections are pooled by the client, and shared by the threads. `save_many` and `retrieve_many`
+    pipeline many results in one round trip. With `ttl`, the results expire after that many seconds.
+    This requires the `redis` package.
+    """
+
+    def __init__(
+        self,
+        url: str = None,
+        key_prefix: str = None,
+        ttl: float = None,
+        chunk_size: int = None,
+        pickle_protocol: int = None,
+        max_connections: int = None,
+        client: Any = None,
+    ) -> None:
+        """
+        Args:
+            url: the url of the server, e.g. `redis://localhost:6379/0`. If None, use the global default `cache.redis.url`
+            key_prefix: prepended to the keys, to share a database. If None, use the global default `cache.redis.key_prefix`
+            ttl: the seconds after which the results expire, at least 0.001. If None, use the global default
+                 `cache.redis.ttl`, and if that is None, they do not expire
+            chunk_size: the max size of a value. If None, use the global default `cache.redis.chunk_size`
+            pickle_protocol: the protocol used when pickling the results. If None, use the global default
+                             `cache.pickle_protocol`
+            max_connections: the max size of the connection pool. If None, use the global default `cache.redis.max_connections`
+            client: a `redis.Redis` client used instead of connecting to `url`, e.g. a `fakeredis.FakeRedis`.
+                    The cache is then picklable only if the client is
+        """
+
+        self.__url = url if url is not None else defaults["cache.redis.url"]
+        self.__key_prefix = key_prefix if key_prefix is not None else defaults["cache.redis.key_prefix"]
+        self.__ttl = ttl if ttl is not None else defaults["cache.redis.ttl"]
+        if self.__ttl is not None and self.__ttl < 0.001:
+            raise ValueError(f"Invalid argument value for ttl: {self.__ttl}, must be at least 0.001 seconds")
+        self.__chunk_size = chunk_size if chunk_size is not None else defaults["cache.redis.chunk_size"]
+        self.__pickle_protocol = pickle_protocol if pickle_protocol is not None else defaults["cache.pickle_protocol"]
+        self.__max_connections = max_connections if max_connections is not None else defaults["cache.redis.max_connections"]
+        self.__own_client = client is None
+        self.__client = client if client is not None else self.__connect()
+
+    def __connect(self) -> Any:
+        import redis
+
+        # The pool reconnects in a forked process by itself
+        return redis.Redis.from_url(self.__url, max_connections=self.__max_connections)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.__own_client:
+            del state[f"_{RedisCache.__name__}__client"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.__own_client:
+            self.__client = self.__connect()
+
+    def __entry_key(self, context_id: str) -> str:
+        return f"{self.__key_prefix}e:{context_id}"
+
+    def __chunk_key(self, token: bytes, i: int) -> str:
+        return f"{self.__key_prefix}c:{token.hex()}:{i}"
+
+    def __ttl_ms(self) -> Optional[int]:
+        return int(self.__ttl * 1000) if self.__ttl is not None else None
+
+    def __encode(self, result: ReturnValue) -> Tuple[bytes, List[Tuple[str, memoryview]]]:
+        """
+        Returns:
+            The value of the entry, and the keys and values of the chunks if the result is chunked
+        """
+
+        data = pickle.dumps(result, protocol=self.__pickle_protocol)
+        if len(data) < self.__chunk_size:
+            return _VALUE + data, []
+
+        token = uuid.uuid4().bytes
+        view = memoryview(data)
+        chunks = [
+            (self.__chunk_key(token, i), view[start : start + self.__chunk_size])
+            for i, start in enumerate(range(0, len(data), self.__chunk_size))
+        ]
+        return _CHUNKED + _MANIFEST.pack(token, len(chunks)), chunks
+
+    def __chunk_keys(self, value: Optional[bytes]) -> List[str]:
+        if value is None or value[:1] != _CHUNKED:
+            return []
+
+        token, count = _MANIFEST.unpack_from(value, 1)
+        return [self.__chunk_key(token, i) for i in range(count)]
+
+    def save(self, context_id: str, result: ReturnValue) -> None:
+        """
+        Save the result with the given context id.
+
+        Args:
+            context_id: identifier of the function call context
+            result: return value of the function call
+        """
+
+        self.save_many({context_id: result})
+
+    def save_many(self, results: Mapping[str, ReturnValue]) -> None:
+        """
+        Save many results in one transaction.
+
+        Args:
+            results: the results by their context ids
+        """
+
+        ttl = self.__ttl_ms()
+        with self.__client.pipeline(transaction=True) as pipeline:
+            # The previous values are read by GET in the transaction, as SET with GET requires Redis 6.2
+            previous = []
+            for context_id, result in results.items():
+                value, chunks = self.__encode(result)
+                for key, chunk in chunks:
+                    pipeline.set(key, chunk, px=ttl)
+                previous.append(len(pipeline))
+                pipeline.get(self.__entry_key(context_id))
+                pipeline.set(self.__entry_key(context_id), value, px=ttl)
+            replies = pipeline.execute()
+
+        replaced = [replies[i] for i in previous if replies[i] is not None]
+
+        stale = [key for value in replaced for key in self.__chunk_keys(value)]
+        if stale:
+            self.__client.delete(*stale)
+
+    def retrieve(self, context_id: str) -> ReturnValue:
+        """
+        Retrieve the function return value with the given context id.
+        If there is no cached results for the context_id, throws a checkpointing.exceptions.CheckpointNotExist
+
+        Args:
+            context_id: identifier of the function call context
+
+        Returns:
+            The return value of the function that corresponds to this context id
+        """
+
+        results = self.retrieve_many([context_id])
+        if context_id not in results:
+            raise CheckpointNotExist
+        return results[context_id]
+
+    def retrieve_many(self, context_ids: Iterable[str]) -> Dict[str, ReturnValue]:
+        """
+        Retrieve many results in one round trip, and one more for the chunked ones.
+
+        Args:
+            context_ids: identifiers of the function call contexts
+
+        Returns:
+            The results by their context ids, without the ones not cached
+        """
+
+        context_ids = list(context_ids)
+        if not context_ids:
+            return {}
+
+        values = self.__client.mget([self.__entry_key(context_id) for context_id in context_ids])
+
+        results = {}
+        chunked = {}
+        for context_id, value in zip(context_ids, values):
+            if value is None:
+                continue
+            if value[:1] == _VALUE:
+                results[context_id] = pickle.loads(memoryview(value)[1:])
+            else:
+                chunked[context_id] = self.__chunk_keys(value)
+
+        if chunked:
+            keys = [key for chunk_keys in chunked.values() for key in chunk_keys]
+            chunks = iter(self.__client.mget(keys))
+            for context_id, chunk_keys in chunked.items():
+                parts = [next(chunks) for _ in chunk_keys]
+                if None not in parts:  # Otherwise some chunks are evicted, or deleted by a replacement
+                    results[context_id] = pickle.loads(b"".join(parts))
+
+        return results
+
+    def __scan(self, pattern: str) -> Iterable[bytes]:
+        return self.__client.scan_iter(match=re.sub(r"([*?\[\]\\])", r"\\\1", self.__key_prefix) + pattern, count=_SCAN_BATCH)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.__scan("e:*"))
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Remove all the cached results under the key prefix. The results are not organized by function,
+        so `context` must be None.
+        """
+
+        if context is not None:
+            raise ValueError("RedisCache does not support clearing the results of a function")
+
+        batch = []
+        for key in self.__scan("[ec]:*"):
+            batch.append(key)
+            if len(batch) == _SCAN_BATCH:
+                self.__client.delete(*batch)
+                batch.clear()
+
+        if batch:
+            self.__client.delete(*batch)
+
+    def close(self) -> None:
+        """Disconnect the pooled connections. The cache can still be used, reconnecting."""
+
+        self.__client.close()
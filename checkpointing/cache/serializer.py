@@ -0,0 +1,233 @@
+"""
+Serializers used by `checkpointing.cache.PickleFileCache` to save results of specific types as files.
+
+A serializer is a `(save, load, file extension)` triple, together with a predicate of the results it applies to.
+The extension of an entry's file records which serializer has written it.
+
+For example, to save `pyarrow.Table` results in the Arrow IPC format:
+
+```python
+import pyarrow as pa
+from checkpointing import PickleFileCache
+
+def save_table(table, file):
+    with pa.ipc.new_file(file, table.schema) as writer:
+        writer.write_table(table)
+
+def load_table(file):
+    return pa.ipc.open_file(file).read_all()
+
+cache = PickleFileCache()
+cache.serializers.register("arrow", lambda result: isinstance(result, pa.Table), save_table, load_table, "arrow")
+```
+"""
+
+from functools import partial
+from io import IOBase
+import sys
+from typing import Any, Callable, Iterable, Iterator, List
+
+from checkpointing._typing import ReturnValue
+from checkpointing.util import pickle, npy
+from checkpointing.util.dictionary import DictionaryStore
+
+
+class Serializer:
+    """Saves results of specific types as files with a specific extension."""
+
+    def __init__(
+        self,
+        name: str,
+        predicate: Callable[[ReturnValue], bool],
+        save: Callable[[ReturnValue, IOBase], None],
+        load: Callable[[IOBase], ReturnValue],
+        extension: str,
+    ) -> None:
+        """
+        Args:
+            name: name of the serializer
+            predicate: whether a result should be saved by this serializer
+            save: writes a result to a binary file object opened for writing
+            load: reads a result from a binary file object opened for reading
+            extension: the file extension of the entries saved by this serializer, without the leading dot
+        """
+
+        self.name = name
+        self.predicate = predicate
+        self.save = save
+        self.load = load
+        self.extension = extension
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name!r}, extension={self.extension!r})"
+
+
+class SerializerRegistry:
+    """
+    Ordered serializers. A result is saved by the first serializer whose predicate accepts it,
+    the last one (pickle, for the registry of `PickleFileCache`) should accept any result.
+    """
+
+    def __init__(self, serializers: Iterable[Serializer] = ()) -> None:
+        self.__serializers: List[Serializer] = []
+
+        for serializer in reversed(list(serializers)):
+            self.add(serializer)
+
+    def register(
+        self,
+        name: str,
+        predicate: Callable[[ReturnValue], bool],
+        save: Callable[[ReturnValue, IOBase], None],
+        load: Callable[[IOBase], ReturnValue],
+        extension: str,
+    ) -> None:
+        """
+        Register a serializer, taking precedence over the existing ones. See `Serializer` for the arguments.
+        """
+
+        self.add(Serializer(name, predicate, save, load, extension))
+
+    def add(self, serializer: Serializer) -> None:
+        """
+        Add a serializer, taking precedence over the existing ones.
+        A serializer with the same name is replaced.
+        """
+
+        self.unregister(serializer.name)
+
+        for existing in self.__serializers:
+            if existing.extension == serializer.extension:
+                raise ValueError(f"The extension {serializer.extension!r} is already used by the serializer {existing.name!r}")
+
+        self.__serializers.insert(0, serializer)
+
+    def unregister(self, name: str) -> None:
+        """Remove the serializer with the given name, if it exists."""
+
+        self.__serializers = [s for s in self.__serializers if s.name != name]
+
+    def find(self, result: ReturnValue) -> Serializer:
+        """
+        Returns:
+            The first serializer whose predicate accepts the result
+        """
+
+        for serializer in self.__serializers:
+            if serializer.predicate(result):
+                return serializer
+
+        raise ValueError(f"No serializer accepts the result of type {type(result)}")
+
+    def __iter__(self) -> Iterator[Serializer]:
+        return iter(self.__serializers)
+
+    def __reversed__(self) -> Iterator[Serializer]:
+        return reversed(self.__serializers)
+
+    def __len__(self) -> int:
+        return len(self.__serializers)
+
+
+def _accept_any(result: Any) -> bool:
+    return True
+
+
+def _is_bytes(result: Any) -> bool:
+    return type(result) is bytes
+
+
+def _save_bytes(result: bytes, file: IOBase) -> None:
+    file.write(result)
+
+
+def _load_bytes(file: IOBase) -> bytes:
+    return file.read()
+
+
+def _is_dataframe(result: Any) -> bool:
+    pd = sys.modules.get("pandas")
+    return pd is not None and type(result) is pd.DataFrame and all(isinstance(c, str) for c in result.columns)
+
+
+def _is_default_indexed_dataframe(result: Any) -> bool:
+    import pandas as pd
+
+    return _is_dataframe(result) and result.index.equals(pd.RangeIndex(len(result))) and result.index.name is None
+
+
+def _save_parquet(result: Any, file: IOBase) -> None:
+    result.to_parquet(file)
+
+
+def _load_parquet(file: IOBase) -> Any:
+    import pandas as pd
+
+    return pd.read_parquet(file)
+
+
+def _save_feather(result: Any, file: IOBase) -> None:
+    result.to_feather(file)
+
+
+def _load_feather(file: IOBase) -> Any:
+    import pandas as pd
+
+    return pd.read_feather(file)
+
+
+def pickle_serializer(
+    pickle_protocol: int,
+    buffer_threshold: int = None,
+    codec: str = "none",
+    dictionaries: DictionaryStore = None,
+) -> Serializer:
+    """
+    Pickle, accepting any result. See `checkpointing.util.pickle` for detail.
+    """
+
+    return Serializer(
+        "pickle",
+        _accept_any,
+        partial(
+            pickle.dump,
+            protocol=pickle_protocol,
+            buffer_threshold=buffer_threshold,
+            codec=codec,
+            dictionaries=dictionaries,
+        ),
+        partial(pickle.load, protocol=pickle_protocol, dictionaries=dictionaries),
+        "pickle",
+    )
+
+
+def bytes_serializer() -> Serializer:
+    """
+    Raw `bytes`, written as-is.
+    """
+
+    return Serializer("bytes", _is_bytes, _save_bytes, _load_bytes, "bin")
+
+
+def numpy_serializer(mmap_mode: str = None) -> Serializer:
+    """
+    The `.npy` format for numpy arrays, or tuples, lists and dicts of them. See `checkpointing.util.npy` for detail.
+    """
+
+    return Serializer("numpy", npy.is_array_result, npy.dump, partial(npy.load, mmap_mode=mmap_mode), "npy")
+
+
+def parquet_serializer() -> Serializer:
+    """
+    Parquet for `pandas.DataFrame` with string column names. Requires `pyarrow` or `fastparquet`.
+    """
+
+    return Serializer("parquet", _is_dataframe, _save_parquet, _load_parquet, "parquet")
+
+
+def feather_serializer() -> Serializer:
+    """
+    Feather for `pandas.DataFrame` with string column names and the default index. Requires `pyarrow`.
+    """
+
+    return Serializer("feather", _is_default_indexed_dataframe, _save_feather, _load_feather, "feather")
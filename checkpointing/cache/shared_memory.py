@@ -0,0 +1,295 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing._typing import ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.logging import logger
+from checkpointing.util import shared_memory
+from checkpointing.util.sqlite import ConnectionPerThread
+from typing import Any, Dict
+import hashlib
+import os
+import pathlib
+import sqlite3
+import time
+import uuid
+import weakref
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    context_id TEXT PRIMARY KEY,
+    segment TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+
+CREATE TABLE IF NOT EXISTS attachments (
+    segment TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    PRIMARY KEY (segment, pid)
+);
+"""
+
+_TOUCH_INTERVAL = 1.0
+"""Seconds between the updates of the access time of an entry, so that most retrievals do not write to the index"""
+
+
+def _initialize(connection: sqlite3.Connection) -> None:
+    connection.executescript(_SCHEMA)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+class SharedMemoryCache(CacheBase):
+    """
+    Cache the results in shared memory segments, so that all the processes on the host share one copy.
+
+    Each result is pickled with protocol 5 into its own segment, see `checkpointing.util.shared_memory`,
+    and retrieving it maps the segment: numpy arrays and other out-of-band buffers are read-only views of the segment,
+    so retrieving a large array neither copies nor reads it. Modifying a retrieved array requires copying it.
+
+    The index, `shared_memory.sqlite` in the directory, maps the context ids to the segments,
+    with their sizes, access times, and the processes that attached them as reference counts.
+    The processes using a cache must thus share the directory, e.g. by pickling the cache to the workers.
+
+    With `max_bytes`, the least recently used segments are unlinked when the total size exceeds it,
+    skipping those attached by another live process, whose memory would not be freed anyway.
+    The segments outlive the processes, and are only removed by the eviction and `clear`.
+    This requires POSIX shared memory, i.e. it is not supported on Windows.
+    """
+
+    def __init__(self, directory: os.PathLike = None, max_bytes: int = None) -> None:
+        """
+        Args:
+            directory: the directory of the index, created if it does not exist.
+                       If None, use the global default `cache.filesystem.directory`
+            max_bytes: the max total size of the segments. If None, use the global default `cache.shared_memory.max_bytes`,
+                       and if that is None, the size is not limited
+        """
+
+        if os.name == "nt":
+            raise NotImplementedError("SharedMemoryCache requires POSIX shared memory, which outlives the processes")
+
+        self.__directory = pathlib.Path(directory if directory is not None else defaults["cache.filesystem.directory"])
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        self.__max_bytes = max_bytes if max_bytes is not None else defaults["cache.shared_memory.max_bytes"]
+
+        # Segment names are global to the host, and at most 31 characters on macOS
+        directory_hash = hashlib.md5(str(self.__directory.resolve()).encode()).hexdigest()[:8]
+        self.__prefix = f"ckpt_{directory_hash}_"
+
+        self.__connections = ConnectionPerThread(self.__directory.joinpath("shared_memory.sqlite"), _initialize)
+        self.__open()
+
+    def __open(self) -> None:
+        # The mappings are kept alive by the results loaded from them, a dead reference means the segment is unmapped
+        self.__attached: Dict[str, weakref.ref] = {}
+        self.__pid = os.getpid()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["attached", "pid"]:
+            del state[f"_{SharedMemoryCache.__name__}__{name}"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__open()
+
+    def save(self, context_id: str, result: ReturnValue) -> None:
+        """
+        Save the result with the given context id.
+
+        Args:
+            context_id: identifier of the function call context
+            result: return value of the function call
+        """
+
+        name = f"{self.__prefix}{uuid.uuid4().hex[:16]}"
+        size = shared_memory.write_segment(name, result)
+
+        connection = self.__connections.get()
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                row = connection.execute("SELECT segment FROM entries WHERE context_id = ?", (context_id,)).fetchone()
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    (context_id, name, size, time.time()),
+                )
+        except BaseException:
+            shared_memory.unlink_segment(name)
+            raise
+
+        if row is not None:
+            self.__unlink(row[0])
+
+        if self.__max_bytes is not None:
+            self.__evict()
+
+    def retrieve(self, context_id: str) -> ReturnValue:
+        """
+        Retrieve the function return value with the given context id.
+        If there is no cached results for the context_id, throws a checkpointing.exceptions.CheckpointNotExist
+
+        Args:
+            context_id: identifier of the function call context
+
+        Returns:
+            The return value of the function that corresponds to this context id,
+            whose buffers are read-only views of the shared memory
+        """
+
+        connection = self.__connections.get()
+        row = connection.execute("SELECT segment, last_access FROM entries WHERE context_id = ?", (context_id,)).fetchone()
+        if row is None:
+            raise CheckpointNotExist
+
+        name, last_access = row
+        try:
+            mapping = self.__attach(name)
+        except FileNotFoundError:  # Evicted or replaced by another process
+            raise CheckpointNotExist
+
+        now = time.time()
+        if now - last_access > _TOUCH_INTERVAL:
+            connection.execute("UPDATE entries SET last_access = ? WHERE segment = ?", (now, name))
+
+        return shared_memory.load_segment(mapping)
+
+    def __attach(self, name: str) -> Any:
+        """
+        Returns:
+            The mapping of the segment in this process, reused while the results loaded from it are alive
+        """
+
+        if self.__pid != os.getpid():  # Forked, the attachments are recorded with the parent pid
+            self.__open()
+
+        ref = self.__attached.get(name)
+        mapping = ref() if ref is not None else None
+        if mapping is None:
+            mapping = shared_memory.map_segment(name)
+            self.close()  # Release the segments unmapped meanwhile, so that other processes can evict them
+            self.__connections.get().execute("INSERT OR IGNORE INTO attachments VALUES (?, ?)", (name, self.__pid))
+            self.__attached[name] = weakref.ref(mapping)
+
+        return mapping
+
+    def __detach(self, name: str) -> bool:
+        """
+        Forget the segment in this process, unless results loaded from it are alive.
+
+        Returns:
+            Whether the segment is not mapped by this process anymore
+        """
+
+        ref = self.__attached.get(name)
+        if ref is not None and self.__pid == os.getpid():
+            if ref() is not None:
+                return False
+            del self.__attached[name]
+
+        self.__connections.get().execute("DELETE FROM attachments WHERE segment = ? AND pid = ?", (name, os.getpid()))
+        return True
+
+    def __unlink(self, name: str) -> None:
+        self.__detach(name)
+        shared_memory.unlink_segment(name)
+        self.__connections.get().execute("DELETE FROM attachments WHERE segment = ?", (name,))
+
+    def __in_use(self, name: str) -> bool:
+        """
+        Returns:
+            Whether the segment is attached by a live process, after detaching it from this process if possible
+        """
+
+        if not self.__detach(name):
+            return True
+
+        connection = self.__connections.get()
+        for (pid,) in connection.execute("SELECT pid FROM attachments WHERE segment = ?", (name,)).fetchall():
+            if _pid_alive(pid):
+                return True
+            connection.execute("DELETE FROM attachments WHERE segment = ? AND pid = ?", (name, pid))
+
+        return False
+
+    def __evict(self) -> None:
+        connection = self.__connections.get()
+        (total,) = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.__max_bytes:
+            return
+
+        evicted = 0
+        rows = connection.execute("SELECT context_id, segment, size FROM entries ORDER BY last_access").fetchall()
+        for context_id, name, size in rows:
+            if total <= self.__max_bytes:
+                break
+
+            if self.__in_use(name):
+                continue
+
+            # The entry could be replaced by another process meanwhile, then its new segment is not evicted
+            deleted = connection.execute(
+                "DELETE FROM entries WHERE context_id = ? AND segment = ?", (context_id, name)
+            ).rowcount
+            if deleted:
+                self.__unlink(name)
+                total -= size
+                evicted += 1
+
+        if total > self.__max_bytes:
+            logger.warning(
+                f"The shared memory cache takes {total} bytes, more than max_bytes {self.__max_bytes}, "
+                "because the other segments are attached by live processes"
+            )
+        logger.debug(f"Evicted {evicted} shared memory segments")
+
+    def __len__(self) -> int:
+        (count,) = self.__connections.get().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
+
+    @property
+    def total_size(self) -> int:
+        """The total size of the segments in bytes."""
+
+        (total,) = self.__connections.get().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return total
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Remove all the cached results. The results are not organized by function, so `context` must be None.
+        The segments are unlinked even if they are attached, the processes keep their mappings until they close them.
+        """
+
+        if context is not None:
+            raise ValueError("SharedMemoryCache does not support clearing the results of a function")
+
+        connection = self.__connections.get()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            names = [name for (name,) in connection.execute("SELECT segment FROM entries").fetchall()]
+            connection.execute("DELETE FROM entries")
+
+        for name in names:
+            self.__unlink(name)
+
+    def close(self) -> None:
+        """
+        Record that this process does not map the segments whose loaded results are no longer alive,
+        so that they can be evicted by the other processes. The results stay cached.
+        """
+
+        for name in list(self.__attached):
+            self.__detach(name)
@@ -0,0 +1,129 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing._typing import ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.util import pickle as pickle_util
+from checkpointing.util.atomic import atomic_write
+from checkpointing.util.sqlite import ConnectionPerThread
+import os
+import pathlib
+import pickle
+import shutil
+import sqlite3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    context_id TEXT PRIMARY KEY,
+    data BLOB,
+    spilled INTEGER NOT NULL
+);
+"""
+
+
+def _initialize(connection: sqlite3.Connection) -> None:
+    connection.executescript(_SCHEMA)
+
+
+class SQLiteCache(CacheBase):
+    """
+    Cache the results as pickled blobs in an SQLite database, `checkpointing.sqlite` in the directory.
+
+    Compared with `PickleFileCache`, a lookup is an indexed query on an open connection instead of opening a file,
+    and millions of small results do not take millions of inodes.
+    The results pickled to at least `spill_threshold` bytes are spilled to pickle files in the `spill` subdirectory,
+    which keeps the database compact.
+
+    Each thread uses its own connection, on which sqlite3 caches the prepared statements.
+    The database is in the WAL mode, so that many processes can read while one of them writes.
+    """
+
+    def __init__(self, directory: os.PathLike = None, pickle_protocol: int = None, spill_threshold: int = None) -> None:
+        """
+        Args:
+            directory: the directory of the database and the spilled files, created if it does not exist.
+                       If None, use the global default `cache.filesystem.directory`
+            pickle_protocol: the protocol used when pickling the results. If None, use the global default
+                             `cache.pickle_protocol`
+            spill_threshold: the results pickled to at least this many bytes are saved as files.
+                             If None, use the global default `cache.sqlite.spill_threshold`
+        """
+
+        self.__directory = pathlib.Path(directory if directory is not None else defaults["cache.filesystem.directory"])
+        self.__directory.mkdir(parents=True, exist_ok=True)
+
+        self.__pickle_protocol = pickle_protocol if pickle_protocol is not None else defaults["cache.pickle_protocol"]
+        self.__spill_threshold = spill_threshold if spill_threshold is not None else defaults["cache.sqlite.spill_threshold"]
+        self.__spill_directory = self.__directory.joinpath("spill")
+
+        self.__connections = ConnectionPerThread(self.__directory.joinpath("checkpointing.sqlite"), _initialize)
+
+    def __spill_path(self, context_id: str) -> pathlib.Path:
+        return self.__spill_directory.joinpath(f"{context_id}.pickle")
+
+    def save(self, context_id: str, result: ReturnValue) -> None:
+        """
+        Save the result with the given context id.
+
+        Args:
+            context_id: identifier of the function call context, must be a valid file name
+            result: return value of the function call
+        """
+
+        data = pickle.dumps(result, protocol=self.__pickle_protocol)
+        connection = self.__connections.get()
+
+        if len(data) < self.__spill_threshold:
+            connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, 0)", (context_id, data))
+            self.__spill_path(context_id).unlink(missing_ok=True)
+            return
+
+        # The file is published before the row, so that a reader finding the row finds the file
+        self.__spill_directory.mkdir(exist_ok=True)
+        with atomic_write(self.__spill_path(context_id)) as file:
+            file.write(data)
+
+        connection.execute("INSERT OR REPLACE INTO entries VALUES (?, NULL, 1)", (context_id,))
+
+    def retrieve(self, context_id: str) -> ReturnValue:
+        """
+        Retrieve the function return value with the given context id.
+        If there is no cached results for the context_id, throws a checkpointing.exceptions.CheckpointNotExist
+
+        Args:
+            context_id: identifier of the function call context
+
+        Returns:
+            The return value of the function that corresponds to this context id
+        """
+
+        row = self.__connections.get().execute("SELECT data, spilled FROM entries WHERE context_id = ?", (context_id,)).fetchone()
+        if row is None:
+            raise CheckpointNotExist
+
+        data, spilled = row
+        if not spilled:
+            return pickle.loads(data)
+
+        try:
+            file = open(self.__spill_path(context_id), "rb")
+        except FileNotFoundError:  # Saved inline again in the meantime
+            raise CheckpointNotExist
+
+        with file:
+            return pickle_util.load(file, self.__pickle_protocol)
+
+    def __len__(self) -> int:
+        (count,) = self.__connections.get().execute("SELECT COUNT(*) FROM entries").fetchone()
+        return count
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Remove all the cached results. The results are not organized by function, so `context` must be None.
+        """
+
+        if context is not None:
+            raise ValueError("SQLiteCache does not support clearing the results of a function")
+
+        self.__connections.get().execute("DELETE FROM entries")
+        shutil.rmtree(self.__spill_directory, ignore_errors=True)
@@ -0,0 +1,267 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing.cache.pickle_file import PickleFileCache
+from checkpointing._typing import ReturnValue
+from checkpointing import defaults
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from checkpointing.logging import logger
+from checkpointing.util.hash_ring import HashRing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Mapping, Sequence
+import os
+import threading
+
+
+class StripedCache(CacheBase):
+    """
+    Spreads the results over several `PickleFileCache`, e.g. one per disk, so that the throughput scales with the disks.
+
+    Each context id belongs to one cache by consistent hashing on a ring of the cache directories,
+    see `checkpointing.util.hash_ring`. A cache can be given a weight, e.g. proportional to the capacity of its disk.
+    `save_many` and `retrieve_many` access the caches in parallel threads, as do `clear` and the rebalancing.
+
+    Adding or removing a cache only moves the results whose owner changes, about 1/n of them, by `rebalance`.
+    Until then, a result not found in its cache is looked up in the cache that owned it before the change.
+    The caches should be configured alike, e.g. created with the same arguments but the directory,
+    as the files are moved to the same relative paths.
+
+    ```python
+    from checkpointing.cache import PickleFileCache, StripedCache
+
+    cache = StripedCache([PickleFileCache(f"/mnt/nvme{i}/checkpoints", layout="sharded") for i in range(4)])
+    ```
+    """
+
+    def __init__(
+        self,
+        caches: Sequence[PickleFileCache],
+        weights: Sequence[float] = None,
+        virtual_nodes: int = None,
+        max_workers: int = None,
+    ) -> None:
+        """
+        Args:
+            caches: the caches, identified on the ring by their directories
+            weights: the weights of the caches, 1 by default
+            virtual_nodes: the number of points on the ring of a cache of weight 1.
+                           If None, use the global default `cache.striped.virtual_nodes`
+            max_workers: the max number of threads accessing the caches in parallel.
+                         If None, use the global default `cache.striped.max_workers`,
+                         and if that is None, 4 threads per cache
+        """
+
+        if not caches:
+            raise ValueError("At least one cache is required")
+
+        weights = weights if weights is not None else [1.0] * len(caches)
+        if len(weights) != len(caches):
+            raise ValueError(f"{len(weights)} weights are given for {len(caches)} caches")
+
+        self.__caches: Dict[str, PickleFileCache] = {}
+        self.__ring = HashRing(virtual_nodes=virtual_nodes if virtual_nodes is not None else defaults["cache.striped.virtual_nodes"])
+        for cache, weight in zip(caches, weights):
+            name = _name(cache)
+            if name in self.__caches:
+                raise ValueError(f"The directory {name} is used by two caches")
+            self.__caches[name] = cache
+            self.__ring.add(name, weight)
+
+        self.__previous_ring: HashRing = None
+        self.__max_workers = max_workers if max_workers is not None else defaults["cache.striped.max_workers"]
+        self.__open()
+
+    def __open(self) -> None:
+        self.__executor: ThreadPoolExecutor = None
+        self.__executor_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ["executor", "executor_lock"]:
+            del state[f"_{StripedCache.__name__}__{name}"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__open()
+
+    @property
+    def caches(self) -> List[PickleFileCache]:
+        return [self.__caches[name] for name in self.__ring.nodes]
+
+    def cache_of(self, context_id: str) -> PickleFileCache:
+        """
+        Returns:
+            The cache the context id belongs to
+        """
+
+        return self.__caches[self.__ring.get(context_id)]
+
+    def __previous_cache_of(self, context_id: str) -> PickleFileCache:
+        """
+        Returns:
+            The cache the context id belonged to before the caches changed, if it is not the current one and not rebalanced
+        """
+
+        if self.__previous_ring is None:
+            return None
+
+        previous = self.__caches[self.__previous_ring.get(context_id)]
+        return previous if previous is not self.cache_of(context_id) else None
+
+    def __pool(self) -> ThreadPoolExecutor:
+        with self.__executor_lock:
+            if self.__executor is None:
+                max_workers = self.__max_workers if self.__max_workers is not None else 4 * len(self.__caches)
+                self.__executor = ThreadPoolExecutor(max_workers, thread_name_prefix="checkpointing-striped")
+            return self.__executor
+
+    def save(self, context_id: str, result: ReturnValue) -> None:
+        self.cache_of(context_id).save(context_id, result)
+
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: str,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        self.cache_of(context_id).save_with_context(context, context_id, result, run_time)
+
+    def retrieve(self, context_id: str) -> ReturnValue:
+        try:
+            return self.cache_of(context_id).retrieve(context_id)
+        except CheckpointNotExist:
+            previous = self.__previous_cache_of(context_id)
+            if previous is None:
+                raise
+
+        return previous.retrieve(context_id)
+
+    def retrieve_with_context(self, context: FuncCallContext, context_id: str) -> ReturnValue:
+        try:
+            return self.cache_of(context_id).retrieve_with_context(context, context_id)
+        except CheckpointNotExist:
+            previous = self.__previous_cache_of(context_id)
+            if previous is None:
+                raise
+
+        return previous.retrieve_with_context(context, context_id)
+
+    def save_many(self, results: Mapping[str, ReturnValue]) -> None:
+        """
+        Save many results in parallel.
+
+        Args:
+            results: the results by their context ids
+        """
+
+        for future in [self.__pool().submit(self.save, context_id, result) for context_id, result in results.items()]:
+            future.result()
+
+    def retrieve_many(self, context_ids: Iterable[str]) -> Dict[str, ReturnValue]:
+        """
+        Retrieve many results in parallel.
+
+        Args:
+            context_ids: identifiers of the function call contexts
+
+        Returns:
+            The results by their context ids, without the ones not cached
+        """
+
+        futures = {context_id: self.__pool().submit(self.retrieve, context_id) for context_id in context_ids}
+
+        results = {}
+        for context_id, future in futures.items():
+            try:
+                results[context_id] = future.result()
+            except CheckpointNotExist:
+                continue
+
+        return results
+
+    def add_cache(self, cache: PickleFileCache, weight: float = 1.0, rebalance: bool = True) -> int:
+        """
+        Add a cache, e.g. on a new disk. About `weight / total weight` of the results then belong to it.
+
+        Args:
+            cache: the cache to add
+            weight: the weight of the cache
+            rebalance: whether to move the results that now belong to the new cache. Otherwise they are looked up
+                       in their previous caches until `rebalance` is called.
+
+        Returns:
+            The number of results moved
+        """
+
+        name = _name(cache)
+        if name in self.__caches:
+            raise ValueError(f"The directory {name} is already used")
+
+        self.__changing()
+        self.__caches[name] = cache
+        self.__ring.add(name, weight)
+        return self.rebalance() if rebalance else 0
+
+    def remove_cache(self, cache: PickleFileCache) -> int:
+        """
+        Remove a cache, moving its results to the caches they now belong to.
+        Its directory can then be removed.
+
+        Returns:
+            The number of results moved
+        """
+
+        name = _name(cache)
+        if name not in self.__ring:
+            raise ValueError(f"The directory {name} is not used")
+        if len(self.__ring) == 1:
+            raise ValueError("The last cache can't be removed")
+
+        self.__changing()
+        self.__ring.remove(name)
+        try:
+            return self.rebalance()
+        finally:
+            del self.__caches[name]
+
+    def __changing(self) -> None:
+        if self.__previous_ring is not None:
+            # Otherwise the results that were not moved yet would be lost
+            self.rebalance()
+        self.__previous_ring = self.__ring.copy()
+
+    def rebalance(self) -> int:
+        """
+        Move the results that are not in the cache they belong to, e.g. after adding a cache without rebalancing,
+        scanning each cache in parallel.
+
+        Returns:
+            The number of results moved
+        """
+
+        moved = sum(self.__pool().map(self.__rebalance, list(self.__caches.values())))
+        self.__previous_ring = None
+
+        logger.info(f"Moved {moved} results between {len(self.__ring)} caches")
+        return moved
+
+    def __rebalance(self, cache: PickleFileCache) -> int:
+        moved = 0
+        for context_id, relative in list(cache._iter_entries()):
+            owner = self.cache_of(context_id)
+            if owner is not cache and cache._move_file(owner, relative):
+                moved += 1
+        return moved
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Clear each cache in parallel.
+        """
+
+        for future in [self.__pool().submit(cache.clear, context) for cache in self.__caches.values()]:
+            future.result()
+
+
+def _name(cache: PickleFileCache) -> str:
+    return os.path.normcase(os.path.abspath(cache.directory))
@@ -0,0 +1,151 @@
+from checkpointing.cache.base import CacheBase
+from checkpointing._typing import ContextId, ReturnValue
+from checkpointing.cache.in_mem import InMemoryCache
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from typing import Callable, List, Sequence, Union
+import copy
+
+
+class Tier:
+    """A cache used as a tier of `TieredCache`, with its admission policy."""
+
+    def __init__(
+        self,
+        cache: CacheBase,
+        admit: Callable[[ContextId, ReturnValue], bool] = None,
+        copy: bool = False,
+        volatile: bool = None,
+    ) -> None:
+        """
+        Args:
+            cache: the cache of this tier
+            admit: whether a result should be saved in this tier, when it is saved or promoted.
+                   If None, all the results are admitted.
+            copy: whether to save and return deep copies of the results, so that modifying a retrieved result
+                  does not change the cached one. Useful for in-memory caches, which return the same object otherwise.
+            volatile: whether the results of this tier can all be dropped when the results of a single function are
+                      cleared, if the cache can't clear a single function. If None, only an `InMemoryCache` is volatile.
+        """
+
+        self.cache = cache
+        self.admit = admit
+        self.copy = copy
+        self.volatile = volatile if volatile is not None else isinstance(cache, InMemoryCache)
+
+    def admits(self, context_id: ContextId, result: ReturnValue) -> bool:
+        return self.admit is None or self.admit(context_id, result)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.cache!r}, copy={self.copy}, volatile={self.volatile})"
+
+
+class TieredCache(CacheBase):
+    """
+    Composes the caches from the fastest to the slowest, e.g. an `InMemoryLRUCache` over a `PickleFileCache`.
+
+    Saving is write-through, the result is saved in each tier that admits it.
+    Retrieval looks up the tiers in order, and a result found in a slower tier is promoted,
+    i.e. saved in the faster tiers that admit it, so that the next retrieval is served by the fastest one.
+
+    For example, to keep only the small results in memory, and return copies of them:
+
+    ```python
+    import sys
+    from checkpointing.cache import InMemoryLRUCache, PickleFileCache
+    from checkpointing.cache.tiered import Tier, TieredCache
+
+    cache = TieredCache([
+        Tier(InMemoryLRUCache(1000), admit=lambda context_id, result: sys.getsizeof(result) < 1 << 20, copy=True),
+        PickleFileCache(),
+    ])
+    ```
+    """
+
+    def __init__(self, tiers: Sequence[Union[CacheBase, Tier]]) -> None:
+        """
+        Args:
+            tiers: the caches from the fastest to the slowest, or `Tier` to configure the admission and copying
+        """
+
+        if not tiers:
+            raise ValueError("At least one tier is required")
+
+        self.__tiers: List[Tier] = [tier if isinstance(tier, Tier) else Tier(tier) for tier in tiers]
+
+    @property
+    def tiers(self) -> List[Tier]:
+        return list(self.__tiers)
+
+    def save(self, context_id: ContextId, result: ReturnValue) -> None:
+        for tier in self.__tiers:
+            if tier.admits(context_id, result):
+                tier.cache.save(context_id, _copy(tier, result))
+
+    def save_with_context(
+        self,
+        context: FuncCallContext,
+        context_id: ContextId,
+        result: ReturnValue,
+        run_time: float = None,
+    ) -> None:
+        for tier in self.__tiers:
+            if tier.admits(context_id, result):
+                tier.cache.save_with_context(context, context_id, _copy(tier, result), run_time)
+
+    def retrieve(self, context_id: ContextId) -> ReturnValue:
+        for i, tier in enumerate(self.__tiers):
+            try:
+                result = tier.cache.retrieve(context_id)
+            except CheckpointNotExist:
+                continue
+
+            for upper in self.__tiers[:i]:
+                if upper.admits(context_id, result):
+                    upper.cache.save(context_id, _copy(upper, result))
+
+            return _copy(tier, result)
+
+        raise CheckpointNotExist
+
+    def retrieve_with_context(self, context: FuncCallContext, context_id: ContextId) -> ReturnValue:
+        for i, tier in enumerate(self.__tiers):
+            try:
+                result = tier.cache.retrieve_with_context(context, context_id)
+            except CheckpointNotExist:
+                continue
+
+            for upper in self.__tiers[:i]:
+                if upper.admits(context_id, result):
+                    upper.cache.save_with_context(context, context_id, _copy(upper, result))
+
+            return _copy(tier, result)
+
+        raise CheckpointNotExist
+
+    def clear(self, context: FuncCallContext = None) -> None:
+        """
+        Clear each tier. A volatile tier that can't clear the results of a single function is cleared entirely,
+        so that it does not serve the results cleared from the other tiers.
+        If another tier can't, the other tiers are still cleared, then the error is raised,
+        as clearing it entirely would remove the results of the other functions.
+        """
+
+        unsupported = None
+        for tier in self.__tiers:
+            try:
+                tier.cache.clear(context)
+            except (ValueError, NotImplementedError) as e:
+                if context is None:
+                    raise
+                if tier.volatile:
+                    tier.cache.clear()
+                elif unsupported is None:
+                    unsupported = e
+
+        if unsupported is not None:
+            raise unsupported
+
+
+def _copy(tier: Tier, result: ReturnValue) -> ReturnValue:
+    return copy.deepcopy(result) if tier.copy else result
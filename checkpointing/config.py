@@ -1,8 +1,45 @@
 defaults = {
     "cache.filesystem.directory": ".checkpointing",
+    "cache.filesystem.buffer_threshold": None,
+    "cache.filesystem.mmap_mode": None,
+    "cache.filesystem.layout": "flat",
+    "cache.filesystem.namespaced": False,
+    "cache.filesystem.keep_versions": None,
+    "cache.filesystem.compression": "none",
+    "cache.filesystem.max_bytes": None,
+    "cache.filesystem.min_free_bytes": None,
+    "cache.filesystem.eviction.cost_weight": 3600.0,
+    "cache.filesystem.dictionary.max_entry_size": 0,
+    "cache.filesystem.dictionary.size": 32768,
+    "cache.filesystem.durability": "none",
+    "cache.filesystem.group_commit.interval": 1.0,
+    "cache.filesystem.group_commit.max_pending": 1000,
+    "cache.sqlite.spill_threshold": 1048576,
+    "cache.pack.segment_size": 268435456,
+    "cache.pack.compaction_threshold": 0.5,
+    "cache.shared_memory.max_bytes": None,
+    "cache.daemon.socket": None,
+    "cache.daemon.shm_threshold": 1048576,
+    "cache.http.pool_size": 8,
+    "cache.http.part_size": 8388608,
+    "cache.http.multipart_threshold": 33554432,
+    "cache.http.timeout": 60.0,
+    "cache.redis.url": "redis://localhost:6379/0",
+    "cache.redis.key_prefix": "checkpointing:",
+    "cache.redis.ttl": None,
+    "cache.redis.chunk_size": 33554432,
+    "cache.redis.max_connections": 64,
+    "cache.bloom.capacity": 1000000,
+    "cache.bloom.error_rate": 0.01,
+    "cache.bloom.flush_every": 1000,
+    "cache.overlay.promote": "none",
+    "cache.overlay.promote_after": 1,
+    "cache.striped.virtual_nodes": 128,
+    "cache.striped.max_workers": None,
     "cache.pickle_protocol": 5,
     "hash.algorithm": "md5",
     "hash.pickle_protocol": 5,
+    "hash.prefix.tail_size": 0,
     "checkpoint.on_error": "warn",
 }
 """
@@ -10,4 +47,8 @@ Package-wise global dict for default value configurations
 
 The pickle protocols are hardcoded as `5` in favor of [PEP 574](https://peps.python.org/pep-0574/),
 which optimizes pickling large data objects. Using this will significantly reduce the memory overhead.
+
+`hash.prefix.tail_size` is the number of trailing bytes compared to decide whether a `bytearray` or `array.array`
+argument has only been appended to since it was last hashed, so that only the appended bytes need hashing.
+It is `0` by default, which disables the heuristic; see `checkpointing.hash.prefix` for detail.
 """
@@ -70,6 +70,7 @@ class DecoratorCheckpoint(ABC, Generic[ReturnValue]):
         inner = self.__create_inner(func)
 
         self.__bind_rerun(func, inner)
+        self.__bind_clear_cache(func, inner)
 
         return inner
 
@@ -94,7 +95,7 @@ class DecoratorCheckpoint(ABC, Generic[ReturnValue]):
 
                 res, run_time = timed_run(func, *args, **kwargs)
 
-                save_time = self.__timed_safe_save(context, context_id, res)
+                save_time = self.__timed_safe_save(context, context_id, res, run_time)
 
                 self.__warn_if_more_expensive(context, retrieve_time + save_time, run_time)
                 return res
@@ -109,13 +110,23 @@ class DecoratorCheckpoint(ABC, Generic[ReturnValue]):
 
             res, run_time = timed_run(original_func, *args, **kwargs)
 
-            save_time = self.__timed_safe_save(context, context_id, res)
+            save_time = self.__timed_safe_save(context, context_id, res, run_time)
 
             self.__warn_if_more_expensive(context, save_time, run_time)
             return res
 
         inner_func.rerun = rerun
 
+    def __bind_clear_cache(self, original_func: Callable[..., ReturnValue], inner_func: Callable[..., ReturnValue]) -> None:
+        def clear_cache() -> None:
+            context = FuncCallContext(original_func, (), {}, self.__definition_frame)
+
+            logger.info(f"Clearing the cached results of {context.full_name}")
+
+            self.__cache.clear(context)
+
+        inner_func.clear_cache = clear_cache
+
     def __warn_if_more_expensive(self, context: FuncCallContext, checkpoint_time: float, run_time: float, tol: float = 0.1) -> None:
         """
         Warn the user if retrieval takes longer than running the function.
@@ -150,7 +161,7 @@ class DecoratorCheckpoint(ABC, Generic[ReturnValue]):
 
         timer = Timer().start()
         try:
-            res = self.__cache.retrieve(context_id)
+            res = self.__cache.retrieve_with_context(context, context_id)
             return True, res, timer.time
 
         except CheckpointNotExist:
@@ -181,18 +192,21 @@ class DecoratorCheckpoint(ABC, Generic[ReturnValue]):
         else:  # self.__on_error == "ignore"
             pass
 
-    def __timed_safe_save(self, context: FuncCallContext, context_id: ContextId, result: ReturnValue) -> float:
+    def __timed_safe_save(self, context: FuncCallContext, context_id: ContextId, result: ReturnValue, run_time: float) -> float:
         """
         Save the result, tracking the time and capturing any error,
         dealing with them according to the level specified by `self.__on_error`
 
+        Args:
+            run_time: the time (seconds) it took to compute the result
+
         Returns:
             the time (seconds) it takes to save the result
         """
 
         timer = Timer().start()
         try:
-            self.__cache.save(context_id, result)
+            self.__cache.save_with_context(context, context_id, result, run_time)
             logger.info(f"Result of {context.qualified_name} with args {context.arguments} saved to cache")
 
         except Exception as e:
@@ -2,6 +2,8 @@ from typing import Any
 from checkpointing.hash.generic import hash_generic
 from checkpointing.config import defaults
 from checkpointing.hash.stream import HashStream
+from checkpointing.hash.prefix import append_only
+from checkpointing.hash.specific import register_hasher
 
 
 def hash_anything(*objs: Any, algorithm: str = None, pickle_protocol: int = None) -> str:
@@ -1,4 +1,5 @@
 import inspect
+import pickle
 from types import FunctionType, GeneratorType, ModuleType
 from typing import Any
 from warnings import warn
@@ -6,11 +7,44 @@ from warnings import warn
 import dill
 from checkpointing.exceptions import HashFailedWarning
 from checkpointing.hash.stream import HashStream
+from checkpointing.hash.specific import get_hasher
 from checkpointing.refactor.funcdef import FunctionDefinitionUnifier
-from checkpointing.util import pickle
 from checkpointing.logging import logger
 
 
+def _hashed(*token: Any) -> None:
+    """
+    Placeholder reconstructor of the objects replaced by their digest in a `HashPickler` stream.
+    The stream is only used for hashing, so this is never called.
+    """
+
+    raise RuntimeError("Objects pickled by the HashPickler cannot be unpickled")
+
+
+class HashPickler(pickle.Pickler):
+    """
+    Pickler that writes any object with a specific hasher (see `checkpointing.hash.specific`)
+    as the digest computed by that hasher, wherever it is in the object graph.
+    The rest of the object graph is pickled normally.
+    """
+
+    def __init__(self, stream: HashStream, protocol: int) -> None:
+        super().__init__(stream, protocol)
+        self.__algorithm = stream.algorithm
+        self.__protocol = protocol
+
+    def reducer_override(self, obj: Any) -> Any:
+        type_ = type(obj)
+        hasher = get_hasher(type_)
+
+        if hasher is not None:
+            sub_stream = HashStream(self.__algorithm)
+            if hasher(sub_stream, obj, self.__protocol) is not NotImplemented:
+                return _hashed, (f"{type_.__module__}.{type_.__qualname__}", sub_stream.hexdigest())
+
+        return NotImplemented
+
+
 def hash_with_dill(stream: HashStream, obj: Any, pickle_protocol: int) -> None:
     dill.dump(
         obj,
@@ -22,7 +56,7 @@ def hash_with_dill(stream: HashStream, obj: Any, pickle_protocol: int) -> None:
 
 
 def hash_with_pickle(stream: HashStream, obj: Any, pickle_protocol: int) -> None:
-    pickle.dump(obj, stream, protocol=pickle_protocol)
+    HashPickler(stream, pickle_protocol).dump(obj)
 
 
 def hash_string(stream: HashStream, s: str) -> None:
@@ -0,0 +1,157 @@
+"""
+Resumable hashing for mutable buffers that only grow by appending.
+"""
+
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, TypeVar
+
+from checkpointing.config import defaults
+
+Buffer = TypeVar("Buffer")
+
+
+class _PrefixState:
+    """The resumable hash state of the bytes of a buffer that have been hashed."""
+
+    __slots__ = ("obj", "append_only", "algorithm", "length", "hash", "tail")
+
+    def __init__(self, obj: Any) -> None:
+        self.obj = obj
+        self.append_only = False
+        self.algorithm = None
+        self.length = 0
+        self.hash = None
+        self.tail = b""
+
+
+class PrefixHasher:
+    """
+    Digests the raw bytes of mutable buffers such as `bytearray` and `array.array`,
+    keeping a resumable hashlib state for the buffers it has seen, keyed by the object identity.
+
+    When a buffer is hashed again and the bytes hashed last time are known to be unchanged,
+    only the appended suffix is hashed. The previously hashed bytes are considered unchanged if
+
+    - the buffer has been declared append-only with `declare_append_only`, or
+    - `tail_size` is positive, and the last `tail_size` bytes of the previously hashed prefix still match.
+      This is a heuristic, any modification before the tail will not be detected.
+
+    Otherwise, the whole buffer is hashed again. The digest only depends on the bytes of the buffer,
+    it is the same no matter whether the hash state is resumed or not.
+
+    >>> hasher = PrefixHasher()
+    >>> buf = hasher.declare_append_only(bytearray(b"hello"))
+    >>> buf += b" world"
+    >>> hasher.hexdigest(buf, "md5") == hashlib.md5(b"hello world").hexdigest()
+    True
+    """
+
+    def __init__(self, maxsize: int = 64, tail_size: int = None) -> None:
+        """
+        Args:
+            maxsize: max number of buffers whose hash states are kept. The states are evicted in LRU order.
+                     Note that a strong reference to each of these buffers is kept to make the object identity reliable.
+            tail_size: number of trailing bytes of the hashed prefix to compare to determine whether a buffer,
+                       that is not declared append-only, has only been appended to. If 0, such buffers are always
+                       fully rehashed. If None, use the global default `hash.prefix.tail_size`.
+        """
+
+        self.__maxsize = maxsize
+        self.__tail_size = tail_size
+        self.__states: OrderedDict = OrderedDict()
+        self.__lock = Lock()
+
+    def declare_append_only(self, obj: Buffer) -> Buffer:
+        """
+        Declare that the buffer will only grow by appending, so that its hash state can always be resumed.
+
+        Returns:
+            the buffer itself
+        """
+
+        with self.__lock:
+            self.__get_state(obj).append_only = True
+
+        return obj
+
+    def hexdigest(self, obj: Any, algorithm: str) -> str:
+        """
+        Args:
+            obj: a C-contiguous object that supports the buffer protocol
+            algorithm: the hash algorithm. Must be supported by the hashlib.
+
+        Returns:
+            The hexdigest of the raw bytes of the buffer
+        """
+
+        # The memoryview must be released at the end, otherwise the buffer could not be resized.
+        with memoryview(obj) as view, view.cast("B") as data, self.__lock:
+            tail_size = self.__get_tail_size()
+            state = self.__states.get(id(obj))
+            if state is not None and state.obj is not obj:
+                state = None
+
+            if state is None and tail_size <= 0:
+                hash_ = hashlib.new(algorithm)
+                hash_.update(data)
+                return hash_.hexdigest()
+
+            state = self.__get_state(obj)
+            if not self.__can_resume(state, data, algorithm, tail_size):
+                state.algorithm = algorithm
+                state.hash = hashlib.new(algorithm)
+                state.length = 0
+
+            state.hash.update(data[state.length :])
+            state.length = len(data)
+            if tail_size > 0:
+                state.tail = bytes(data[max(0, state.length - tail_size) :])
+
+            return state.hash.copy().hexdigest()
+
+    def __get_state(self, obj: Any) -> _PrefixState:
+        key = id(obj)
+        state = self.__states.get(key)
+
+        if state is None or state.obj is not obj:
+            state = _PrefixState(obj)
+            self.__states[key] = state
+
+        self.__states.move_to_end(key)
+        if len(self.__states) > self.__maxsize:
+            self.__states.popitem(last=False)
+
+        return state
+
+    def __get_tail_size(self) -> int:
+        return self.__tail_size if self.__tail_size is not None else defaults["hash.prefix.tail_size"]
+
+    def __can_resume(self, state: _PrefixState, data: memoryview, algorithm: str, tail_size: int) -> bool:
+        if state.hash is None or state.algorithm != algorithm or len(data) < state.length:
+            return False
+
+        if state.append_only:
+            return True
+
+        if tail_size <= 0:
+            return False
+
+        return data[state.length - len(state.tail) : state.length] == state.tail
+
+
+prefix_hasher = PrefixHasher()
+"""Package-wise prefix hasher used when hashing function arguments."""
+
+
+def append_only(obj: Buffer) -> Buffer:
+    """
+    Declare that a `bytearray` or `array.array` only grows by appending,
+    so that hashing it as an argument of a checkpointed function only costs the newly appended bytes.
+
+    Returns:
+        the object itself, so that it can be used inline, e.g. `foo(append_only(buffer))`
+    """
+
+    return prefix_hasher.declare_append_only(obj)
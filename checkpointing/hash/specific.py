@@ -0,0 +1,120 @@
+"""
+Hashers for specific types, used wherever an object of such type appears in the hashed object graph,
+including being nested in containers, dataclasses or any other user objects.
+
+A specific hasher is a function `hasher(stream, obj, pickle_protocol)` writing a representation of `obj`
+into the `HashStream`. It can return `NotImplemented` to fall back to the generic pickle based hashing.
+
+>>> class Point:
+...     def __init__(self, x, y):
+...         self.x, self.y = x, y
+>>>
+>>> def hash_point(stream, point, pickle_protocol):
+...     stream.write(f"{point.x},{point.y}".encode("utf-8"))
+>>>
+>>> register_hasher(Point, hash_point)
+>>> get_hasher(Point) is hash_point
+True
+"""
+
+from array import array
+from typing import Any, Callable, Dict, Optional, Union
+
+from checkpointing.hash.stream import HashStream
+from checkpointing.hash.prefix import prefix_hasher
+
+SpecificHasher = Callable[[HashStream, Any, int], Any]
+
+_hashers: Dict[Union[type, str], SpecificHasher] = {}
+"""Registered hashers, keyed by the type, or the full qualified name of the type"""
+
+_resolved: Dict[type, Optional[SpecificHasher]] = {}
+"""Cache of the hasher found for each type"""
+
+
+def register_hasher(type_: Union[type, str], hasher: SpecificHasher) -> None:
+    """
+    Register a hasher for objects whose type is exactly `type_`.
+
+    Args:
+        type_: the type, or its full qualified name, e.g. `"numpy.ndarray"`.
+               Registering by name does not require the module to be imported.
+        hasher: the hasher function
+    """
+
+    _hashers[type_] = hasher
+    _resolved.clear()
+
+
+def get_hasher(type_: type) -> Optional[SpecificHasher]:
+    """
+    Returns:
+        The hasher registered for the type, or None if there isn't one
+    """
+
+    try:
+        return _resolved[type_]
+    except KeyError:
+        pass
+
+    hasher = _hashers.get(type_)
+    if hasher is None:
+        hasher = _hashers.get(f"{type_.__module__}.{type_.__qualname__}")
+
+    _resolved[type_] = hasher
+    return hasher
+
+
+def hash_buffer(stream: HashStream, obj: Any, pickle_protocol: int) -> None:
+    """Hash a `bytearray` or `array.array` by its raw bytes, resuming the hash state of growing buffers."""
+
+    if isinstance(obj, array):
+        stream.write(obj.typecode.encode("utf-8"))
+
+    stream.write(prefix_hasher.hexdigest(obj, stream.algorithm).encode("utf-8"))
+
+
+def hash_numpy_array(stream: HashStream, arr: Any, pickle_protocol: int) -> Any:
+    """Hash the dtype, shape, and raw data of a `numpy.ndarray` in C order, without copying C-contiguous arrays."""
+
+    import numpy as np
+
+    if arr.dtype.hasobject:
+        return NotImplemented
+
+    stream.write(f"{arr.dtype.descr}{arr.shape}".encode("utf-8"))
+    stream.write(np.ascontiguousarray(arr).reshape(-1).view(np.uint8).data)
+
+
+def hash_pandas_object(stream: HashStream, obj: Any, pickle_protocol: int) -> None:
+    """
+    Hash a `pandas.DataFrame` or `pandas.Series` column by column, so that the hash value does not depend
+    on how the columns are consolidated in memory. Columns backed by numpy arrays use `hash_numpy_array`,
+    the labels and other columns are pickled.
+    """
+
+    import numpy as np
+    from checkpointing.hash.generic import hash_with_pickle
+
+    if obj.ndim == 1:
+        hash_with_pickle(stream, ("Series", obj.name, obj.index), pickle_protocol)
+        columns = [obj]
+    else:
+        hash_with_pickle(stream, ("DataFrame", obj.columns, obj.index), pickle_protocol)
+        columns = [obj.iloc[:, i] for i in range(obj.shape[1])]
+
+    for column in columns:
+        if isinstance(column.dtype, np.dtype) and hash_numpy_array(stream, column.to_numpy(), pickle_protocol) is not NotImplemented:
+            continue
+
+        hash_with_pickle(stream, column.array, pickle_protocol)
+
+
+register_hasher(bytearray, hash_buffer)
+register_hasher(array, hash_buffer)
+register_hasher("numpy.ndarray", hash_numpy_array)
+register_hasher("numpy.memmap", hash_numpy_array)
+
+# pandas>=3 reports the public module as the `__module__` of its classes
+for name in ["pandas.DataFrame", "pandas.Series", "pandas.core.frame.DataFrame", "pandas.core.series.Series"]:
+    register_hasher(name, hash_pandas_object)
@@ -39,6 +39,14 @@ class HashStream(RawIOBase):
         self.__hash.update(b)
         return len(b)
 
+    @property
+    def algorithm(self) -> str:
+        """
+        The name of the hash algorithm
+        """
+
+        return self.__hash.name
+
     def hexdigest(self) -> str:
         """
         Returns:
@@ -4,6 +4,13 @@ from collections import OrderedDict
 from checkpointing._typing import ReturnValue
 from types import FrameType
 import copy
+import hashlib
+import weakref
+
+from checkpointing.refactor.funcdef import FunctionDefinitionUnifier
+
+_fingerprints: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+"""Memoized fingerprints by the function code objects"""
 
 
 class FuncCallContext:
@@ -149,6 +156,35 @@ class FuncCallContext:
 
         return inspect.getsource(self.__func)
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        A digest of the function code unified by `FunctionDefinitionUnifier`,
+        so that it does not change with the names of the local variables, formatting or comments.
+        It is computed once per code object.
+
+        >>> def foo(a):
+        ...     return a + 1
+        >>>
+        >>> def bar(b):
+        ...     return b + 1  # add one
+        >>>
+        >>> FuncCallContext(foo, (1,), {}).fingerprint == FuncCallContext(bar, (1,), {}).fingerprint
+        True
+        """
+
+        key = getattr(self.__func, "__code__", None)
+        if key is not None and key in _fingerprints:
+            return _fingerprints[key]
+
+        dump = FunctionDefinitionUnifier(self.code).unified_ast_dump
+        fingerprint = hashlib.md5(dump.encode()).hexdigest()[:16]
+
+        if key is not None:
+            _fingerprints[key] = fingerprint
+
+        return fingerprint
+
     def get_nonlocal_variable(self, varname: str) -> Any:
         r"""
         Try to get the nonlocal variable `varname` from the function call's
@@ -0,0 +1,101 @@
+"""
+Utilities for publishing files atomically, and for updating them under a lock shared by the processes.
+"""
+
+from contextlib import contextmanager
+import os
+import pathlib
+import uuid
+from typing import BinaryIO, Iterator
+
+from checkpointing.util.durability import fsync_path
+
+
+def temporary_path(path: pathlib.Path) -> pathlib.Path:
+    """
+    Returns:
+        A unique hidden path in the same directory as `path`, so that it can be renamed to `path` atomically
+    """
+
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+
+@contextmanager
+def atomic_write(path: pathlib.Path, fsync: bool = False) -> Iterator[BinaryIO]:
+    """
+    Open a temporary file in the same directory for writing,
+    which is published at `path` with `os.replace` when the context exits successfully, or removed otherwise.
+
+    Readers of `path` thus either see the previous file, or the complete new one, never a truncated file.
+
+    Args:
+        path: the path to publish the file
+        fsync: whether to fsync the file before publishing it, and the directory after publishing it
+    """
+
+    tmp = temporary_path(path)
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+
+    try:
+        with os.fdopen(fd, "wb") as file:
+            yield file
+
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+
+        os.replace(tmp, path)
+
+        if fsync:
+            fsync_path(path.parent)
+
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def file_lock(path: pathlib.Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on the file, created if it does not exist, blocking until it is acquired,
+    e.g. to read, modify and replace another file without losing the updates of other processes.
+    The lock is released when the context exits, or when the process dies.
+
+    Args:
+        path: the lock file, e.g. `<file>.lock` next to the file to update
+    """
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        _lock(fd)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(fd: int) -> None:
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:  # Gave up after retrying for 10 seconds, keep waiting
+                continue
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
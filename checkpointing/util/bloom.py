@@ -0,0 +1,126 @@
+"""
+A Bloom filter of strings, which tells that a string was definitely not added, or was probably added.
+
+The filter is sized for an expected number of strings and false positive rate.
+Each string sets `k` bits, derived by double hashing from one blake2b digest.
+Two filters of the same size can be merged, which is the filter of the strings added to either of them.
+
+>>> bloom = BloomFilter(1000, 0.01)
+>>> bloom.add("a")
+>>> "a" in bloom
+True
+>>> "b" in bloom
+False
+>>> BloomFilter.loads(bloom.dumps()) == bloom
+True
+"""
+
+from typing import Iterable
+import hashlib
+import math
+import struct
+import threading
+
+_MAGIC = b"CKBF"
+_HEADER = struct.Struct("<4sQIQQ")
+"""Magic, number of bits, number of hashes, capacity, number of strings added"""
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """
+        Args:
+            capacity: the expected number of strings, beyond which the false positive rate grows
+            error_rate: the false positive rate at the capacity
+        """
+
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError(f"Invalid capacity {capacity} or error rate {error_rate}")
+
+        n_bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        n_hashes = max(1, round(n_bits / capacity * math.log(2)))
+        self.__init(n_bits, n_hashes, capacity, 0, bytearray((n_bits + 7) // 8))
+
+    def __init(self, n_bits: int, n_hashes: int, capacity: int, count: int, bits: bytearray) -> None:
+        self.__n_bits = n_bits
+        self.__n_hashes = n_hashes
+        self.__capacity = capacity
+        self.__count = count
+        self.__bits = bits
+        self.__lock = threading.Lock()
+
+    def __getstate__(self):
+        return self.dumps()
+
+    def __setstate__(self, state):
+        self.__load(state)
+
+    def __load(self, data: bytes) -> None:
+        if len(data) < _HEADER.size:
+            raise ValueError("The data is not a Bloom filter")
+
+        magic, n_bits, n_hashes, capacity, count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or len(data) != _HEADER.size + (n_bits + 7) // 8:
+            raise ValueError("The data is not a Bloom filter")
+        self.__init(n_bits, n_hashes, capacity, count, bytearray(data[_HEADER.size :]))
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    def __positions(self, key: str) -> Iterable[int]:
+        h1, h2 = struct.unpack("<QQ", hashlib.blake2b(key.encode(), digest_size=16).digest())
+        h2 |= 1  # Odd, so that the positions do not cycle early when the number of bits is a power of two
+        return ((h1 + i * h2) % self.__n_bits for i in range(self.__n_hashes))
+
+    def add(self, key: str) -> None:
+        positions = list(self.__positions(key))
+        with self.__lock:
+            for position in positions:
+                self.__bits[position >> 3] |= 1 << (position & 7)
+            self.__count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.__bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self.__positions(key))
+
+    def __len__(self) -> int:
+        """The number of strings added, including the duplicates, and at least the larger of the merged filters."""
+        return self.__count
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BloomFilter) and self.dumps() == other.dumps()
+
+    def update(self, other: "BloomFilter") -> None:
+        """
+        Add the strings added to another filter of the same size.
+        """
+
+        if (other.__n_bits, other.__n_hashes) != (self.__n_bits, self.__n_hashes):
+            raise ValueError("Only the Bloom filters of the same size can be merged")
+
+        theirs = int.from_bytes(other.__bits, "little")
+        with self.__lock:
+            merged = int.from_bytes(self.__bits, "little") | theirs
+            self.__bits[:] = merged.to_bytes(len(self.__bits), "little")
+            self.__count = max(self.__count, other.__count)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__bits[:] = bytes(len(self.__bits))
+            self.__count = 0
+
+    def dumps(self) -> bytes:
+        with self.__lock:
+            header = _HEADER.pack(_MAGIC, self.__n_bits, self.__n_hashes, self.__capacity, self.__count)
+            return header + bytes(self.__bits)
+
+    @classmethod
+    def loads(cls, data: bytes) -> "BloomFilter":
+        """
+        Raises ValueError if the data is not the return value of `dumps`.
+        """
+
+        bloom = cls.__new__(cls)
+        bloom.__load(data)
+        return bloom
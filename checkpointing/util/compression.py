@@ -0,0 +1,316 @@
+"""
+Streaming compression of files.
+
+A compressed file starts with a small header recording the codec, followed by the compressed stream,
+so that it can be decompressed regardless of the current settings. Files without the header are not compressed.
+
+The codecs `"zlib"`, `"lzma"` and `"bz2"` are always available,
+`"zstd"` and `"lz4"` are available if `zstandard` and `lz4` are installed respectively.
+
+Small data can be compressed with a shared dictionary instead, see `checkpointing.util.dictionary`.
+The header of such a file records the id of the dictionary, which is needed to decompress it.
+"""
+
+import bz2
+import functools
+import io
+import lzma
+import zlib
+from typing import Any, BinaryIO, Callable, Dict, List, Tuple
+
+_HEADER_MAGIC = b"\x00ckpt-z"
+"""Starts a compressed file, followed by the length and the name of the codec"""
+
+_DICTIONARY_PREFIX = "@"
+"""Prefixes the dictionary id in place of the codec name in the header"""
+
+_CHUNK_SIZE = 1 << 16
+
+AUTO_SAMPLE_SIZE = 1 << 20
+"""Number of bytes sampled by the `"auto"` codec to decide whether to compress"""
+
+AUTO_MAX_RATIO = 0.9
+"""The `"auto"` codec compresses if the sample can be compressed to at most this ratio of its size"""
+
+
+class _ZlibWriter(io.RawIOBase):
+    def __init__(self, file: BinaryIO) -> None:
+        self.__file = file
+        self.__compressor = zlib.compressobj()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: bytes) -> int:
+        with memoryview(b) as view:
+            self.__file.write(self.__compressor.compress(view))
+            return view.nbytes
+
+    def close(self) -> None:
+        if not self.closed:
+            self.__file.write(self.__compressor.flush())
+        super().close()
+
+
+class _ZlibReader(io.RawIOBase):
+    def __init__(self, file: BinaryIO) -> None:
+        self.__file = file
+        self.__decompressor = zlib.decompressobj()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b: bytearray) -> int:
+        while not self.__decompressor.eof:
+            data = self.__decompressor.unconsumed_tail or self.__file.read(_CHUNK_SIZE)
+            if not data:
+                raise EOFError("The compressed stream is truncated")
+
+            data = self.__decompressor.decompress(data, len(b))
+            if data:
+                b[: len(data)] = data
+                return len(data)
+
+        return 0
+
+
+def _zlib() -> Tuple[Callable, Callable]:
+    return _ZlibWriter, _ZlibReader
+
+
+def _lzma() -> Tuple[Callable, Callable]:
+    return (lambda file: lzma.LZMAFile(file, "wb")), (lambda file: lzma.LZMAFile(file, "rb"))
+
+
+def _bz2() -> Tuple[Callable, Callable]:
+    return (lambda file: bz2.BZ2File(file, "wb")), (lambda file: bz2.BZ2File(file, "rb"))
+
+
+def _zstd() -> Tuple[Callable, Callable]:
+    import zstandard
+
+    def writer(file):
+        return zstandard.ZstdCompressor().stream_writer(file, closefd=False)
+
+    def reader(file):
+        return zstandard.ZstdDecompressor().stream_reader(file, closefd=False)
+
+    return writer, reader
+
+
+def _lz4() -> Tuple[Callable, Callable]:
+    import lz4.frame
+
+    return (lambda file: lz4.frame.LZ4FrameFile(file, "wb")), (lambda file: lz4.frame.LZ4FrameFile(file, "rb"))
+
+
+_codecs: Dict[str, Callable[[], Tuple[Callable, Callable]]] = {
+    "zstd": _zstd,
+    "lz4": _lz4,
+    "zlib": _zlib,
+    "lzma": _lzma,
+    "bz2": _bz2,
+}
+"""Functions returning the writer and reader factories of each codec, raising ImportError if not available"""
+
+
+def available_codecs() -> List[str]:
+    """
+    Returns:
+        Names of the codecs that can be used in this environment, in the order of preference of the `"auto"` codec
+    """
+
+    return list(_available_codecs())
+
+
+@functools.lru_cache(maxsize=None)
+def _available_codecs() -> Tuple[str, ...]:
+    """Imports the optional packages once, rather than on every save"""
+
+    available = []
+    for name, codec in _codecs.items():
+        try:
+            codec()
+            available.append(name)
+        except ImportError:
+            pass
+
+    return tuple(available)
+
+
+def validate_codec(codec: str) -> None:
+    """
+    Raises ValueError if the codec is not `"none"`, `"auto"` or an available codec.
+    """
+
+    valid = ["none", "auto", *available_codecs()]
+    if codec not in valid:
+        raise ValueError(f"Invalid or unavailable compression codec: {codec}, must be one of {valid}")
+
+
+def open_writer(file: BinaryIO, codec: str, dictionary: Any = None, dictionary_max_size: int = 0) -> BinaryIO:
+    """
+    Args:
+        file: the binary file to write the (compressed) data into
+        codec: the name of a codec, `"none"`, or `"auto"` to use the preferred available codec
+               only if the beginning of the data is compressible
+        dictionary: a `checkpointing.util.dictionary.CompressionDictionary`. If not None, the data of at most
+                    `dictionary_max_size` bytes is compressed with it, and larger data with `codec`.
+
+    Returns:
+        A binary stream to write the data into. It must be closed to finish the compressed stream,
+        which does not close the file.
+    """
+
+    if dictionary is not None:
+        return _DictionaryWriter(file, codec, dictionary, dictionary_max_size)
+
+    if codec == "auto":
+        return _AutoWriter(file, available_codecs()[0])
+
+    if codec == "none":
+        return _Unclosable(file)
+
+    _write_header(file, codec)
+    writer, _ = _codecs[codec]()
+    return writer(file)
+
+
+def open_reader(file: BinaryIO, dictionaries: Callable[[str], Any] = None) -> BinaryIO:
+    """
+    Args:
+        file: the binary file to read the (compressed) data from
+        dictionaries: returns the `checkpointing.util.dictionary.CompressionDictionary` of an id,
+                      required to read the data compressed with a dictionary
+
+    Returns:
+        A binary stream of the decompressed data if the file starts with a compression header,
+        otherwise the file itself, at its original position
+    """
+
+    start = file.tell()
+    magic = file.read(len(_HEADER_MAGIC))
+
+    if magic != _HEADER_MAGIC:
+        file.seek(start)
+        return file
+
+    length = file.read(1)[0]
+    codec = file.read(length).decode("ascii")
+
+    if codec.startswith(_DICTIONARY_PREFIX):
+        if dictionaries is None:
+            raise ValueError(f"The file is compressed with the dictionary {codec[1:]}, which is not provided")
+        return io.BytesIO(dictionaries(codec[1:]).decompress(file.read()))
+
+    _, reader = _codecs[codec]()
+    return io.BufferedReader(reader(file), _CHUNK_SIZE)
+
+
+def _write_header(file: BinaryIO, codec: str) -> None:
+    name = codec.encode("ascii")
+    file.write(_HEADER_MAGIC + bytes([len(name)]) + name)
+
+
+class _Unclosable(io.RawIOBase):
+    """Forwards the writes to the file, without closing it."""
+
+    def __init__(self, file: BinaryIO) -> None:
+        self.__file = file
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: bytes) -> int:
+        self.__file.write(b)
+        with memoryview(b) as view:
+            return view.nbytes
+
+
+class _AutoWriter(io.RawIOBase):
+    """
+    Buffers the first `AUTO_SAMPLE_SIZE` bytes, and then decides whether to compress them, and the rest of the data,
+    by how well the sample compresses with a fast zlib level.
+    """
+
+    def __init__(self, file: BinaryIO, codec: str) -> None:
+        self.__file = file
+        self.__codec = codec
+        self.__sample = bytearray()
+        self.__writer: BinaryIO = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: bytes) -> int:
+        if self.__writer is None:
+            with memoryview(b) as view, view.cast("B") as data:
+                needed = AUTO_SAMPLE_SIZE - len(self.__sample)
+                self.__sample += data[:needed]
+
+                if len(self.__sample) < AUTO_SAMPLE_SIZE:
+                    return len(data)
+
+                self.__decide()
+                self.__writer.write(data[needed:])
+                return len(data)
+
+        self.__writer.write(b)
+        with memoryview(b) as view:
+            return view.nbytes
+
+    def close(self) -> None:
+        if not self.closed:
+            if self.__writer is None:
+                self.__decide()
+            self.__writer.close()
+        super().close()
+
+    def __decide(self) -> None:
+        compressed_size = len(zlib.compress(self.__sample, 1))
+        codec = self.__codec if compressed_size <= AUTO_MAX_RATIO * len(self.__sample) else "none"
+
+        self.__writer = open_writer(self.__file, codec)
+        self.__writer.write(self.__sample)
+        self.__sample = None
+
+
+class _DictionaryWriter(io.RawIOBase):
+    """
+    Buffers the data until it exceeds `max_size` bytes. If it never does, the data is compressed with the dictionary
+    when closed, otherwise it is written with the codec.
+    """
+
+    def __init__(self, file: BinaryIO, codec: str, dictionary: Any, max_size: int) -> None:
+        self.__file = file
+        self.__codec = codec
+        self.__dictionary = dictionary
+        self.__max_size = max_size
+        self.__buffer = bytearray()
+        self.__writer: BinaryIO = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: bytes) -> int:
+        if self.__writer is None:
+            with memoryview(b) as view, view.cast("B") as data:
+                self.__buffer += data
+                if len(self.__buffer) > self.__max_size:
+                    self.__writer = open_writer(self.__file, self.__codec)
+                    self.__writer.write(self.__buffer)
+                    self.__buffer = None
+                return len(data)
+
+        self.__writer.write(b)
+        with memoryview(b) as view:
+            return view.nbytes
+
+    def close(self) -> None:
+        if not self.closed:
+            if self.__writer is None:
+                _write_header(self.__file, _DICTIONARY_PREFIX + self.__dictionary.id)
+                self.__file.write(self.__dictionary.compress(bytes(self.__buffer)))
+            else:
+                self.__writer.close()
+        super().close()
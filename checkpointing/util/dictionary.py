@@ -0,0 +1,180 @@
+"""
+Shared compression dictionaries for small data.
+
+Compressing a small file on its own barely helps, as there is little repetition within it.
+Many small files with a similar structure, e.g. pickles of the same kind of result, compress much better
+with a dictionary built from samples of them, which the compressor refers to instead of the file itself.
+
+zstd dictionaries are trained by `zstandard` if it is installed, otherwise the dictionary is raw sample content,
+used as the `zdict` of zlib.
+"""
+
+import hashlib
+import os
+import pathlib
+import re
+import zlib
+from typing import Dict, Sequence, Tuple
+
+from checkpointing.util.atomic import atomic_write
+from checkpointing.util.compression import available_codecs
+
+_ID_PATTERN = re.compile(r"^(zlib|zstd)-[0-9a-f]{16}$")
+
+
+class CompressionDictionary:
+    """A compression dictionary of a codec, identified by the codec and the digest of its content."""
+
+    def __init__(self, codec: str, data: bytes) -> None:
+        """
+        Args:
+            codec: `"zlib"` or `"zstd"`
+            data: content of the dictionary
+        """
+
+        if codec not in ["zlib", "zstd"]:
+            raise ValueError(f"Invalid argument value for codec: {codec}, must be one of ['zlib', 'zstd']")
+
+        self.codec = codec
+        self.data = data
+        self.id = f"{codec}-{hashlib.md5(data).hexdigest()[:16]}"
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor(dict_data=zstandard.ZstdCompressionDict(self.data)).compress(data)
+
+        compressor = zlib.compressobj(9, zdict=self.data)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            import zstandard
+
+            return zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(self.data)).decompress(data)
+
+        decompressor = zlib.decompressobj(zdict=self.data)
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.id!r})"
+
+
+def train_dictionary(samples: Sequence[bytes], size: int, codec: str = None) -> CompressionDictionary:
+    """
+    Args:
+        samples: the data similar to what will be compressed with the dictionary
+        size: max size of the dictionary in bytes. zlib only refers to the last 32 KiB.
+        codec: `"zlib"` or `"zstd"`. If None, `"zstd"` if it is available, otherwise `"zlib"`
+
+    Returns:
+        The trained dictionary
+    """
+
+    if not samples:
+        raise ValueError("At least one sample is required to train a dictionary")
+
+    if codec is None:
+        codec = "zstd" if "zstd" in available_codecs() else "zlib"
+
+    if codec == "zstd":
+        import zstandard
+
+        try:
+            return CompressionDictionary(codec, zstandard.train_dictionary(size, list(samples)).as_bytes())
+        except zstandard.ZstdError:  # Too few samples to train, use the raw content instead
+            pass
+
+    return CompressionDictionary(codec, _raw_content(samples, size))
+
+
+def _raw_content(samples: Sequence[bytes], size: int) -> bytes:
+    # The compressors refer to the end of the dictionary most cheaply, so the first samples are put last
+    content = bytearray()
+    for sample in samples:
+        if len(content) + len(sample) > size:
+            break
+        content[:0] = sample
+
+    return bytes(content or samples[0][-size:])
+
+
+class DictionaryStore:
+    """
+    Versioned dictionaries in a directory. Each dictionary is saved as a file named after its id,
+    and the `current` file records the id of the one used to compress new data.
+    The previous dictionaries are kept, so the data compressed with them can still be decompressed.
+    """
+
+    def __init__(self, directory: os.PathLike, max_entry_size: int = 0) -> None:
+        """
+        Args:
+            directory: the directory of the dictionaries, created when a dictionary is added
+            max_entry_size: data of at most this many bytes should be compressed with the current dictionary.
+                            0 disables compressing new data with a dictionary.
+        """
+
+        self.__directory = pathlib.Path(directory)
+        self.max_entry_size = max_entry_size
+        self.__loaded: Dict[str, CompressionDictionary] = {}
+        self.__current: Tuple[Tuple[int, int], CompressionDictionary] = (None, None)
+
+    @property
+    def directory(self) -> pathlib.Path:
+        return self.__directory
+
+    def get(self, id: str) -> CompressionDictionary:
+        """
+        Returns:
+            The dictionary with the id, loaded from its file once
+        """
+
+        if id not in self.__loaded:
+            if not _ID_PATTERN.match(id):
+                raise ValueError(f"Invalid dictionary id: {id}")
+
+            data = self.__directory.joinpath(f"{id}.dict").read_bytes()
+            self.__loaded[id] = CompressionDictionary(id.split("-")[0], data)
+
+        return self.__loaded[id]
+
+    def current(self) -> CompressionDictionary:
+        """
+        Returns:
+            The dictionary to compress new data with, or None if there is none or `max_entry_size` is 0.
+            It is reloaded when another process or store replaces the `current` file.
+        """
+
+        if not self.max_entry_size:
+            return None
+
+        path = self.__directory.joinpath("current")
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        version, dictionary = self.__current
+        if version != (stat.st_ino, stat.st_mtime_ns):
+            dictionary = self.get(path.read_text().strip())
+            self.__current = ((stat.st_ino, stat.st_mtime_ns), dictionary)
+
+        return dictionary
+
+    def add(self, dictionary: CompressionDictionary) -> None:
+        """
+        Save the dictionary, and make it the current one.
+        """
+
+        self.__directory.mkdir(parents=True, exist_ok=True)
+
+        path = self.__directory.joinpath(f"{dictionary.id}.dict")
+        if not path.exists():
+            with atomic_write(path) as file:
+                file.write(dictionary.data)
+
+        with atomic_write(self.__directory.joinpath("current")) as file:
+            file.write(dictionary.id.encode("ascii"))
+
+        self.__loaded[dictionary.id] = dictionary
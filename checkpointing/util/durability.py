@@ -0,0 +1,164 @@
+"""
+Utilities for making written files durable, i.e. surviving an OS crash or a power loss.
+"""
+
+import atexit
+import os
+import pathlib
+import threading
+import time
+import weakref
+from typing import List
+
+from checkpointing.config import defaults
+from checkpointing.logging import logger
+
+DURABILITY_LEVELS = ["none", "fsync", "group"]
+"""
+- `"none"`: the files are flushed to the OS, and written to the disk whenever the OS decides to.
+- `"fsync"`: each file and its directory are fsynced before saving returns.
+- `"group"`: the files and their directories are fsynced in batches by a background flusher, see `GroupCommitter`.
+"""
+
+
+def fsync_path(path: os.PathLike) -> None:
+    """
+    Fsync a file or a directory. Directories can't be fsynced on Windows, in which case this does nothing.
+    """
+
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    except (PermissionError, IsADirectoryError):  # Directory on Windows
+        return
+
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GroupCommitter:
+    """
+    Background flusher that fsyncs the files, and then their directories, saved within a time window
+    or until a number of files are pending, whichever comes first. Each directory is fsynced once per batch.
+
+    The files saved after the last batch could be lost, or on some filesystems found empty, after a crash.
+    """
+
+    def __init__(self, interval: float = None, max_pending: int = None) -> None:
+        """
+        Args:
+            interval: max seconds a file waits before being fsynced.
+                      If None, use the global default `cache.filesystem.group_commit.interval`
+            max_pending: the number of pending files that triggers a batch immediately.
+                         If None, use the global default `cache.filesystem.group_commit.max_pending`
+        """
+
+        self.__interval = interval
+        self.__max_pending = max_pending
+        self.__reset()
+
+        if hasattr(os, "register_at_fork"):
+            _reset_after_fork(weakref.WeakMethod(self.__reset))
+
+    def __reset(self) -> None:
+        # The thread does not survive a fork, and the pending paths belong to the parent process
+        self.__pending: List[pathlib.Path] = []
+        self.__condition = threading.Condition()
+        # Held while a batch is committed, acquired with the condition held when the batch is taken,
+        # so that a flush waits for the batches taken before it
+        self.__commit_lock = threading.Lock()
+        self.__thread: threading.Thread = None
+
+    @property
+    def interval(self) -> float:
+        return self.__interval if self.__interval is not None else defaults["cache.filesystem.group_commit.interval"]
+
+    @property
+    def max_pending(self) -> int:
+        return self.__max_pending if self.__max_pending is not None else defaults["cache.filesystem.group_commit.max_pending"]
+
+    def add(self, path: pathlib.Path) -> None:
+        """
+        Schedule the file and its directory to be fsynced.
+        """
+
+        with self.__condition:
+            self.__ensure_started()
+            self.__pending.append(path)
+
+            if len(self.__pending) >= self.max_pending:
+                self.__condition.notify()
+
+    def flush(self) -> None:
+        """
+        Fsync all the pending files and directories before returning,
+        including the ones in a batch being committed in the background.
+        """
+
+        with self.__condition:
+            batch, self.__pending = self.__pending, []
+            self.__commit_lock.acquire()
+
+        try:
+            self.__commit(batch)
+        finally:
+            self.__commit_lock.release()
+
+    def __ensure_started(self) -> None:
+        if self.__thread is not None:
+            return
+
+        self.__thread = threading.Thread(target=self.__run, name="checkpointing-group-commit", daemon=True)
+        self.__thread.start()
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                while not self.__pending:
+                    self.__condition.wait()
+
+                deadline = time.monotonic() + self.interval
+                while len(self.__pending) < self.max_pending and time.monotonic() < deadline:
+                    self.__condition.wait(deadline - time.monotonic())
+
+                batch, self.__pending = self.__pending, []
+                self.__commit_lock.acquire()
+
+            try:
+                self.__commit(batch)
+            finally:
+                self.__commit_lock.release()
+
+    def __commit(self, batch: List[pathlib.Path]) -> None:
+        directories = set()
+
+        for path in batch:
+            try:
+                fsync_path(path)
+                directories.add(path.parent)
+            except FileNotFoundError:  # Replaced or removed in the meantime
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to fsync {path}: {e!r}")
+
+        for directory in directories:
+            try:
+                fsync_path(directory)
+            except OSError as e:
+                logger.warning(f"Failed to fsync {directory}: {e!r}")
+
+
+def _reset_after_fork(reset: weakref.WeakMethod) -> None:
+    def after_in_child():
+        method = reset()
+        if method is not None:
+            method()
+
+    os.register_at_fork(after_in_child=after_in_child)
+
+
+group_committer = GroupCommitter()
+"""Package-wise group committer, its pending files are flushed at exit."""
+
+atexit.register(group_committer.flush)
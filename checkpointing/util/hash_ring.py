@@ -0,0 +1,96 @@
+"""
+A consistent hash ring, which maps the keys to the nodes so that adding or removing a node
+only remaps the keys of that node, about 1/n of them.
+
+Each node is placed at `virtual_nodes * weight` points of the ring, and a key belongs to the node of the first point
+at or after the hash of the key, wrapping around. The more points, the more even the distribution.
+
+>>> ring = HashRing(["a", "b", "c"])
+>>> ring.get("key") in ["a", "b", "c"]
+True
+>>> before = {str(i): ring.get(str(i)) for i in range(1000)}
+>>> kept = [key for key, node in before.items() if node != "a"]
+>>> ring.remove("a")
+>>> all(ring.get(key) == before[key] for key in kept)
+True
+"""
+
+from typing import Dict, Iterable, List, Tuple
+import bisect
+import hashlib
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class HashRing:
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 128) -> None:
+        """
+        Args:
+            nodes: the names of the nodes, with the weight 1
+            virtual_nodes: the number of points of a node of weight 1
+        """
+
+        self.__virtual_nodes = virtual_nodes
+        self.__weights: Dict[str, float] = {}
+        self.__points: List[Tuple[int, str]] = []
+        self.__hashes: List[int] = []
+
+        for node in nodes:
+            self.add(node)
+
+    def __build(self) -> None:
+        self.__points = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node, weight in self.__weights.items()
+            for i in range(max(1, round(self.__virtual_nodes * weight)))
+        )
+        self.__hashes = [point for point, _ in self.__points]
+
+    def add(self, node: str, weight: float = 1.0) -> None:
+        """
+        Add a node, or change its weight, e.g. proportional to the capacity of a disk.
+        """
+
+        if weight <= 0:
+            raise ValueError(f"Invalid weight {weight} of {node}")
+
+        self.__weights[node] = weight
+        self.__build()
+
+    def remove(self, node: str) -> None:
+        del self.__weights[node]
+        self.__build()
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self.__weights)
+
+    def weight(self, node: str) -> float:
+        return self.__weights[node]
+
+    def __len__(self) -> int:
+        return len(self.__weights)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self.__weights
+
+    def get(self, key: str) -> str:
+        """
+        Returns:
+            The node the key belongs to
+        """
+
+        if not self.__points:
+            raise LookupError("The hash ring has no node")
+
+        i = bisect.bisect_left(self.__hashes, _hash(key))
+        return self.__points[i % len(self.__points)][1]
+
+    def copy(self) -> "HashRing":
+        ring = HashRing(virtual_nodes=self.__virtual_nodes)
+        ring.__weights = dict(self.__weights)
+        ring.__points = list(self.__points)
+        ring.__hashes = list(self.__hashes)
+        return ring
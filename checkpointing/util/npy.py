@@ -0,0 +1,135 @@
+"""
+Storage of numpy arrays, or tuples, lists and dicts of numpy arrays, in the `.npy` format.
+
+A single array is stored as a plain `.npy` file, readable by `numpy.load`.
+A container of arrays is stored as a small header describing the container, followed by one `.npy` record per array.
+"""
+
+from io import IOBase, UnsupportedOperation
+import json
+import struct
+import sys
+from typing import Any
+
+_CONTAINER_MAGIC = b"\x00ckpt-npy"
+
+
+def is_array_result(obj: Any) -> bool:
+    """
+    Returns:
+        Whether the object is a numpy array, or a non-empty tuple, list or dict (with string keys) of numpy arrays,
+        whose dtype do not contain python objects. Subclasses of `numpy.ndarray` are not considered.
+    """
+
+    np = sys.modules.get("numpy")
+    if np is None:  # Not imported, so obj can't be an array
+        return False
+
+    def is_array(x):
+        return type(x) is np.ndarray and not x.dtype.hasobject
+
+    if type(obj) in (tuple, list):
+        return len(obj) > 0 and all(is_array(x) for x in obj)
+
+    if type(obj) is dict:
+        return len(obj) > 0 and all(type(k) is str and is_array(v) for k, v in obj.items())
+
+    return is_array(obj)
+
+
+def dump(obj: Any, file: IOBase) -> None:
+    """
+    Args:
+        obj: the array or container of arrays, see `is_array_result`
+        file: a binary file
+    """
+
+    from numpy.lib import format
+
+    if type(obj) in (tuple, list, dict):
+        header = {"type": type(obj).__name__}
+        if type(obj) is dict:
+            header["keys"] = list(obj.keys())
+            arrays = list(obj.values())
+        else:
+            arrays = obj
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        file.write(_CONTAINER_MAGIC)
+        file.write(struct.pack("<I", len(header_bytes)))
+        file.write(header_bytes)
+    else:
+        arrays = [obj]
+
+    for arr in arrays:
+        format.write_array(file, arr, allow_pickle=False)
+
+
+def load(file: IOBase, mmap_mode: str = None) -> Any:
+    """
+    Args:
+        file: a binary file written by `dump`
+        mmap_mode: if None, the arrays are read into preallocated arrays.
+                   Otherwise, they are memory mapped with this mode (see `numpy.memmap`), e.g. `"r"` for read-only,
+                   as long as the file has a `fileno`.
+
+    Returns:
+        The array or the container of arrays
+    """
+
+    magic = file.read(len(_CONTAINER_MAGIC))
+    file.seek(-len(magic), 1)
+
+    if magic != _CONTAINER_MAGIC:
+        return _read_array(file, mmap_mode)
+
+    file.seek(len(_CONTAINER_MAGIC), 1)
+    (length,) = struct.unpack("<I", file.read(4))
+    header = json.loads(file.read(length).decode("utf-8"))
+
+    if header["type"] == "dict":
+        return {key: _read_array(file, mmap_mode) for key in header["keys"]}
+
+    arrays = []
+    while file.read(1):
+        file.seek(-1, 1)
+        arrays.append(_read_array(file, mmap_mode))
+
+    return tuple(arrays) if header["type"] == "tuple" else arrays
+
+
+def _read_array(file: IOBase, mmap_mode: str) -> Any:
+    import numpy as np
+    from numpy.lib import format
+
+    version = format.read_magic(file)
+    if version == (1, 0):
+        shape, fortran_order, dtype = format.read_array_header_1_0(file)
+    else:
+        shape, fortran_order, dtype = format.read_array_header_2_0(file)
+
+    order = "F" if fortran_order else "C"
+    offset = file.tell()
+    nbytes = dtype.itemsize
+    for dim in shape:
+        nbytes *= dim
+
+    if mmap_mode is not None and nbytes > 0:
+        try:
+            arr = np.memmap(file, dtype=dtype, mode=mmap_mode, offset=offset, shape=shape, order=order)
+            file.seek(offset + nbytes)
+            return arr
+        except (AttributeError, UnsupportedOperation):  # No fileno
+            pass
+
+    arr = np.empty(shape, dtype=dtype, order=order)
+    view = memoryview(arr.reshape(-1, order="A").view(np.uint8))
+
+    filled = 0
+    while filled < nbytes:
+        n = file.readinto(view[filled:])
+        if not n:
+            raise EOFError("The .npy file is truncated")
+        filled += n
+
+    return arr
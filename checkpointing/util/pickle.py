@@ -1,11 +1,182 @@
-from io import IOBase
+from io import IOBase, UnsupportedOperation
+import mmap
+import os
 import pickle
-from typing import Any
+import struct
+from typing import Any, List
 
+from checkpointing.util import compression
+from checkpointing.util.dictionary import DictionaryStore
 
-def dump(obj: Any, file: IOBase, protocol: int) -> None:
-    return pickle.dump(obj, file, protocol)
+_TRAILER_MAGIC = b"\x00ckpt-oob"
+"""Ends a file in which large buffers are stored out-of-band after the pickle stream"""
 
+_BUFFER_ALIGNMENT = 4096
+"""Out-of-band buffers start at page boundaries, so that they are paged in independently"""
 
-def load(file: IOBase, protocol: int) -> Any:
-    return pickle.load(file)
+
+def dump(
+    obj: Any,
+    file: IOBase,
+    protocol: int,
+    buffer_threshold: int = None,
+    codec: str = "none",
+    dictionaries: DictionaryStore = None,
+) -> None:
+    """
+    Args:
+        obj: the object to pickle
+        file: a seekable binary file
+        protocol: the pickle protocol
+        buffer_threshold: if not None and the protocol supports out-of-band data (5 or higher),
+                          the contiguous buffers (e.g. data of numpy arrays) of at least this many bytes are written raw
+                          after the pickle stream, so that `load` can memory map them instead of copying.
+                          If there is no such buffer, the file is a plain pickle stream.
+        codec: the compression codec, see `checkpointing.util.compression`.
+               All buffers are pickled in-band and compressed if it is not `"none"`.
+        dictionaries: if not None and it has a current dictionary, the pickle stream is compressed with the dictionary
+                      if it is at most `dictionaries.max_entry_size` bytes, in which case all buffers are pickled in-band.
+                      The larger objects are written as without the dictionary, keeping their large buffers out-of-band.
+    """
+
+    dictionary = dictionaries.current() if dictionaries is not None else None
+
+    if codec != "none":
+        max_size = dictionaries.max_entry_size if dictionary is not None else 0
+        with compression.open_writer(file, codec, dictionary, max_size) as stream:
+            return pickle.dump(obj, stream, protocol)
+
+    if dictionary is not None:
+        # Only the small entries use the dictionary, the large ones keep their buffers out-of-band
+        data = _dumps_at_most(obj, protocol, dictionaries.max_entry_size)
+        if data is not None:
+            with compression.open_writer(file, codec, dictionary, dictionaries.max_entry_size) as stream:
+                stream.write(data)
+            return
+
+    if buffer_threshold is None or protocol < 5:
+        return pickle.dump(obj, file, protocol)
+
+    buffers: List[memoryview] = []
+
+    def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+        try:
+            raw = buffer.raw()
+        except BufferError:  # Not contiguous
+            return True
+
+        if raw.nbytes < buffer_threshold:
+            return True
+
+        buffers.append(raw)
+        return False
+
+    pickle.dump(obj, file, protocol, buffer_callback=buffer_callback)
+
+    if not buffers:
+        return
+
+    table = []
+    for raw in buffers:
+        padding = -file.tell() % _BUFFER_ALIGNMENT
+        file.write(b"\x00" * padding)
+        table.extend([file.tell(), raw.nbytes])
+        file.write(raw)
+
+    file.write(struct.pack(f"<{len(table)}Q", *table))
+    file.write(struct.pack("<Q", len(buffers)))
+    file.write(_TRAILER_MAGIC)
+
+
+class _TooLarge(Exception):
+    pass
+
+
+class _BoundedBuffer:
+    def __init__(self, max_size: int) -> None:
+        self.data = bytearray()
+        self.__max_size = max_size
+
+    def write(self, b) -> int:
+        with memoryview(b) as view:
+            if len(self.data) + view.nbytes > self.__max_size:
+                raise _TooLarge
+            self.data += view
+            return view.nbytes
+
+
+def _dumps_at_most(obj: Any, protocol: int, max_size: int) -> bytes:
+    """
+    Returns:
+        The pickle stream of the object, or None if it is larger than `max_size` bytes,
+        which is known after pickling at most that many bytes
+    """
+
+    buffer = _BoundedBuffer(max_size)
+    try:
+        pickle.dump(obj, buffer, protocol)
+    except _TooLarge:
+        return None
+
+    return bytes(buffer.data)
+
+
+def load(file: IOBase, protocol: int, dictionaries: DictionaryStore = None) -> Any:
+    """
+    Load an object written by `dump`. Out-of-band buffers are memory mapped copy-on-write if the file has a `fileno`,
+    so they are paged in lazily, and modifying the loaded object does not change the file.
+
+    `dictionaries` is required to load the objects compressed with a dictionary.
+    """
+
+    stream = compression.open_reader(file, dictionaries.get if dictionaries is not None else None)
+    if stream is not file:
+        return pickle.load(stream)
+
+    buffers = _load_out_of_band_buffers(file)
+    if buffers is None:
+        return pickle.load(file)
+
+    return pickle.load(file, buffers=buffers)
+
+
+def _load_out_of_band_buffers(file: IOBase) -> List[memoryview]:
+    """
+    Returns:
+        The out-of-band buffers listed in the trailer of the file, or None if the file is a plain pickle stream.
+        The file position is restored.
+    """
+
+    start = file.tell()
+    trailer_size = len(_TRAILER_MAGIC) + 8
+
+    end = file.seek(0, os.SEEK_END)
+    if end - start < trailer_size:
+        file.seek(start)
+        return None
+
+    file.seek(end - trailer_size)
+    trailer = file.read(trailer_size)
+    if trailer[8:] != _TRAILER_MAGIC:
+        file.seek(start)
+        return None
+
+    (n,) = struct.unpack("<Q", trailer[:8])
+    file.seek(end - trailer_size - 16 * n)
+    table = struct.unpack(f"<{2 * n}Q", file.read(16 * n))
+
+    try:
+        data = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY))
+    except (AttributeError, UnsupportedOperation):
+        data = None
+
+    buffers = []
+    for offset, length in zip(table[::2], table[1::2]):
+        if data is not None:
+            buffers.append(data[offset : offset + length])
+        else:
+            file.seek(offset)
+            buffers.append(memoryview(file.read(length)))
+
+    file.seek(start)
+    return buffers
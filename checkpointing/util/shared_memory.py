@@ -0,0 +1,167 @@
+"""
+Storing pickled objects in shared memory segments, so that the buffers of the objects, e.g. numpy arrays,
+can be mapped zero-copy by any process on the host.
+
+An object is pickled with protocol 5, and the pickle data and each out-of-band buffer are laid out in one segment:
+a header of the offsets and lengths, then the pickle data, then the buffers, each aligned to 64 bytes.
+Loading an object unpickles the data with read-only views of the buffers, so the arrays are backed by the segment.
+
+The segments are not tracked by `multiprocessing.resource_tracker`, which would otherwise unlink them
+when the process that created them exits. They must be unlinked explicitly.
+This requires POSIX shared memory, on Windows a segment is destroyed when the last process closes it.
+
+A segment is mapped read-only by `map_segment`, and the mapping is kept alive by the objects loaded from it,
+so it is unmapped when the last of them is garbage collected.
+
+```python
+size = write_segment("ckpt_example", {"array": np.arange(10)})
+result = load_segment(map_segment("ckpt_example"))  # The array is a view of the segment
+unlink_segment("ckpt_example")
+```
+"""
+
+from multiprocessing import shared_memory
+from typing import Any, List, Sequence, Tuple
+import mmap
+import os
+import pickle
+import struct
+
+_MAGIC = b"CKSM"
+_HEADER = struct.Struct("<4sI")
+_SPAN = struct.Struct("<QQ")
+_ALIGNMENT = 64
+
+
+def dumps(obj: Any) -> Tuple[bytes, List[pickle.PickleBuffer]]:
+    """
+    Returns:
+        The pickle data of the object, and its out-of-band buffers
+    """
+
+    buffers: List[pickle.PickleBuffer] = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return data, buffers
+
+
+def loads(data: memoryview, buffers: Sequence[memoryview]) -> Any:
+    return pickle.loads(data, buffers=buffers)
+
+
+def _align(n: int) -> int:
+    return (n + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def segment_size(data: bytes, buffers: Sequence[pickle.PickleBuffer]) -> int:
+    """
+    Returns:
+        The size of the segment holding the pickle data and the buffers
+    """
+
+    size = _align(_HEADER.size + _SPAN.size * (1 + len(buffers))) + _align(len(data))
+    for buffer in buffers:
+        size += _align(buffer.raw().nbytes)
+    return size
+
+
+def create(name: str, size: int) -> shared_memory.SharedMemory:
+    """Create a segment, not tracked by the resource tracker."""
+
+    return _untracked(shared_memory.SharedMemory(name, create=True, size=max(size, 1)))
+
+
+def map_segment(name: str) -> mmap.mmap:
+    """
+    Map an existing segment read-only.
+    Raises FileNotFoundError if the segment does not exist.
+
+    Returns:
+        The read-only mapping, which is kept alive by the objects loaded from it
+    """
+
+    import _posixshmem
+
+    fd = _posixshmem.shm_open(name if name.startswith("/") else f"/{name}", os.O_RDONLY, mode=0o600)
+    try:
+        return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+
+
+def _untracked(segment: shared_memory.SharedMemory) -> shared_memory.SharedMemory:
+    # Python < 3.13 has no `track` argument, and registers every segment created or attached
+    from multiprocessing import resource_tracker
+
+    try:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    except Exception:  # pragma: no cover, the tracker is not running
+        pass
+
+    return segment
+
+
+def unlink_segment(name: str) -> None:
+    """
+    Remove a segment by name, if it exists. The processes that mapped it keep their mappings.
+    """
+
+    import _posixshmem
+
+    try:
+        _posixshmem.shm_unlink(name if name.startswith("/") else f"/{name}")
+    except FileNotFoundError:
+        pass
+
+
+def write(segment: shared_memory.SharedMemory, data: bytes, buffers: Sequence[pickle.PickleBuffer]) -> None:
+    """Lay out the pickle data and the buffers in a segment of at least `segment_size` bytes."""
+
+    raws = [memoryview(data)] + [buffer.raw() for buffer in buffers]
+    offset = _align(_HEADER.size + _SPAN.size * len(raws))
+
+    _HEADER.pack_into(segment.buf, 0, _MAGIC, len(raws))
+    for i, raw in enumerate(raws):
+        _SPAN.pack_into(segment.buf, _HEADER.size + _SPAN.size * i, offset, raw.nbytes)
+        segment.buf[offset : offset + raw.nbytes] = raw
+        offset += _align(raw.nbytes)
+
+
+def write_segment(name: str, obj: Any) -> int:
+    """
+    Pickle the object into a new segment.
+
+    Returns:
+        The size of the segment, which must be unlinked when the object is no longer cached
+    """
+
+    data, buffers = dumps(obj)
+    size = segment_size(data, buffers)
+    segment = create(name, size)
+    try:
+        write(segment, data, buffers)
+    except BaseException:
+        unlink_segment(name)
+        raise
+    finally:
+        segment.close()
+
+    return size
+
+
+def load_segment(mapping: mmap.mmap) -> Any:
+    """
+    Unpickle the object in a mapped segment. Its buffers are read-only views of the segment,
+    which keep the segment mapped while the object is alive.
+    """
+
+    view = memoryview(mapping)
+    magic, count = _HEADER.unpack_from(view, 0)
+    if magic != _MAGIC:
+        raise ValueError("The shared memory segment is not a pickled object")
+
+    views = []
+    for i in range(count):
+        offset, length = _SPAN.unpack_from(view, _HEADER.size + _SPAN.size * i)
+        views.append(view[offset : offset + length])
+
+    return loads(views[0], views[1:])
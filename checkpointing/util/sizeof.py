@@ -0,0 +1,118 @@
+"""
+Estimating the memory used by objects, e.g. to bound the size of an in-memory cache by bytes.
+
+The size of an object is estimated by the estimator registered for its type, if any,
+otherwise by `sys.getsizeof` of the object, recursively adding the elements of containers and the attributes of objects.
+Each object is counted once, even if it is referenced many times.
+
+>>> class Blob:
+...     def __init__(self, n):
+...         self.n = n
+>>>
+>>> register_sizeof(Blob, lambda blob: blob.n)
+>>> sizeof([Blob(1000), Blob(2000)]) > 3000
+True
+"""
+
+import sys
+from typing import Any, Callable, Dict, Optional, Set, Union
+
+SizeEstimator = Callable[[Any], int]
+
+_estimators: Dict[Union[type, str], SizeEstimator] = {}
+"""Registered estimators, keyed by the type, or the full qualified name of the type"""
+
+_resolved: Dict[type, Optional[SizeEstimator]] = {}
+"""Cache of the estimator found for each type"""
+
+
+def register_sizeof(type_: Union[type, str], estimator: SizeEstimator) -> None:
+    """
+    Register a size estimator for objects whose type is exactly `type_`.
+
+    Args:
+        type_: the type, or its full qualified name, e.g. `"numpy.ndarray"`.
+               Registering by name does not require the module to be imported.
+        estimator: returns the size of an object in bytes, including the objects it references
+    """
+
+    _estimators[type_] = estimator
+    _resolved.clear()
+
+
+def get_sizeof(type_: type) -> Optional[SizeEstimator]:
+    """
+    Returns:
+        The estimator registered for the type, or None if there isn't one
+    """
+
+    try:
+        return _resolved[type_]
+    except KeyError:
+        pass
+
+    estimator = _estimators.get(type_)
+    if estimator is None:
+        estimator = _estimators.get(f"{type_.__module__}.{type_.__qualname__}")
+
+    _resolved[type_] = estimator
+    return estimator
+
+
+def sizeof(obj: Any) -> int:
+    """
+    Returns:
+        The estimated number of bytes used by the object and the objects it references
+    """
+
+    return _sizeof(obj, set())
+
+
+def _sizeof(obj: Any, seen: Set[int]) -> int:
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    estimator = get_sizeof(type(obj))
+    if estimator is not None:
+        return estimator(obj)
+
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, (str, bytes, bytearray, int, float, complex, bool, type(None))):
+        return size
+
+    if isinstance(obj, dict):
+        size += sum(_sizeof(k, seen) + _sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_sizeof(item, seen) for item in obj)
+
+    if hasattr(obj, "__dict__"):
+        size += _sizeof(vars(obj), seen)
+
+    for slot in getattr(type(obj), "__slots__", ()):
+        if isinstance(slot, str) and hasattr(obj, slot):
+            size += _sizeof(getattr(obj, slot), seen)
+
+    return size
+
+
+def sizeof_numpy_array(arr: Any) -> int:
+    """The bytes of the array data, which dominate the size of the array object."""
+
+    return arr.nbytes
+
+
+def sizeof_pandas_object(obj: Any) -> int:
+    """The memory usage of the columns and the index, including the Python objects referenced by `object` columns."""
+
+    usage = obj.memory_usage(deep=True)
+    return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+
+
+for _name in ["numpy.ndarray", "numpy.memmap"]:
+    register_sizeof(_name, sizeof_numpy_array)
+
+# pandas >= 3 reports the public module as `__module__`
+for _name in ["pandas.DataFrame", "pandas.Series", "pandas.core.frame.DataFrame", "pandas.core.series.Series"]:
+    register_sizeof(_name, sizeof_pandas_object)
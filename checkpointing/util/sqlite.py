@@ -0,0 +1,60 @@
+"""
+Utilities for sharing an SQLite database between threads and processes.
+"""
+
+import os
+import pathlib
+import sqlite3
+import threading
+from typing import Callable
+
+
+class ConnectionPerThread:
+    """
+    Opens one connection to the database per thread, as an `sqlite3.Connection` should not be shared between threads,
+    and reopens them in a forked child process. It is picklable, the connections are reopened after unpickling.
+
+    The database is in the WAL mode, so that readers do not block the writer, and other processes can read concurrently.
+    """
+
+    def __init__(self, path: os.PathLike, initialize: Callable[[sqlite3.Connection], None] = None) -> None:
+        """
+        Args:
+            path: the database file, created if it does not exist
+            initialize: called with each new connection, e.g. to create the tables
+        """
+
+        self.__path = pathlib.Path(path)
+        self.__initialize = initialize
+        self.__local = threading.local()
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self.__path
+
+    def get(self) -> sqlite3.Connection:
+        """
+        Returns:
+            The connection of the current thread
+        """
+
+        local = self.__local
+        if getattr(local, "pid", None) != os.getpid():
+            # isolation_level=None leaves the transactions to the callers, each statement commits on its own otherwise
+            connection = sqlite3.connect(self.__path, timeout=60, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+            if self.__initialize is not None:
+                self.__initialize(connection)
+
+            local.connection = connection
+            local.pid = os.getpid()
+
+        return local.connection
+
+    def __getstate__(self):
+        return {"path": self.__path, "initialize": self.__initialize}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["initialize"])
@@ -0,0 +1,128 @@
+from checkpointing.cache import BloomFilterCache, InMemoryCache
+from checkpointing.exceptions import CheckpointNotExist
+from tests.testutils import tmpdir, rmdir_before, rmdir_after, mkdir_func
+from pytest import raises
+import pickle
+import threading
+import time
+
+
+class _CountingCache(InMemoryCache):
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+
+    def retrieve(self, context_id):
+        self.lookups += 1
+        return super().retrieve(context_id)
+
+
+def test_miss_skips_cache():
+    backend = _CountingCache()
+    cache = BloomFilterCache(backend, capacity=1000)
+    cache.save("a", 1)
+
+    assert cache.retrieve("a") == 1
+    for i in range(100):
+        with raises(CheckpointNotExist):
+            cache.retrieve(f"missing{i}")
+    assert backend.lookups <= 3
+
+
+def test_unknown_results_are_misses():
+    backend = _CountingCache()
+    backend.save("a", 1)
+    cache = BloomFilterCache(backend, capacity=1000)
+
+    with raises(CheckpointNotExist):
+        cache.retrieve("a")
+
+    cache.add(["a"])
+    assert cache.retrieve("a") == 1
+
+
+def test_persisted(rmdir_before, rmdir_after):
+    mkdir_func()
+    path = tmpdir.joinpath("ids.bloom")
+
+    backend = InMemoryCache()
+    cache = BloomFilterCache(backend, path, capacity=1000, flush_every=2)
+    cache.save("a", 1)
+    assert not path.exists()
+    cache.save("b", 2)
+    assert path.exists()
+    cache.save("c", 3)
+
+    # Another process sharing the cache, which sees the flushed context ids
+    other = BloomFilterCache(backend, path, flush_every=100)
+    assert other.retrieve("a") == 1
+    with raises(CheckpointNotExist):
+        other.retrieve("c")
+
+    other.save("d", 4)
+    other.flush()
+    cache.flush()
+    assert BloomFilterCache(backend, path).retrieve("c") == 3
+    assert BloomFilterCache(backend, path).retrieve("d") == 4
+
+
+def test_invalid_file(rmdir_before, rmdir_after):
+    mkdir_func()
+    path = tmpdir.joinpath("ids.bloom")
+    path.write_bytes(b"invalid")
+
+    cache = BloomFilterCache(InMemoryCache(), path, capacity=1000, flush_every=1)
+    cache.save("a", 1)
+    assert cache.retrieve("a") == 1
+    assert "a" in BloomFilterCache(InMemoryCache(), path).bloom
+
+
+def test_clear(rmdir_before, rmdir_after):
+    mkdir_func()
+    path = tmpdir.joinpath("ids.bloom")
+
+    cache = BloomFilterCache(InMemoryCache(), path, capacity=1000)
+    cache.save("a", 1)
+    cache.clear()
+
+    with raises(CheckpointNotExist):
+        cache.retrieve("a")
+    assert "a" not in BloomFilterCache(InMemoryCache(), path).bloom
+
+
+def test_pickle(rmdir_before, rmdir_after):
+    mkdir_func()
+    cache = BloomFilterCache(InMemoryCache(), tmpdir.joinpath("ids.bloom"), capacity=1000)
+    cache.save("a", 1)
+
+    loaded = pickle.loads(pickle.dumps(cache))
+    assert loaded.retrieve("a") == 1
+    loaded.save("b", 2)
+    loaded.flush()
+    assert "b" in BloomFilterCache(InMemoryCache(), tmpdir.joinpath("ids.bloom")).bloom
+
+
+def test_concurrent_flushes_keep_both_saves(rmdir_before, rmdir_after, monkeypatch):
+    path = tmpdir.joinpath("checkpoints.bloom")
+    first = BloomFilterCache(InMemoryCache(), path, flush_every=100)
+    second = BloomFilterCache(InMemoryCache(), path, flush_every=100)
+    first.save("a", 1)
+    second.save("b", 2)
+
+    # Both flushes would load the persisted filter before either replaces it
+    write = BloomFilterCache._BloomFilterCache__write
+
+    def slow_write(self):
+        time.sleep(0.2)
+        write(self)
+
+    monkeypatch.setattr(BloomFilterCache, "_BloomFilterCache__write", slow_write)
+
+    threads = [threading.Thread(target=cache.flush) for cache in (first, second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    persisted = BloomFilterCache(InMemoryCache(), path).bloom
+    assert "a" in persisted and "b" in persisted
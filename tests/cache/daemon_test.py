@@ -0,0 +1,155 @@
+from checkpointing.cache import DaemonCache
+from checkpointing.cache import daemon as daemon_module
+from checkpointing.cache.daemon import CacheDaemon, default_socket_path, spawn
+from checkpointing.cache.eviction import GDSFPolicy
+from checkpointing.exceptions import CheckpointNotExist
+from concurrent.futures import ProcessPoolExecutor
+from pytest import fixture, importorskip, mark, raises
+import os
+import pickle
+import tempfile
+import threading
+
+np = importorskip("numpy")
+pytestmark = mark.skipif(os.name == "nt", reason="Unix domain sockets and POSIX shared memory")
+
+
+@fixture
+def socket_path():
+    # Unix domain socket paths are limited to about 100 characters
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, "daemon.sock")
+
+
+def _serve(socket_path, **kwargs):
+    daemon = CacheDaemon(socket_path, **kwargs)
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    return daemon, thread
+
+
+@fixture
+def daemon(socket_path):
+    daemon, thread = _serve(socket_path)
+    yield daemon
+    daemon.shutdown()
+    thread.join()
+
+
+def test_save_retrieve(daemon):
+    cache = DaemonCache(daemon.socket_path)
+    cache.save("a", {"x": [1, 2], "y": bytearray(b"z")})
+
+    assert cache.retrieve("a") == {"x": [1, 2], "y": bytearray(b"z")}
+    assert len(cache) == 1
+    with raises(CheckpointNotExist):
+        cache.retrieve("b")
+
+
+def test_large_buffers_through_shared_memory(daemon):
+    cache = DaemonCache(daemon.socket_path, shm_threshold=1000)
+    cache.save("small", np.arange(10))
+    cache.save("large", np.arange(10000))
+
+    small = cache.retrieve("small")
+    small[0] = 1  # Copied from the daemon
+    large = cache.retrieve("large")
+    assert not large.flags.writeable
+    assert (large == np.arange(10000)).all()
+
+    cache.save("large", np.zeros(10000))
+    assert (cache.retrieve("large") == 0).all()
+    assert (large == np.arange(10000)).all()  # Still mapped after the segment is replaced
+
+
+def _retrieve_sum(cache, context_id):
+    return int(cache.retrieve(context_id).sum())
+
+
+def test_shared_between_processes(daemon):
+    cache = DaemonCache(daemon.socket_path, shm_threshold=1000)
+    cache.save("a", np.arange(10000))
+
+    copied = pickle.loads(pickle.dumps(cache))
+    with ProcessPoolExecutor(2) as e:
+        assert list(e.map(_retrieve_sum, [copied] * 4, ["a"] * 4)) == [sum(range(10000))] * 4
+
+
+def test_eviction_and_clear(socket_path):
+    daemon, thread = _serve(socket_path, maxsize=2, policy=GDSFPolicy())
+    try:
+        cache = DaemonCache(socket_path)
+        cache.save_with_context(None, "expensive", 0, run_time=100)
+        cache.save_with_context(None, "cheap", 1, run_time=0.01)
+        cache.save_with_context(None, "new", 2, run_time=1)
+
+        assert cache.retrieve("expensive") == 0
+        with raises(CheckpointNotExist):
+            cache.retrieve("cheap")
+
+        cache.clear()
+        assert len(cache) == 0
+    finally:
+        daemon.shutdown()
+        thread.join()
+
+
+def test_reconnects_after_restart(socket_path):
+    cache = DaemonCache(socket_path)
+
+    daemon, thread = _serve(socket_path)
+    cache.save("a", 0)
+    daemon.shutdown()
+    thread.join()
+
+    daemon, thread = _serve(socket_path)
+    try:
+        with raises(CheckpointNotExist):
+            cache.retrieve("a")
+    finally:
+        daemon.shutdown()
+        thread.join()
+
+
+def test_refuses_a_socket_of_another_user(daemon, monkeypatch):
+    uid = os.getuid()
+    monkeypatch.setattr(os, "getuid", lambda: uid + 1)  # The socket is then owned by another user
+
+    with raises(PermissionError):
+        DaemonCache(daemon.socket_path).retrieve("a")
+    with raises(PermissionError):
+        CacheDaemon(daemon.socket_path).bind()
+
+
+def test_refuses_a_daemon_of_another_user(daemon, monkeypatch):
+    monkeypatch.setattr(daemon_module, "_peer_uid", lambda sock: os.getuid() + 1)
+
+    with raises(PermissionError):
+        DaemonCache(daemon.socket_path).save("a", 1)
+
+
+def test_default_socket_in_a_private_directory(monkeypatch):
+    with tempfile.TemporaryDirectory() as directory:
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        monkeypatch.setattr(tempfile, "tempdir", directory)
+
+        path = default_socket_path()
+        assert str(path.parent.parent) == directory
+        assert path.parent.stat().st_mode & 0o777 == 0o700
+
+        path.parent.chmod(0o777)  # E.g. created by another user
+        with raises(PermissionError):
+            default_socket_path()
+
+
+def test_spawn(socket_path):
+    process = spawn(socket_path, maxbytes=1 << 20)
+    try:
+        cache = DaemonCache(socket_path)
+        cache.save("a", [1, 2, 3])
+        assert cache.retrieve("a") == [1, 2, 3]
+        cache.shutdown_daemon()
+        assert process.wait(timeout=10) == 0
+    finally:
+        process.kill()
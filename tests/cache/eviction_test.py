@@ -0,0 +1,116 @@
+from checkpointing.cache import InMemoryCache
+from checkpointing.cache.eviction import GDSFPolicy, LRUPolicy, TinyLFUPolicy
+from checkpointing.decorator.base import DecoratorCheckpoint
+from checkpointing import AutoFuncCallIdentifier
+from checkpointing.exceptions import CheckpointNotExist
+from pytest import mark, raises
+import time
+
+
+@mark.parametrize("policy", [LRUPolicy, TinyLFUPolicy, GDSFPolicy])
+def test_policy_bounds_the_cache(policy):
+    cache = InMemoryCache(maxsize=10, policy=policy())
+    for i in range(100):
+        cache.save(i, i)
+        try:
+            assert cache.retrieve(i // 2) == i // 2
+        except CheckpointNotExist:
+            pass
+    assert len(cache) == 10
+
+    cache.clear()
+    assert len(cache) == 0
+    cache.save(0, 0)
+    assert cache.retrieve(0) == 0
+
+
+@mark.parametrize("policy", [LRUPolicy, TinyLFUPolicy, GDSFPolicy])
+def test_policy_resave_and_maxbytes(policy):
+    cache = InMemoryCache(maxbytes=100, sizeof=len, policy=policy())
+    for _ in range(3):
+        for i in range(20):
+            cache.save(i, b"x" * 10)
+    assert cache.nbytes <= 100
+    assert len(cache) == 10
+
+
+def test_tiny_lfu_is_scan_resistant():
+    cache = InMemoryCache(maxsize=100, policy=TinyLFUPolicy())
+    hot = [f"hot-{i}" for i in range(50)]
+
+    for _ in range(5):
+        for key in hot:
+            try:
+                cache.retrieve(key)
+            except CheckpointNotExist:
+                cache.save(key, key)
+
+    for i in range(1000):
+        cache.save(f"scan-{i}", i)
+
+    hits = 0
+    for key in hot:
+        try:
+            cache.retrieve(key)
+            hits += 1
+        except CheckpointNotExist:
+            pass
+    assert hits == len(hot)
+
+
+def test_lru_is_flushed_by_scan():
+    cache = InMemoryCache(maxsize=100, policy=LRUPolicy())
+    cache.save("hot", 0)
+    for i in range(100):
+        cache.save(f"scan-{i}", i)
+    with raises(CheckpointNotExist):
+        cache.retrieve("hot")
+
+
+def test_gdsf_keeps_expensive_results():
+    cache = InMemoryCache(maxsize=2, sizeof=len, policy=GDSFPolicy())
+    cache.save_with_context(None, "expensive", b"x" * 100, run_time=3600)
+    cache.save_with_context(None, "cheap", b"x" * 100, run_time=0.001)
+    cache.save_with_context(None, "new", b"x" * 100, run_time=1)
+
+    assert cache.retrieve("expensive") == b"x" * 100
+    with raises(CheckpointNotExist):
+        cache.retrieve("cheap")
+
+
+def test_gdsf_prefers_small_results():
+    cache = InMemoryCache(maxsize=2, sizeof=len, policy=GDSFPolicy())
+    cache.save("small", b"x")
+    cache.save("large", b"x" * 1000)
+    cache.save("new", b"x" * 10)
+
+    assert cache.retrieve("small") == b"x"
+    with raises(CheckpointNotExist):
+        cache.retrieve("large")
+
+
+def test_gdsf_receives_run_time_from_decorator():
+    class RecordingCache(InMemoryCache):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.run_times = []
+
+        def save_with_context(self, context, context_id, result, run_time=None):
+            self.run_times.append(run_time)
+            super().save_with_context(context, context_id, result, run_time)
+
+    cache = RecordingCache(maxsize=2, policy=GDSFPolicy())
+    deco = DecoratorCheckpoint(AutoFuncCallIdentifier(), cache, on_error="raise")
+
+    @deco
+    def compute(x, seconds):
+        time.sleep(seconds)
+        return x
+
+    compute(0, 0.2)
+    compute(1, 0)
+    compute(2, 0)
+
+    assert cache.run_times[0] >= 0.2
+    assert compute(0, 0.2) == 0
+    assert len(cache.run_times) == 3
@@ -0,0 +1,222 @@
+from checkpointing.cache import HTTPCache
+from checkpointing.exceptions import CheckpointFailedError, CheckpointNotExist
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pytest import fixture, raises
+import pickle
+import re
+import socket
+import threading
+
+
+class _Store(BaseHTTPRequestHandler):
+    """A minimal object store: PUT, GET with a single range, HEAD and DELETE on keys kept in memory."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+            self.server.sockets.append(self.connection)
+
+    def do_PUT(self):
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            body = bytearray()
+            while True:
+                n = int(self.rfile.readline().strip(), 16)
+                body += self.rfile.read(n)
+                self.rfile.readline()
+                if not n:
+                    break
+            self.server.chunked_uploads += 1
+        else:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+
+        self.server.objects[self.path] = bytes(body)
+        self.__respond(201)
+
+    def do_GET(self):
+        self.__get(head=False)
+
+    def do_HEAD(self):
+        self.__get(head=True)
+
+    def do_DELETE(self):
+        self.__respond(204 if self.server.objects.pop(self.path, None) is not None else 404)
+
+    def __get(self, head):
+        data = self.server.objects.get(self.path)
+        if data is None:
+            return self.__respond(404)
+
+        etag = f'"{hash(data)}"'
+        if self.headers.get("If-Match", etag) != etag:
+            return self.__respond(412)
+
+        status = 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match:
+            start, end = int(match[1]), int(match[2])
+            data, status = data[start : end + 1], 206
+            self.server.ranges += 1
+
+        self.__respond(status, data, head, {"Accept-Ranges": "bytes", "ETag": etag})
+
+    def __respond(self, status, body=b"", head=False, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+@fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Store)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.objects, server.sockets, server.connections, server.chunked_uploads, server.ranges = {}, [], 0, 0, 0
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@fixture
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/bucket/prefix"
+
+
+def test_save_retrieve(server, url):
+    cache = HTTPCache(url)
+    cache.save("a", {"x": [1, 2], "y": b"z"})
+
+    assert cache.retrieve("a") == {"x": [1, 2], "y": b"z"}
+    assert "/bucket/prefix/a.pickle" in server.objects
+    assert server.chunked_uploads == 1
+    with raises(CheckpointNotExist):
+        cache.retrieve("b")
+
+
+def test_content_length_upload(server, url):
+    cache = HTTPCache(url, chunked=False, part_size=10)
+    cache.save("a", list(range(100)))
+
+    assert cache.retrieve("a") == list(range(100))
+    assert server.chunked_uploads == 0
+
+
+def test_connections_reused(server, url):
+    cache = HTTPCache(url)
+    for i in range(10):
+        cache.save(i, i)
+        assert cache.retrieve(i) == i
+
+    assert server.connections == 1
+
+
+def test_connections_reused_after_misses(server, url):
+    cache = HTTPCache(url, part_size=1000, multipart_threshold=5000, pool_size=1)
+    cache.save("large", bytes(range(256)) * 100)
+    cache.delete("large")
+
+    for i in range(10):
+        with raises(CheckpointNotExist):
+            cache.retrieve(i)
+        assert not cache.exists(i)
+
+    assert server.connections == 1
+
+
+def test_reconnect_after_close(server, url):
+    cache = HTTPCache(url)
+    cache.save("a", 1)
+
+    # Closed by the server while idle in the pool
+    for connection in server.sockets:
+        connection.shutdown(socket.SHUT_RDWR)
+
+    assert cache.retrieve("a") == 1
+    assert server.connections == 2
+
+
+def test_concurrent_ranges(server, url, monkeypatch):
+    cache = HTTPCache(url, part_size=1000, multipart_threshold=5000, pool_size=4)
+    value = bytes(range(256)) * 100
+    cache.save("large", value)
+    cache.save("small", b"x")
+
+    assert cache.retrieve("large") == value
+    assert server.ranges == len(pickle.dumps(value, protocol=5)) // 1000
+    assert cache.retrieve("small") == b"x"
+    assert server.ranges == len(pickle.dumps(value, protocol=5)) // 1000
+
+    # The object replaced during the download is a miss
+    cache.save("large", bytes(100) * 100)
+    with monkeypatch.context() as m:
+        get = _Store._Store__get
+
+        def replace_before_ranges(self, head):
+            if "Range" in self.headers:
+                self.server.objects[self.path] = b"replaced"
+            get(self, head)
+
+        m.setattr(_Store, "_Store__get", replace_before_ranges)
+        with raises(CheckpointNotExist):
+            cache.retrieve("large")
+
+
+def test_exists_delete(server, url):
+    cache = HTTPCache(url)
+    cache.save("a", 1)
+
+    assert cache.exists("a")
+    assert not cache.exists("b")
+
+    cache.delete("a")
+    cache.delete("a")
+    assert not cache.exists("a")
+    with raises(CheckpointNotExist):
+        cache.retrieve("a")
+
+
+def test_context_id_quoted(server, url):
+    cache = HTTPCache(url)
+    cache.save("a/b c", 1)
+
+    assert cache.retrieve("a/b c") == 1
+    assert "/bucket/prefix/a%2Fb%20c.pickle" in server.objects
+
+
+def test_failed_save(server, url, monkeypatch):
+    cache = HTTPCache(url)
+    with monkeypatch.context() as m:
+        m.setattr(_Store, "do_PUT", lambda self: self._Store__respond(403, b"denied"))
+        with raises(CheckpointFailedError, match="403"):
+            cache.save("a", 1)
+
+    cache.save("a", 1)
+    assert cache.retrieve("a") == 1
+
+
+def test_pickle(server, url):
+    cache = HTTPCache(url)
+    cache.save("a", 1)
+    cache.retrieve("a")
+
+    loaded = pickle.loads(pickle.dumps(cache))
+    assert loaded.retrieve("a") == 1
+    loaded.close()
+
+
+def test_invalid_url():
+    with raises(ValueError):
+        HTTPCache("ftp://host/path")
@@ -1,6 +1,7 @@
 from checkpointing.cache.in_mem_lru import InMemoryLRUCache
 from checkpointing.exceptions import CheckpointNotExist
-from pytest import raises
+from pytest import importorskip, raises
+import time
 
 def test_lru_basic_functionality():
     cache = InMemoryLRUCache()
@@ -31,3 +32,67 @@ def test_lru_maxsize_works():
     cache.save(3, 3)
     with raises(CheckpointNotExist):
         cache.retrieve(2)
+
+def test_lru_maxbytes_evicts_least_recently_used():
+    cache = InMemoryLRUCache(maxbytes=250, sizeof=len)
+
+    cache.save(0, b"a" * 100)
+    cache.save(1, b"b" * 100)
+    cache.retrieve(0) # Let 1 be the least recently used
+    cache.save(2, b"c" * 100)
+
+    assert cache.nbytes == 200
+    assert cache.retrieve(0) == b"a" * 100
+    assert cache.retrieve(2) == b"c" * 100
+    with raises(CheckpointNotExist):
+        cache.retrieve(1)
+
+def test_lru_maxbytes_overwrite_and_oversized():
+    cache = InMemoryLRUCache(maxbytes=100, sizeof=len)
+
+    cache.save(0, b"a" * 60)
+    cache.save(0, b"a" * 80)
+    assert cache.nbytes == 80
+    assert len(cache) == 1
+
+    cache.save(1, b"b" * 101)
+    assert cache.retrieve(0) == b"a" * 80
+    with raises(CheckpointNotExist):
+        cache.retrieve(1)
+
+def test_lru_maxbytes_default_sizeof():
+    np = importorskip("numpy")
+    cache = InMemoryLRUCache(maxbytes=10000)
+
+    cache.save(0, np.zeros(1000))
+    cache.save(1, np.zeros(1000))
+    with raises(CheckpointNotExist):
+        cache.retrieve(0)
+    assert cache.retrieve(1).shape == (1000,)
+
+def test_lru_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = InMemoryLRUCache(ttl=10)
+
+    cache.save(0, 0)
+    now[0] += 5
+    cache.save(1, 1)
+    assert cache.retrieve(0) == 0
+
+    now[0] += 6
+    with raises(CheckpointNotExist):
+        cache.retrieve(0)
+    assert cache.retrieve(1) == 1
+
+    now[0] += 5
+    cache.save(2, 2) # Removes the expired entry 1
+    assert len(cache) == 1
+
+def test_lru_clear_resets_size():
+    cache = InMemoryLRUCache(maxbytes=100, sizeof=len)
+    cache.save(0, b"a" * 50)
+    cache.clear()
+    assert cache.nbytes == 0
+    with raises(CheckpointNotExist):
+        cache.retrieve(0)
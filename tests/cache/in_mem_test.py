@@ -0,0 +1,159 @@
+from checkpointing.cache import InMemoryCache, PickleFileCache, TieredCache
+from checkpointing.decorator import DecoratorCheckpoint
+from checkpointing.identifier.func_call import AutoFuncCallIdentifier
+from checkpointing.cache.eviction import GDSFPolicy, TinyLFUPolicy
+from checkpointing.exceptions import CheckpointNotExist
+from tests.testutils import tmpdir, rmdir_before, rmdir_after, mkdir_func
+from pytest import mark, raises
+import pickle
+import threading
+
+
+def test_snapshot_and_restore_values(rmdir_before, rmdir_after):
+    mkdir_func()
+    path = tmpdir.joinpath("hot.snapshot")
+
+    cache = InMemoryCache(maxsize=10)
+    for i in range(10):
+        cache.save(i, [i])
+    cache.retrieve(0)
+    cache.save("lambda", lambda: 0)  # Evicts 1, and can't be pickled
+
+    assert cache.snapshot(path, values=True) == 10
+
+    restored = InMemoryCache(maxsize=10)
+    restored.restore(path).join()
+    assert restored.retrieve(0) == [0]
+    assert restored.retrieve(9) == [9]
+    assert len(restored) == 9  # The lambda has no value and no source
+    with raises(CheckpointNotExist):
+        restored.retrieve(1)
+
+
+def test_restore_from_source_by_hotness(rmdir_before, rmdir_after):
+    source = PickleFileCache(tmpdir)
+    path = tmpdir.joinpath("hot.snapshot")
+
+    cache = InMemoryCache(maxsize=5)
+    for i in range(5):
+        cache.save(str(i), i)
+        source.save(str(i), i)
+    cache.retrieve("0")
+    cache.snapshot(path)
+
+    # Restoring stops when the cache is full, keeping the hottest entries
+    small = InMemoryCache(maxsize=2)
+    small.restore(path, source=source, background=False)
+    assert len(small) == 2
+    assert small.retrieve("0") == 0
+    assert small.retrieve("4") == 4
+
+
+def test_restore_from_tiered_cache_does_not_promote(rmdir_before, rmdir_after):
+    disk = PickleFileCache(tmpdir)
+    path = tmpdir.joinpath("hot.snapshot")
+
+    cache = InMemoryCache()
+    for i in range(5):
+        cache.save(str(i), bytes(5))
+        disk.save(str(i), bytes(5))
+    cache.snapshot(path)
+
+    # Promoting a result from the disk would evict the entry being served
+    memory = InMemoryCache(maxbytes=10, sizeof=len)
+    memory.save("live", bytes(6))
+    memory.restore(path, source=TieredCache([memory, disk]), background=False)
+
+    assert memory.retrieve("live") == bytes(6)
+    assert len(memory) == 1
+
+
+def test_restore_from_namespaced_tier(rmdir_before, rmdir_after):
+    path = tmpdir.joinpath("hot.snapshot")
+    memory = InMemoryCache(maxsize=10)
+    cache = TieredCache([memory, PickleFileCache(tmpdir, namespaced=True)])
+
+    @DecoratorCheckpoint(AutoFuncCallIdentifier(), cache, "raise")
+    def square(a):
+        return a * a
+
+    assert [square(i) for i in range(3)] == [0, 1, 4]
+    memory.snapshot(path)
+
+    restored = InMemoryCache(maxsize=10)
+    restored.restore(path, source=TieredCache([restored, PickleFileCache(tmpdir, namespaced=True)]), background=False)
+    assert len(restored) == 3
+
+
+def test_restore_does_not_overwrite(rmdir_before, rmdir_after):
+    mkdir_func()
+    path = tmpdir.joinpath("hot.snapshot")
+
+    cache = InMemoryCache()
+    cache.save("a", "old")
+    cache.snapshot(path, values=True)
+
+    restored = InMemoryCache()
+    restored.save("a", "new")
+    restored.restore(path, background=False)
+    assert restored.retrieve("a") == "new"
+
+
+def test_restore_missing_snapshot(rmdir_before, rmdir_after):
+    cache = InMemoryCache()
+    cache.restore(tmpdir.joinpath("missing"), background=False)
+    assert len(cache) == 0
+
+
+@mark.parametrize("policy", [TinyLFUPolicy, GDSFPolicy])
+def test_snapshot_order_follows_policy(rmdir_before, rmdir_after, policy):
+    mkdir_func()
+    path = tmpdir.joinpath("hot.snapshot")
+
+    cache = InMemoryCache(maxsize=100, policy=policy())
+    for i in range(100):
+        cache.save(i, i)
+    for _ in range(3):
+        cache.retrieve(42)
+
+    assert cache.policy.by_hotness()[0] == 42
+    cache.snapshot(path)
+    with open(path, "rb") as file:
+        pickle.load(file)
+        assert pickle.load(file)[0] == 42
+
+
+def test_snapshot_every(rmdir_before, rmdir_after):
+    mkdir_func()
+    path = tmpdir.joinpath("hot.snapshot")
+
+    cache = InMemoryCache()
+    cache.save("a", 1)
+    periodic = cache.snapshot_every(path, interval=3600, values=True)
+    assert not path.exists()
+
+    periodic.stop()
+    restored = InMemoryCache()
+    restored.restore(path, background=False)
+    assert restored.retrieve("a") == 1
+
+
+def test_serves_while_restoring(rmdir_before, rmdir_after):
+    mkdir_func()
+    path = tmpdir.joinpath("hot.snapshot")
+
+    cache = InMemoryCache(maxsize=1000)
+    for i in range(1000):
+        cache.save(i, i)
+    cache.snapshot(path, values=True)
+
+    restored = InMemoryCache(maxsize=1000)
+    thread = restored.restore(path)
+    for i in range(1000, 2000):
+        restored.save(i, i)
+        restored.retrieve(i)
+    thread.join()
+    assert len(restored) <= 1000
+
+    copied = pickle.loads(pickle.dumps(restored))
+    assert len(copied) == len(restored)
@@ -0,0 +1,45 @@
+from checkpointing.cache.index import EntryIndex
+from tests.testutils import tmpdir, rmdir_before, rmdir_after, mkdir_before
+import pickle
+import time
+
+
+def test_total_size_is_maintained(rmdir_before, mkdir_before, rmdir_after):
+    index = EntryIndex(tmpdir.joinpath("index.sqlite"), cost_weight=60)
+    index.add("a", 10)
+    index.add("b", 20)
+    index.add("a", 5)
+    assert index.total_size == 25
+
+    index.add_many([("c/1", 1, 0.0), ("c/2", 2, 0.0), ("b", 30, 0.0)])
+    assert index.total_size == 38
+
+    index.remove_prefix("c/")
+    assert index.total_size == 35
+    assert len(index) == 2
+
+    index.remove("a")
+    assert index.total_size == 30
+
+    index.clear()
+    assert index.total_size == 0
+
+
+def test_lowest_priority_by_recency_and_cost(rmdir_before, mkdir_before, rmdir_after):
+    index = EntryIndex(tmpdir.joinpath("index.sqlite"), cost_weight=60)
+    index.add("expensive", 1, cost=10)
+    index.add("old", 1)
+    time.sleep(0.01)
+    index.add("new", 1)
+
+    assert [path for path, _ in index.lowest_priority(3)] == ["old", "new", "expensive"]
+
+    time.sleep(0.01)
+    index.touch("old")
+    assert [path for path, _ in index.lowest_priority(1)] == ["new"]
+
+
+def test_picklable(rmdir_before, mkdir_before, rmdir_after):
+    index = EntryIndex(tmpdir.joinpath("index.sqlite"), cost_weight=60)
+    index.add("a", 10)
+    assert pickle.loads(pickle.dumps(index)).total_size == 10
@@ -0,0 +1,106 @@
+from checkpointing.cache import InMemoryCache, OverlayCache, PickleFileCache
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from tests.testutils import tmpdir, rmdir_before, rmdir_after
+from pytest import raises
+import os
+import pickle
+
+
+def test_lookup_order():
+    top, first, second = InMemoryCache(), InMemoryCache(), InMemoryCache()
+    first.save("a", "first")
+    second.save("a", "second")
+    second.save("b", "second")
+    cache = OverlayCache(top, [first, second])
+
+    assert cache.retrieve("a") == "first"
+    assert cache.retrieve("b") == "second"
+    with raises(CheckpointNotExist):
+        cache.retrieve("c")
+
+    cache.save("a", "top")
+    assert cache.retrieve("a") == "top"
+    assert first.retrieve("a") == "first"
+
+
+def test_layers_are_read_only():
+    top, layer = InMemoryCache(), InMemoryCache()
+    layer.save("a", 1)
+    cache = OverlayCache(top, [layer])
+
+    cache.save("b", 2)
+    cache.clear()
+
+    assert len(layer) == 1
+    assert cache.retrieve("a") == 1
+    with raises(CheckpointNotExist):
+        cache.retrieve("b")
+
+
+def test_copy_hot_results():
+    top, layer = InMemoryCache(), InMemoryCache()
+    layer.save("a", 1)
+    cache = OverlayCache(top, [layer], promote="copy", promote_after=2)
+
+    assert cache.retrieve("a") == 1
+    assert len(top) == 0
+    assert cache.retrieve("a") == 1
+    assert top.retrieve("a") == 1
+
+
+def test_link_hot_results(rmdir_before, rmdir_after):
+    top, layer = PickleFileCache(tmpdir.joinpath("top")), PickleFileCache(tmpdir.joinpath("golden"))
+    layer.save("a", [1, 2])
+    cache = OverlayCache(top, [layer], promote="link")
+
+    assert cache.retrieve("a") == [1, 2]
+    assert top.retrieve("a") == [1, 2]
+    linked, golden = tmpdir.joinpath("top", "a.pickle"), tmpdir.joinpath("golden", "a.pickle")
+    if os.name != "nt":
+        assert linked.stat().st_ino == golden.stat().st_ino
+
+    # Saving in the top cache replaces the link, the layer is not modified
+    cache.save("a", [3])
+    assert cache.retrieve("a") == [3]
+    assert layer.retrieve("a") == [1, 2]
+
+
+def foo():
+    return 0
+
+
+def test_link_namespaced(rmdir_before, rmdir_after):
+    top = PickleFileCache(tmpdir.joinpath("top"), namespaced=True)
+    layer = PickleFileCache(tmpdir.joinpath("golden"), namespaced=True)
+    context = FuncCallContext(foo, (), {})
+    layer.save_with_context(context, "a", 1)
+    cache = OverlayCache(top, [layer], promote="link")
+
+    assert cache.retrieve_with_context(context, "a") == 1
+    assert top.retrieve_with_context(context, "a") == 1
+    with raises(CheckpointNotExist):
+        cache.retrieve("a")
+
+
+def test_link_falls_back_to_copy(rmdir_before, rmdir_after):
+    top, layer = PickleFileCache(tmpdir.joinpath("top")), InMemoryCache()
+    layer.save("a", 1)
+    cache = OverlayCache(top, [layer], promote="link")
+
+    assert cache.retrieve("a") == 1
+    assert top.retrieve("a") == 1
+
+
+def test_invalid_promotion():
+    with raises(ValueError):
+        OverlayCache(InMemoryCache(), [], promote="move")
+
+
+def test_pickle():
+    layer = InMemoryCache()
+    layer.save("a", 1)
+    cache = pickle.loads(pickle.dumps(OverlayCache(InMemoryCache(), [layer], promote="copy")))
+
+    assert cache.retrieve("a") == 1
+    assert cache.top.retrieve("a") == 1
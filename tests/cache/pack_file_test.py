@@ -0,0 +1,176 @@
+from checkpointing.cache import PackFileCache
+from checkpointing import CheckpointNotExist
+from tests.testutils import tmpdir, rmdir_before, rmdir_after
+from concurrent.futures import ProcessPoolExecutor
+from pytest import mark, raises
+import multiprocessing
+import os
+import pathlib
+import threading
+import time
+
+
+def segments():
+    return sorted(tmpdir.glob("*.pack"))
+
+
+def test_saves_and_retrieves(rmdir_before, rmdir_after):
+    cache = PackFileCache(tmpdir)
+    cache.save("a", [1, 2, 3])
+    cache.save("b", "b")
+    cache.save("a", [4, 5])
+
+    assert cache.retrieve("a") == [4, 5]
+    assert cache.retrieve("b") == "b"
+    assert len(cache) == 2
+    assert len(segments()) == 1
+
+    with raises(CheckpointNotExist):
+        cache.retrieve("c")
+
+    cache.close()
+    assert PackFileCache(tmpdir).retrieve("a") == [4, 5]
+
+
+def test_segments_rotate_and_compact(rmdir_before, rmdir_after):
+    cache = PackFileCache(tmpdir, segment_size=10000, compaction_threshold=0)
+    for _ in range(5):
+        for i in range(5):
+            cache.save(str(i), bytes(1000))
+
+    cache.close()
+    assert len(segments()) == 3
+
+    cache = PackFileCache(tmpdir, compaction_threshold=0.5)
+    assert cache.compact() == 2
+    assert len(segments()) == 1
+    assert [cache.retrieve(str(i)) for i in range(5)] == [bytes(1000)] * 5
+
+
+def test_compaction_moves_live_entries(rmdir_before, rmdir_after):
+    cache = PackFileCache(tmpdir, compaction_threshold=0.8)
+    cache.save("a", bytes(1000))
+    cache.save("b", bytes(1000))
+    cache.save("b", bytes(1000))
+    cache.close()
+
+    assert cache.compact() == 1
+    cache.close()
+    assert len(segments()) == 1
+    assert cache.retrieve("a") == cache.retrieve("b") == bytes(1000)
+    assert segments()[0].stat().st_size < 2500
+
+
+def save_range(cache, start):
+    for i in range(start, start + 20):
+        cache.save(str(i), i)
+
+
+def test_processes_append_to_their_own_segments(rmdir_before, rmdir_after):
+    cache = PackFileCache(tmpdir)
+
+    with ProcessPoolExecutor(2) as e:
+        list(e.map(save_range, [cache] * 2, [0, 20]))
+
+    assert [cache.retrieve(str(i)) for i in range(40)] == list(range(40))
+    assert len(segments()) == 2
+
+
+def test_readers_drop_the_maps_of_segments_compacted_by_others(rmdir_before, rmdir_after):
+    writer = PackFileCache(tmpdir, compaction_threshold=0.5)
+    writer.save("a", bytes(1000))
+    writer.close()
+
+    reader = PackFileCache(tmpdir)
+    assert reader.retrieve("a") == bytes(1000)
+    (compacted,) = segments()
+    (old_map, _) = reader._PackFileCache__maps[compacted.stem]
+
+    writer.save("a", bytes(2000))
+    writer.close()
+    assert writer.compact() == 1
+
+    assert reader.retrieve("a") == bytes(2000)
+    assert compacted.stem not in reader._PackFileCache__maps
+    assert old_map.closed
+
+    writer.compact()  # Deletes the segment if it could not be deleted while mapped, on Windows
+    assert not compacted.exists()
+
+
+def save_and_crash(cache):
+    cache.save("a", bytes(1000))
+    cache.save("a", bytes(1000))
+    os._exit(0)  # Without sealing the segment
+
+
+@mark.skipif(os.name == "nt", reason="The writers of the segments are not tracked on Windows")
+def test_compaction_seals_the_segments_of_dead_processes(rmdir_before, rmdir_after):
+    cache = PackFileCache(tmpdir, compaction_threshold=0.8)
+
+    process = multiprocessing.Process(target=save_and_crash, args=(cache,))
+    process.start()
+    process.join()
+    assert len(segments()) == 1
+
+    assert cache.compact() == 1
+    cache.close()
+    assert cache.retrieve("a") == bytes(1000)
+    assert len(segments()) == 1
+    assert segments()[0].stat().st_size < 1500
+
+
+def test_concurrent_compactions_move_entries_once(rmdir_before, rmdir_after, monkeypatch):
+    cache = PackFileCache(tmpdir)
+    cache.save("a", bytes(1000))
+    cache.save("b", bytes(1000))
+    cache.save("b", bytes(1000))
+    cache.close()
+
+    move = PackFileCache._PackFileCache__move_live_entries
+
+    def slow_move(self, segment):
+        time.sleep(0.2)
+        move(self, segment)
+
+    monkeypatch.setattr(PackFileCache, "_PackFileCache__move_live_entries", slow_move)
+
+    compactors = [PackFileCache(tmpdir, compaction_threshold=0.8) for _ in range(2)]
+    counts = []
+    threads = [threading.Thread(target=lambda c=c: counts.append(c.compact())) for c in compactors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for compactor in compactors:
+        compactor.close()
+
+    assert sorted(counts) == [0, 1]
+    assert sum(segment.stat().st_size for segment in segments()) < 2500
+    assert cache.retrieve("a") == cache.retrieve("b") == bytes(1000)
+
+
+def test_deletion_of_a_segment_in_use_is_retried(rmdir_before, rmdir_after, monkeypatch):
+    cache = PackFileCache(tmpdir, compaction_threshold=0.8)
+    cache.save("a", bytes(1000))
+    cache.save("a", bytes(1000))
+    cache.close()
+    (compacted,) = segments()
+
+    with monkeypatch.context() as m:
+        unlink = pathlib.Path.unlink
+
+        def unlink_in_use(self, missing_ok=False):
+            if self == compacted:
+                raise PermissionError("The file is mapped by another process")  # As on Windows
+            unlink(self, missing_ok)
+
+        m.setattr(pathlib.Path, "unlink", unlink_in_use)
+        assert cache.compact() == 1
+
+    assert compacted.exists()
+    assert cache.retrieve("a") == bytes(1000)
+
+    assert cache.compact() == 0
+    assert not compacted.exists()
+    assert cache.retrieve("a") == bytes(1000)
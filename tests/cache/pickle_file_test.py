@@ -1,5 +1,6 @@
 from checkpointing.cache.pickle_file import PickleFileCache, CheckpointNotExist
 from checkpointing.config import defaults
+from checkpointing.identifier.func_call.context import FuncCallContext
 from checkpointing.util import pickle
 from tests.testutils import tmpdir, rmdir_before
 from pytest import raises
@@ -36,3 +37,190 @@ def test_cache_throws_CheckpointNotExist(rmdir_before):
     with raises(CheckpointNotExist):
         cache = PickleFileCache(tmpdir)
         cache.retrieve("0")
+
+
+def test_cache_memory_maps_large_buffers(rmdir_before):
+    import numpy as np
+    import mmap
+
+    value = {"small": np.arange(10), "large": np.arange(100000)}
+    cache = PickleFileCache(tmpdir, buffer_threshold=1024)
+    cache.save("2", value)
+
+    res = cache.retrieve("2")
+    assert np.array_equal(res["small"], value["small"])
+    assert np.array_equal(res["large"], value["large"])
+
+    def buffer_owner(arr):
+        while isinstance(arr, np.ndarray):
+            arr = arr.base
+        return arr.obj
+
+    assert isinstance(buffer_owner(res["large"]), mmap.mmap)
+    assert not isinstance(buffer_owner(res["small"]), mmap.mmap)
+
+    res["large"][0] = -1  # Copy-on-write, does not change the cache
+    assert cache.retrieve("2")["large"][0] == 0
+
+
+def test_buffer_threshold_takes_precedence_over_npy_without_mmap_mode(rmdir_before):
+    import numpy as np
+
+    value = {"large": np.arange(100000)}
+    PickleFileCache(tmpdir, buffer_threshold=1024).save("5", value)
+    assert tmpdir.joinpath("5.pickle").exists()
+
+    cache = PickleFileCache(tmpdir, buffer_threshold=1024, mmap_mode="r")
+    cache.save("6", value)
+    assert tmpdir.joinpath("6.npy").exists()
+    assert isinstance(cache.retrieve("6")["large"], np.memmap)
+
+    np.save(tmpdir.joinpath("7.npy"), np.arange(3))
+    assert np.array_equal(PickleFileCache(tmpdir, buffer_threshold=1024).retrieve("7"), np.arange(3))
+
+
+def test_cache_without_large_buffers_saves_plain_pickle(rmdir_before):
+    PickleFileCache(tmpdir, buffer_threshold=1024).save("3", [1, 2, 3])
+
+    with open(tmpdir.joinpath("3.pickle"), "rb") as f:
+        assert pickle.load(f, defaults["cache.pickle_protocol"]) == [1, 2, 3]
+
+
+def test_cache_saves_arrays_as_npy(rmdir_before):
+    import numpy as np
+
+    cache = PickleFileCache(tmpdir)
+    cache.save("4", np.arange(3))
+    assert tmpdir.joinpath("4.npy").exists()
+    assert np.array_equal(cache.retrieve("4"), np.arange(3))
+
+    cache.save("4", [1])
+    assert not tmpdir.joinpath("4.npy").exists()
+    assert cache.retrieve("4") == [1]
+
+
+def save_and_retrieve_concurrently(worker):
+    cache = PickleFileCache(tmpdir)
+    for i in range(20):
+        cache.save("5", [worker] * 100000)
+        value = cache.retrieve("5")
+        assert len(value) == 100000 and len(set(value)) == 1
+
+
+def test_concurrent_saves_and_retrieves_without_lock(rmdir_before):
+    from concurrent.futures import ProcessPoolExecutor
+
+    PickleFileCache(tmpdir)
+    with ProcessPoolExecutor(4) as e:
+        list(e.map(save_and_retrieve_concurrently, range(4)))
+
+    assert [p.name for p in tmpdir.iterdir()] == ["5.pickle"]
+
+
+def test_failed_save_keeps_previous_entry(rmdir_before):
+    cache = PickleFileCache(tmpdir)
+    cache.save("6", 1)
+
+    with raises(Exception):
+        cache.save("6", lambda: None)
+
+    assert cache.retrieve("6") == 1
+    assert [p.name for p in tmpdir.iterdir()] == ["6.pickle"]
+
+
+def test_sharded_layout(rmdir_before):
+    cache = PickleFileCache(tmpdir, layout="sharded")
+    cache.save("a", [1, 2, 3])
+    cache.save("b", b"bytes")
+
+    assert not tmpdir.joinpath("a.pickle").exists()
+    assert cache._get_file_path("a").relative_to(tmpdir).parts[:2] == ("0c", "c1")
+    assert cache.retrieve("a") == [1, 2, 3]
+    assert sorted((i, e) for i, e, _ in cache._iter_files()) == [("a", "pickle"), ("b", "bin")]
+
+    with raises(ValueError):
+        PickleFileCache(tmpdir, layout="unknown")
+
+
+def test_migrate_layout(rmdir_before):
+    flat = PickleFileCache(tmpdir)
+    for i in range(10):
+        flat.save(str(i), i)
+
+    sharded = PickleFileCache(tmpdir, layout="sharded")
+    assert sharded.migrate_layout() == 10
+    assert list(tmpdir.glob("*.pickle")) == []
+    assert [sharded.retrieve(str(i)) for i in range(10)] == list(range(10))
+
+    assert flat.migrate_layout() == 10
+    assert sorted(p.name for p in tmpdir.iterdir()) == sorted(f"{i}.pickle" for i in range(10))
+    assert [flat.retrieve(str(i)) for i in range(10)] == list(range(10))
+
+
+def foo_v0():
+    return 0
+
+
+def foo_v1():
+    return 1
+
+
+def foo_v2():
+    return 2
+
+
+def test_namespaced_keeps_versions(rmdir_before):
+    cache = PickleFileCache(tmpdir, namespaced=True, keep_versions=2)
+    contexts = []
+
+    for version, func in enumerate([foo_v0, foo_v1, foo_v2]):
+        func.__qualname__ = "foo"
+        context = FuncCallContext(func, (), {})
+        contexts.append(context)
+        cache.save_with_context(context, "0", version)
+        assert cache.retrieve_with_context(context, "0") == version
+
+    (namespace,) = tmpdir.iterdir()
+    assert namespace.name.endswith(".foo")
+    assert sorted(p.name for p in namespace.iterdir()) == sorted(c.fingerprint for c in contexts[1:])
+
+    with raises(CheckpointNotExist):
+        cache.retrieve_with_context(contexts[0], "0")
+
+    cache.save("1", 1)
+    cache.clear()
+    assert list(tmpdir.iterdir()) == []
+
+
+def test_evicts_to_max_bytes(rmdir_before):
+    cache = PickleFileCache(tmpdir, max_bytes=10000)
+    for i in range(20):
+        cache.save(str(i), b"x" * 1000)
+
+    assert sum(p.stat().st_size for _, _, p in cache._iter_files()) <= 10000
+    assert cache.retrieve("19") == b"x" * 1000
+    with raises(CheckpointNotExist):
+        cache.retrieve("0")
+
+
+def test_eviction_prefers_cheap_entries(rmdir_before):
+    cache = PickleFileCache(tmpdir, max_bytes=3500)
+    context = FuncCallContext(foo_v0, (), {})
+
+    cache.save_with_context(context, "expensive", b"x" * 1000, run_time=60)
+    for i in range(5):
+        cache.save(str(i), b"x" * 1000)
+
+    assert cache.retrieve("expensive") == b"x" * 1000
+    assert cache.retrieve("4") == b"x" * 1000
+    with raises(CheckpointNotExist):
+        cache.retrieve("0")
+
+
+def test_index_is_rebuilt_for_existing_directory(rmdir_before):
+    for i in range(10):
+        PickleFileCache(tmpdir).save(str(i), b"x" * 1000)
+
+    cache = PickleFileCache(tmpdir, max_bytes=5000)
+    cache.save("new", b"x" * 1000)
+    assert len(list(cache._iter_files())) == 5
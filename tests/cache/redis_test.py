@@ -0,0 +1,130 @@
+from checkpointing.cache import RedisCache
+from checkpointing.exceptions import CheckpointNotExist
+from pytest import fixture, importorskip, raises
+import pickle
+
+fakeredis = importorskip("fakeredis")
+
+
+@fixture
+def client():
+    return fakeredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+def test_save_retrieve(client):
+    cache = RedisCache(client=client)
+    cache.save("a", {"x": [1, 2], "y": b"z"})
+
+    assert cache.retrieve("a") == {"x": [1, 2], "y": b"z"}
+    assert len(cache) == 1
+    with raises(CheckpointNotExist):
+        cache.retrieve("b")
+
+
+def test_shared(client):
+    RedisCache(client=client).save("a", 1)
+    assert RedisCache(client=fakeredis.FakeRedis(connection_pool=client.connection_pool)).retrieve("a") == 1
+    with raises(CheckpointNotExist):
+        RedisCache(client=client, key_prefix="other:").retrieve("a")
+
+
+def test_many(client):
+    cache = RedisCache(client=client, chunk_size=100)
+    cache.save_many({"a": 1, "b": list(range(100)), "c": "c"})
+
+    assert cache.retrieve_many(["a", "b", "x", "c"]) == {"a": 1, "b": list(range(100)), "c": "c"}
+    assert cache.retrieve_many([]) == {}
+    assert len(cache) == 3
+
+
+def test_chunked(client):
+    cache = RedisCache(client=client, chunk_size=100)
+    cache.save("a", bytes(1000))
+
+    assert cache.retrieve("a") == bytes(1000)
+    assert len(client.keys("checkpointing:c:*")) == len(pickle.dumps(bytes(1000), protocol=5)) // 100 + 1
+
+    # The chunks of the replaced result are deleted
+    cache.save("a", bytes(300))
+    assert cache.retrieve("a") == bytes(300)
+    assert len(client.keys("checkpointing:c:*")) == 4
+
+    cache.save("a", 1)
+    assert cache.retrieve("a") == 1
+    assert client.keys("checkpointing:c:*") == []
+
+
+def test_replaces_without_set_get(client, monkeypatch):
+    # SET with GET requires Redis 6.2
+    pipeline_class = type(client.pipeline())
+    set_command = pipeline_class.set
+
+    def set_without_get(self, *args, get=False, **kwargs):
+        assert not get
+        return set_command(self, *args, **kwargs)
+
+    monkeypatch.setattr(pipeline_class, "set", set_without_get)
+
+    cache = RedisCache(client=client, chunk_size=100)
+    cache.save_many({"a": bytes(1000), "b": 1})
+    cache.save_many({"a": 2, "b": bytes(300)})
+
+    assert cache.retrieve_many(["a", "b"]) == {"a": 2, "b": bytes(300)}
+    assert len(client.keys("checkpointing:c:*")) == 4
+
+
+def test_evicted_chunk(client):
+    cache = RedisCache(client=client, chunk_size=100)
+    cache.save("a", bytes(1000))
+    client.delete(client.keys("checkpointing:c:*")[0])
+
+    with raises(CheckpointNotExist):
+        cache.retrieve("a")
+
+
+def test_ttl(client):
+    cache = RedisCache(client=client, ttl=10, chunk_size=100)
+    cache.save("a", 1)
+    cache.save("b", bytes(1000))
+
+    assert 0 < client.pttl("checkpointing:e:a") <= 10000
+    for key in client.keys("checkpointing:c:*"):
+        assert 0 < client.pttl(key) <= 10000
+
+    assert RedisCache(client=client).retrieve("a") == 1
+    RedisCache(client=client).save("c", 1)
+    assert client.pttl("checkpointing:e:c") == -1
+
+
+def test_ttl_under_a_millisecond(client):
+    with raises(ValueError):
+        RedisCache(client=client, ttl=0.0001)
+
+
+def test_clear(client):
+    cache = RedisCache(client=client, chunk_size=100)
+    other = RedisCache(client=client, key_prefix="other:")
+    cache.save("a", 1)
+    cache.save("b", bytes(1000))
+    other.save("a", 2)
+
+    with raises(ValueError):
+        cache.clear(object())
+
+    cache.clear()
+    assert len(cache) == 0
+    assert client.keys("checkpointing:*") == []
+    assert other.retrieve("a") == 2
+
+
+def test_pickle(client, monkeypatch):
+    redis = importorskip("redis")
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(server=server))
+    server = fakeredis.FakeServer()
+
+    cache = RedisCache("redis://localhost:6379/1")
+    cache.save("a", 1)
+
+    loaded = pickle.loads(pickle.dumps(cache))
+    assert loaded.retrieve("a") == 1
+    loaded.close()
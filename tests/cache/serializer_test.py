@@ -0,0 +1,81 @@
+from checkpointing.cache.pickle_file import PickleFileCache
+from checkpointing.cache.serializer import SerializerRegistry, Serializer, parquet_serializer
+from tests.testutils import tmpdir, rmdir_before
+from pytest import raises, importorskip
+import json
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+def save_point(point, file):
+    file.write(json.dumps([point.x, point.y]).encode("utf-8"))
+
+
+def load_point(file):
+    return Point(*json.loads(file.read().decode("utf-8")))
+
+
+def test_registered_serializer_is_used(rmdir_before):
+    cache = PickleFileCache(tmpdir)
+    cache.serializers.register("point", lambda r: isinstance(r, Point), save_point, load_point, "json")
+
+    cache.save("0", Point(1, 2))
+    assert tmpdir.joinpath("0.json").exists()
+
+    res = cache.retrieve("0")
+    assert (res.x, res.y) == (1, 2)
+
+
+def test_bytes_are_saved_raw(rmdir_before):
+    cache = PickleFileCache(tmpdir)
+    cache.save("0", b"\x00\x01")
+
+    assert tmpdir.joinpath("0.bin").read_bytes() == b"\x00\x01"
+    assert cache.retrieve("0") == b"\x00\x01"
+
+
+def test_stale_entry_of_other_serializer_is_removed(rmdir_before):
+    cache = PickleFileCache(tmpdir)
+    cache.save("0", b"\x00")
+    cache.save("0", 1)
+
+    assert not tmpdir.joinpath("0.bin").exists()
+    assert cache.retrieve("0") == 1
+
+
+def test_failed_serializer_falls_back_to_pickle(rmdir_before):
+    def fail(result, file):
+        file.write(b"partial")
+        raise RuntimeError
+
+    cache = PickleFileCache(tmpdir)
+    cache.serializers.register("failing", lambda r: isinstance(r, Point), fail, load_point, "json")
+
+    cache.save("0", Point(1, 2))
+    assert not tmpdir.joinpath("0.json").exists()
+    assert cache.retrieve("0").x == 1
+
+
+def test_registry_rejects_duplicated_extension():
+    registry = SerializerRegistry([Serializer("a", bool, None, None, "a")])
+    with raises(ValueError):
+        registry.register("b", bool, None, None, "a")
+
+    registry.register("a", bool, None, None, "a")  # Replacing the serializer of the same name
+    assert len(registry) == 1
+
+
+def test_parquet_serializer(rmdir_before):
+    importorskip("pyarrow")
+    import pandas as pd
+
+    df = pd.DataFrame({"a": [1, 2], "b": [0.5, 1.5]}, index=[3, 4])
+    cache = PickleFileCache(tmpdir)
+    cache.serializers.add(parquet_serializer())
+
+    cache.save("0", df)
+    assert tmpdir.joinpath("0.parquet").exists()
+    pd.testing.assert_frame_equal(cache.retrieve("0"), df)
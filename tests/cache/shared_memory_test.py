@@ -0,0 +1,96 @@
+from checkpointing.cache import SharedMemoryCache
+from checkpointing.exceptions import CheckpointNotExist
+from tests.testutils import tmpdir, rmdir_before, rmdir_after
+from concurrent.futures import ProcessPoolExecutor
+from pytest import fixture, importorskip, mark, raises
+import os
+import pickle
+
+np = importorskip("numpy")
+pytestmark = mark.skipif(os.name == "nt", reason="POSIX shared memory")
+
+
+@fixture
+def cache(rmdir_before, rmdir_after):
+    cache = SharedMemoryCache(tmpdir)
+    yield cache
+    cache.clear()
+
+
+def test_save_retrieve(cache):
+    cache.save("a", {"x": [1, 2], "y": "z"})
+    assert cache.retrieve("a") == {"x": [1, 2], "y": "z"}
+    with raises(CheckpointNotExist):
+        cache.retrieve("b")
+
+
+def test_arrays_are_shared_read_only_views(cache):
+    cache.save("a", np.arange(1000))
+
+    first = cache.retrieve("a")
+    second = cache.retrieve("a")
+    assert np.shares_memory(first, second)
+    assert not first.flags.writeable
+    assert (first == np.arange(1000)).all()
+
+
+def test_overwrite(cache):
+    cache.save("a", np.zeros(1000))
+    held = cache.retrieve("a")
+    cache.save("a", np.ones(1000))
+
+    assert len(cache) == 1
+    assert (cache.retrieve("a") == 1).all()
+    assert (held == 0).all()  # Still mapped after the segment is unlinked
+
+
+def _sum(cache, context_id):
+    return int(cache.retrieve(context_id).sum())
+
+
+def _save(cache, context_id):
+    cache.save(context_id, np.full(100, 2))
+
+
+def test_multiprocessing(cache):
+    cache.save("a", np.arange(100))
+    copied = pickle.loads(pickle.dumps(cache))
+
+    with ProcessPoolExecutor(2) as e:
+        assert list(e.map(_sum, [copied] * 4, ["a"] * 4)) == [sum(range(100))] * 4
+        e.submit(_save, copied, "b").result()
+
+    assert cache.retrieve("b").sum() == 200
+
+
+def test_eviction(rmdir_before, rmdir_after):
+    cache = SharedMemoryCache(tmpdir, max_bytes=250_000)
+    try:
+        for i in range(3):
+            cache.save(str(i), np.zeros(100_000, dtype=np.uint8))
+        assert len(cache) == 2
+        assert cache.total_size <= 250_000
+        with raises(CheckpointNotExist):
+            cache.retrieve("0")
+
+        # An entry whose result is alive in this process is not evicted
+        held = cache.retrieve("1")
+        cache.save("3", np.zeros(100_000, dtype=np.uint8))
+        assert cache.retrieve("1") is not None
+        with raises(CheckpointNotExist):
+            cache.retrieve("2")
+        del held
+    finally:
+        cache.clear()
+
+
+def test_clear(cache):
+    cache.save("a", np.arange(10))
+    held = cache.retrieve("a")
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.total_size == 0
+    with raises(CheckpointNotExist):
+        cache.retrieve("a")
+    assert held.sum() == 45
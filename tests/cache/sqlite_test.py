@@ -0,0 +1,58 @@
+from checkpointing.cache import SQLiteCache
+from checkpointing import CheckpointNotExist
+from tests.testutils import tmpdir, rmdir_before, rmdir_after
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pytest import raises
+
+
+def test_saves_and_retrieves(rmdir_before, rmdir_after):
+    cache = SQLiteCache(tmpdir)
+    cache.save("a", [1, 2, 3])
+    cache.save("a", [4, 5])
+
+    assert cache.retrieve("a") == [4, 5]
+    assert len(cache) == 1
+
+    with raises(CheckpointNotExist):
+        cache.retrieve("b")
+
+
+def test_spills_large_results(rmdir_before, rmdir_after):
+    cache = SQLiteCache(tmpdir, spill_threshold=1000)
+    cache.save("a", b"x" * 2000)
+    assert tmpdir.joinpath("spill", "a.pickle").exists()
+    assert cache.retrieve("a") == b"x" * 2000
+
+    cache.save("a", b"x")
+    assert not tmpdir.joinpath("spill", "a.pickle").exists()
+    assert cache.retrieve("a") == b"x"
+
+
+def test_clear(rmdir_before, rmdir_after):
+    cache = SQLiteCache(tmpdir, spill_threshold=1000)
+    cache.save("a", b"x" * 2000)
+    cache.save("b", 1)
+    cache.clear()
+
+    assert len(cache) == 0
+    with raises(CheckpointNotExist):
+        cache.retrieve("a")
+
+
+def save_range(cache, start):
+    for i in range(start, start + 50):
+        cache.save(str(i), i)
+
+
+def retrieve_all(cache):
+    return [cache.retrieve(str(i)) for i in range(200)]
+
+
+def test_threads_and_processes(rmdir_before, rmdir_after):
+    cache = SQLiteCache(tmpdir)
+
+    with ThreadPoolExecutor(4) as e:
+        list(e.map(save_range, [cache] * 4, range(0, 200, 50)))
+
+    with ProcessPoolExecutor(2) as e:
+        assert list(e.map(retrieve_all, [cache] * 2)) == [list(range(200))] * 2
@@ -0,0 +1,118 @@
+from checkpointing.cache import PickleFileCache, StripedCache
+from checkpointing.exceptions import CheckpointNotExist
+from checkpointing.identifier.func_call.context import FuncCallContext
+from tests.testutils import tmpdir, rmdir_before, rmdir_after
+from pytest import raises
+import pickle
+
+
+def _caches(n, **kwargs):
+    return [PickleFileCache(tmpdir.joinpath(f"disk{i}"), **kwargs) for i in range(n)]
+
+
+def _count(cache):
+    return len(list(cache._iter_entries()))
+
+
+def test_spreads_results(rmdir_before, rmdir_after):
+    caches = _caches(3)
+    cache = StripedCache(caches)
+    for i in range(300):
+        cache.save(str(i), i)
+
+    assert all(cache.retrieve(str(i)) == i for i in range(300))
+    assert all(50 < _count(c) < 150 for c in caches)
+    assert all(cache.cache_of(str(i)).retrieve(str(i)) == i for i in range(300))
+    with raises(CheckpointNotExist):
+        cache.retrieve("missing")
+
+
+def test_many(rmdir_before, rmdir_after):
+    cache = StripedCache(_caches(2), max_workers=4)
+    cache.save_many({str(i): [i] for i in range(50)})
+
+    assert cache.retrieve_many([str(i) for i in range(60)]) == {str(i): [i] for i in range(50)}
+
+
+def test_add_cache_moves_only_its_results(rmdir_before, rmdir_after):
+    caches = _caches(3)
+    cache = StripedCache(caches[:2])
+    for i in range(300):
+        cache.save(str(i), i)
+
+    moved = cache.add_cache(caches[2])
+    assert moved == _count(caches[2])
+    assert 50 < moved < 150
+    assert sum(_count(c) for c in caches) == 300
+    assert all(cache.retrieve(str(i)) == i for i in range(300))
+
+
+def test_lookup_before_rebalance(rmdir_before, rmdir_after):
+    caches = _caches(3)
+    cache = StripedCache(caches[:2])
+    for i in range(100):
+        cache.save(str(i), i)
+
+    assert cache.add_cache(caches[2], rebalance=False) == 0
+    assert _count(caches[2]) == 0
+    assert all(cache.retrieve(str(i)) == i for i in range(100))
+
+    # A result saved meanwhile is kept over the previous one
+    key = next(str(i) for i in range(100) if cache.cache_of(str(i)) is caches[2])
+    cache.save(key, "new")
+    cache.rebalance()
+    assert cache.retrieve(key) == "new"
+    assert sum(_count(c) for c in caches) == 100
+
+
+def test_remove_cache(rmdir_before, rmdir_after):
+    caches = _caches(3)
+    cache = StripedCache(caches)
+    for i in range(100):
+        cache.save(str(i), i)
+
+    count = _count(caches[1])
+    assert cache.remove_cache(caches[1]) == count
+    assert _count(caches[1]) == 0
+    assert cache.caches == [caches[0], caches[2]]
+    assert all(cache.retrieve(str(i)) == i for i in range(100))
+
+    with raises(ValueError):
+        cache.remove_cache(caches[1])
+
+
+def foo():
+    return 0
+
+
+def test_namespaced(rmdir_before, rmdir_after):
+    caches = _caches(3, namespaced=True)
+    cache = StripedCache(caches[:2])
+    context = FuncCallContext(foo, (), {})
+    for i in range(30):
+        cache.save_with_context(context, str(i), i)
+
+    cache.add_cache(caches[2])
+    assert all(cache.retrieve_with_context(context, str(i)) == i for i in range(30))
+
+    cache.clear(context)
+    with raises(CheckpointNotExist):
+        cache.retrieve_with_context(context, "0")
+
+
+def test_invalid(rmdir_before, rmdir_after):
+    caches = _caches(2)
+    with raises(ValueError):
+        StripedCache([])
+    with raises(ValueError):
+        StripedCache([caches[0], PickleFileCache(tmpdir.joinpath("disk0"))])
+    with raises(ValueError):
+        StripedCache(caches, weights=[1])
+
+
+def test_pickle(rmdir_before, rmdir_after):
+    cache = StripedCache(_caches(2))
+    cache.save_many({"a": 1, "b": 2})
+
+    loaded = pickle.loads(pickle.dumps(cache))
+    assert loaded.retrieve_many(["a", "b"]) == {"a": 1, "b": 2}
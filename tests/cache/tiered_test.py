@@ -0,0 +1,96 @@
+from checkpointing.cache import InMemoryLRUCache, PickleFileCache, Tier, TieredCache
+from checkpointing.decorator import DecoratorCheckpoint
+from checkpointing.identifier.func_call import AutoFuncCallIdentifier
+from checkpointing.exceptions import CheckpointNotExist
+from tests.testutils import tmpdir, rmdir_before, rmdir_after
+from pytest import raises
+
+
+def test_write_through_and_promotion(rmdir_before, rmdir_after):
+    memory = InMemoryLRUCache(1)
+    disk = PickleFileCache(tmpdir)
+    cache = TieredCache([memory, disk])
+
+    cache.save("a", [1])
+    cache.save("b", [2])
+    assert disk.retrieve("a") == [1]
+    with raises(CheckpointNotExist):
+        memory.retrieve("a")
+
+    assert cache.retrieve("a") == [1]
+    assert memory.retrieve("a") == [1]
+
+    with raises(CheckpointNotExist):
+        cache.retrieve("c")
+
+
+def test_admission(rmdir_before, rmdir_after):
+    memory = InMemoryLRUCache()
+    cache = TieredCache([Tier(memory, admit=lambda context_id, result: len(result) < 10), PickleFileCache(tmpdir)])
+
+    cache.save("small", [0])
+    cache.save("large", [0] * 100)
+    assert memory.retrieve("small") == [0]
+    assert cache.retrieve("large") == [0] * 100
+    with raises(CheckpointNotExist):
+        memory.retrieve("large")
+
+
+def test_shared_or_copied_results():
+    shared = TieredCache([InMemoryLRUCache()])
+    copied = TieredCache([Tier(InMemoryLRUCache(), copy=True)])
+
+    for cache in [shared, copied]:
+        result = [1]
+        cache.save("a", result)
+        result.append(2)
+        cache.retrieve("a").append(3)
+
+    assert shared.retrieve("a") == [1, 2, 3]
+    assert copied.retrieve("a") == [1]
+
+
+def test_clear(rmdir_before, rmdir_after):
+    cache = TieredCache([InMemoryLRUCache(), PickleFileCache(tmpdir)])
+    cache.save("a", 1)
+    cache.clear()
+
+    with raises(CheckpointNotExist):
+        cache.retrieve("a")
+
+
+def test_clear_function_keeps_other_functions_in_persistent_tier(rmdir_before, rmdir_after):
+    memory, disk = InMemoryLRUCache(), PickleFileCache(tmpdir)
+    cache = TieredCache([memory, disk])
+
+    @DecoratorCheckpoint(AutoFuncCallIdentifier(), cache, "raise")
+    def foo(a):
+        return a
+
+    @DecoratorCheckpoint(AutoFuncCallIdentifier(), cache, "raise")
+    def bar(a):
+        return a + 1
+
+    foo(0)
+    bar(0)
+    assert len(list(tmpdir.glob("*.pickle"))) == 2
+
+    # The non-namespaced disk tier can't clear only foo, and is not volatile
+    with raises(ValueError):
+        foo.clear_cache()
+    assert len(list(tmpdir.glob("*.pickle"))) == 2
+    assert len(memory) == 0
+
+
+def test_clear_function_clears_volatile_tier(rmdir_before, rmdir_after):
+    memory, disk = InMemoryLRUCache(), PickleFileCache(tmpdir, namespaced=True)
+    cache = TieredCache([memory, Tier(disk, volatile=False)])
+
+    @DecoratorCheckpoint(AutoFuncCallIdentifier(), cache, "raise")
+    def foo(a):
+        return a
+
+    foo(0)
+    foo.clear_cache()
+    assert len(memory) == 0
+    assert list(tmpdir.rglob("*.pickle")) == []
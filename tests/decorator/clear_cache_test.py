@@ -0,0 +1,38 @@
+from checkpointing.decorator import DecoratorCheckpoint
+from checkpointing.identifier.func_call import AutoFuncCallIdentifier
+from checkpointing.cache import PickleFileCache
+from tests.testutils import tmpdir, rmdir_before, rmdir_after, get_counter, increment_counter, reset_counter
+from pytest import raises
+
+
+def checkpoint(**kwargs):
+    return DecoratorCheckpoint(AutoFuncCallIdentifier(), PickleFileCache(tmpdir, **kwargs), "raise")
+
+
+def test_clear_cache_removes_results_of_the_function(rmdir_before, rmdir_after, reset_counter):
+    @checkpoint(namespaced=True)
+    def foo(a):
+        increment_counter()
+        return get_counter()
+
+    @checkpoint(namespaced=True)
+    def bar(a):
+        increment_counter()
+        return get_counter()
+
+    assert foo(0) == 1
+    assert bar(0) == 2
+    assert foo(0) == 1
+
+    foo.clear_cache()
+    assert foo(0) == 3
+    assert bar(0) == 2
+
+
+def test_clear_cache_requires_namespaced(rmdir_before, rmdir_after):
+    @checkpoint()
+    def foo(a):
+        return a
+
+    with raises(ValueError):
+        foo.clear_cache()
@@ -0,0 +1,74 @@
+from checkpointing.hash import hash_anything, append_only
+from checkpointing.hash.prefix import PrefixHasher
+from array import array
+import hashlib
+
+
+def md5(b):
+    return hashlib.md5(b).hexdigest()
+
+
+def test_resumed_digest_equals_full_digest():
+    hasher = PrefixHasher()
+    buf = hasher.declare_append_only(bytearray(b"abc"))
+    assert hasher.hexdigest(buf, "md5") == md5(b"abc")
+
+    buf += b"def"
+    assert hasher.hexdigest(buf, "md5") == md5(b"abcdef")
+
+
+def test_declared_append_only_buffer_only_hashes_suffix():
+    hasher = PrefixHasher()
+    buf = hasher.declare_append_only(bytearray(b"abc"))
+    hasher.hexdigest(buf, "md5")
+
+    # Breaking the promise shows that the prefix is not hashed again
+    buf[0:1] = b"x"
+    buf += b"def"
+    assert hasher.hexdigest(buf, "md5") == md5(b"abcdef")
+
+
+def test_undeclared_buffer_is_fully_rehashed():
+    hasher = PrefixHasher(tail_size=0)
+    buf = bytearray(b"abc")
+    hasher.hexdigest(buf, "md5")
+
+    buf[0:1] = b"x"
+    assert hasher.hexdigest(buf, "md5") == md5(b"xbc")
+
+
+def test_tail_check_detects_change_in_tail():
+    hasher = PrefixHasher(tail_size=2)
+    buf = bytearray(b"abcd")
+    hasher.hexdigest(buf, "md5")
+
+    buf += b"ef"
+    assert hasher.hexdigest(buf, "md5") == md5(b"abcdef")
+
+    buf[5:6] = b"x"
+    buf += b"g"
+    assert hasher.hexdigest(buf, "md5") == md5(b"abcdexg")
+
+
+def test_shrunk_buffer_is_fully_rehashed():
+    hasher = PrefixHasher()
+    buf = hasher.declare_append_only(bytearray(b"abcd"))
+    hasher.hexdigest(buf, "md5")
+
+    del buf[2:]
+    assert hasher.hexdigest(buf, "md5") == md5(b"ab")
+
+
+def test_hash_anything_growing_buffers():
+    buf = append_only(bytearray(b"abc"))
+    h1 = hash_anything([buf])
+    buf += b"d"
+    h2 = hash_anything([buf])
+
+    assert h1 != h2
+    assert h2 == hash_anything([bytearray(b"abcd")])
+
+
+def test_hash_anything_array_typecode():
+    assert hash_anything(array("b", [1, 0])) == hash_anything(array("b", [1, 0]))
+    assert hash_anything(array("b", [1, 0])) != hash_anything(array("B", [1, 0]))
@@ -0,0 +1,77 @@
+from checkpointing.hash import hash_anything, register_hasher
+from dataclasses import dataclass
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class Wrapper:
+    name: str
+    data: object
+
+
+Pair = namedtuple("Pair", ["left", "right"])
+
+
+class Counted:
+    hashed = 0
+
+    def __init__(self, value):
+        self.value = value
+
+
+def hash_counted(stream, obj, pickle_protocol):
+    Counted.hashed += 1
+    stream.write(str(obj.value).encode("utf-8"))
+
+
+register_hasher(Counted, hash_counted)
+
+
+def test_nested_objects_use_specific_hasher():
+    Counted.hashed = 0
+    hash_anything({"a": [Wrapper("w", Counted(1))]}, Pair(Counted(2), None))
+    assert Counted.hashed == 2
+
+
+def test_specific_hasher_result_is_used():
+    assert hash_anything(Wrapper("w", Counted(1))) == hash_anything(Wrapper("w", Counted(1)))
+    assert hash_anything(Wrapper("w", Counted(1))) != hash_anything(Wrapper("w", Counted(2)))
+
+
+def test_nested_numpy_array():
+    a = Wrapper("w", np.arange(10))
+    b = Wrapper("w", np.arange(10))
+    c = Wrapper("w", np.arange(1, 11))
+    assert hash_anything(a) == hash_anything(b)
+    assert hash_anything(a) != hash_anything(c)
+
+
+def test_numpy_array_dtype_and_shape_are_hashed():
+    a = np.zeros(4, dtype=np.int32)
+    assert hash_anything(a) != hash_anything(a.astype(np.float32))
+    assert hash_anything(a) != hash_anything(a.reshape(2, 2))
+
+
+def test_numpy_array_memory_order_is_ignored():
+    a = np.arange(6).reshape(2, 3)
+    assert hash_anything(a) == hash_anything(np.asfortranarray(a))
+
+
+def test_numpy_object_array_falls_back_to_pickle():
+    assert hash_anything(np.array([[1], "a"], dtype=object)) == hash_anything(np.array([[1], "a"], dtype=object))
+    assert hash_anything(np.array([[1], "a"], dtype=object)) != hash_anything(np.array([[2], "a"], dtype=object))
+
+
+def test_dataframe_block_layout_is_ignored():
+    a = pd.DataFrame({"x": [1, 2], "y": [3, 4]})
+    b = pd.DataFrame({"x": [1, 2]})
+    b["y"] = [3, 4]
+    assert hash_anything(Pair(a, 0)) == hash_anything(Pair(b, 0))
+
+
+def test_dataframe_labels_are_hashed():
+    a = pd.DataFrame({"x": [1, 2], "y": ["a", "b"]})
+    assert hash_anything(a) != hash_anything(a.rename(columns={"y": "z"}))
+    assert hash_anything(a) != hash_anything(a.set_axis([5, 6]))
@@ -0,0 +1,56 @@
+from checkpointing.util.bloom import BloomFilter
+from pytest import raises
+import pickle
+
+
+def test_no_false_negative():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(str(i))
+
+    assert all(str(i) in bloom for i in range(1000))
+    assert len(bloom) == 1000
+
+
+def test_false_positive_rate():
+    bloom = BloomFilter(10000, 0.01)
+    for i in range(10000):
+        bloom.add(str(i))
+
+    false_positives = sum(str(i) in bloom for i in range(10000, 110000))
+    assert false_positives < 2000
+
+
+def test_update():
+    a, b = BloomFilter(100, 0.01), BloomFilter(100, 0.01)
+    a.add("a")
+    b.add("b")
+    a.update(b)
+
+    assert "a" in a and "b" in a
+    assert "a" not in b
+
+    with raises(ValueError):
+        a.update(BloomFilter(1000, 0.01))
+
+
+def test_dumps_loads():
+    bloom = BloomFilter(100, 0.01)
+    bloom.add("a")
+
+    loaded = BloomFilter.loads(bloom.dumps())
+    assert "a" in loaded
+    assert loaded.capacity == 100
+    assert pickle.loads(pickle.dumps(bloom)) == bloom
+
+    with raises(ValueError):
+        BloomFilter.loads(bloom.dumps()[:-1])
+
+
+def test_clear():
+    bloom = BloomFilter(100, 0.01)
+    bloom.add("a")
+    bloom.clear()
+
+    assert "a" not in bloom
+    assert len(bloom) == 0
@@ -0,0 +1,80 @@
+from checkpointing.util import compression
+from checkpointing.util.compression import available_codecs, open_reader, open_writer, validate_codec
+from checkpointing.cache import PickleFileCache
+from testutils import rmdir_after, rmdir_before, tmpdir
+from pytest import raises, mark
+import io
+import os
+
+
+def write(data, codec):
+    file = io.BytesIO()
+    with open_writer(file, codec) as stream:
+        stream.write(data)
+    return file.getvalue()
+
+
+def read(raw):
+    return open_reader(io.BytesIO(raw)).read()
+
+
+@mark.parametrize("codec", available_codecs())
+def test_round_trip(codec):
+    data = b"checkpointing" * 100000
+    raw = write(data, codec)
+    assert len(raw) < len(data)
+    assert read(raw) == data
+
+
+def test_missing_codecs_are_imported_once(monkeypatch):
+    imports = []
+
+    def missing():
+        imports.append(1)
+        raise ImportError
+
+    monkeypatch.setitem(compression._codecs, "missing", missing)
+    compression._available_codecs.cache_clear()
+    try:
+        write(b"abc", "auto")
+        write(b"abc", "auto")
+        assert "missing" not in available_codecs()
+    finally:
+        compression._available_codecs.cache_clear()
+
+    assert len(imports) == 1
+
+
+def test_none_is_plain():
+    assert write(b"abc", "none") == b"abc"
+    assert read(b"abc") == b"abc"
+
+
+def test_auto_skips_incompressible_data():
+    data = os.urandom(compression.AUTO_SAMPLE_SIZE + 1000)
+    assert write(data, "auto") == data
+
+
+def test_auto_compresses_compressible_data():
+    data = b"checkpointing" * 100000
+    raw = write(data, "auto")
+    assert len(raw) < len(data) / 10
+    assert read(raw) == data
+
+
+def test_invalid_codec():
+    with raises(ValueError):
+        validate_codec("unknown")
+
+    with raises(ValueError):
+        PickleFileCache(tmpdir, compression="unknown")
+
+
+def test_entries_readable_after_codec_changes(rmdir_before, rmdir_after):
+    PickleFileCache(tmpdir, compression="zlib").save("a", ["abc"] * 1000)
+    PickleFileCache(tmpdir, compression="none").save("b", ["def"] * 1000)
+
+    for codec in ["none", "lzma", "auto"]:
+        cache = PickleFileCache(tmpdir, compression=codec)
+        assert cache.retrieve("a") == ["abc"] * 1000
+        assert cache.retrieve("b") == ["def"] * 1000
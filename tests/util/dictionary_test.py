@@ -0,0 +1,89 @@
+from checkpointing.util.dictionary import CompressionDictionary, DictionaryStore, train_dictionary
+from checkpointing.cache import PickleFileCache
+from testutils import rmdir_after, rmdir_before, tmpdir
+from pytest import importorskip, raises
+import pickle
+import zlib
+
+
+def entry(i):
+    params = {f"parameter_{name}": i for name in "abcdefghijklmnopqrstuvwxyz"}
+    return {"name": f"entry-{i}", "params": params, "mode": "train", "scores": [0.5, 0.25, 0.125]}
+
+
+def test_dictionary_compresses_small_data():
+    samples = [pickle.dumps(entry(i)) for i in range(100)]
+    dictionary = train_dictionary(samples, 32768, codec="zlib")
+
+    data = pickle.dumps(entry(1000))
+    compressed = dictionary.compress(data)
+    assert len(compressed) * 3 < len(data)
+    assert len(compressed) < len(zlib.compress(data, 9))
+    assert dictionary.decompress(compressed) == data
+
+
+def test_store_versions(rmdir_before, rmdir_after):
+    store = DictionaryStore(tmpdir, max_entry_size=4096)
+    assert store.current() is None
+
+    first = CompressionDictionary("zlib", b"first")
+    second = CompressionDictionary("zlib", b"second")
+    store.add(first)
+    store.add(second)
+
+    other = DictionaryStore(tmpdir, max_entry_size=4096)
+    assert other.current().id == second.id
+    assert other.get(first.id).data == b"first"
+    assert DictionaryStore(tmpdir).current() is None
+
+    with raises(ValueError):
+        other.get("../current")
+
+
+def test_cache_dictionary_compression(rmdir_before, rmdir_after):
+    cache = PickleFileCache(tmpdir, dictionary_max_entry_size=4096)
+    for i in range(100):
+        cache.save(f"a{i}", entry(i))
+
+    size = tmpdir.joinpath("a0.pickle").stat().st_size
+    first = cache.train_dictionary()
+    cache.save("a0", entry(0))
+    assert tmpdir.joinpath("a0.pickle").stat().st_size * 3 < size
+
+    cache.save("b", entry(1000))
+    cache.save("large", list(range(10000)))
+    second = cache.train_dictionary()
+    assert first != second
+    cache.save("c", entry(2000))
+
+    for cache in [PickleFileCache(tmpdir, dictionary_max_entry_size=4096), PickleFileCache(tmpdir)]:
+        assert cache.retrieve("a0") == entry(0)
+        assert cache.retrieve("b") == entry(1000)
+        assert cache.retrieve("c") == entry(2000)
+        assert cache.retrieve("large") == list(range(10000))
+
+
+def test_train_requires_max_entry_size(rmdir_before, rmdir_after):
+    with raises(ValueError):
+        PickleFileCache(tmpdir).train_dictionary()
+
+
+def test_large_entries_keep_out_of_band_buffers_with_dictionary(rmdir_before, rmdir_after):
+    np = importorskip("numpy")
+    import mmap
+
+    cache = PickleFileCache(tmpdir, dictionary_max_entry_size=4096, buffer_threshold=1024)
+    for i in range(100):
+        cache.save(f"a{i}", entry(i))
+    cache.train_dictionary()
+
+    cache.save("small", entry(0))
+    cache.save("large", {"array": np.arange(100000), "name": "large"})
+
+    result = cache.retrieve("large")
+    array = result["array"]
+    while isinstance(array, np.ndarray):
+        array = array.base
+    assert isinstance(array.obj, mmap.mmap)
+    assert (result["array"] == np.arange(100000)).all()
+    assert cache.retrieve("small") == entry(0)
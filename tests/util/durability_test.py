@@ -0,0 +1,80 @@
+from checkpointing.util import durability
+from checkpointing.util.durability import GroupCommitter
+from checkpointing.cache import PickleFileCache
+from testutils import rmdir_after, rmdir_before, tmpdir, mkdir_before
+from pytest import raises, fixture, mark
+import threading
+import time
+
+
+@fixture
+def fsynced(monkeypatch):
+    paths = []
+    monkeypatch.setattr(durability, "fsync_path", paths.append)
+    yield paths
+
+
+def test_group_commit_fsyncs_each_directory_once(mkdir_before, rmdir_after, fsynced):
+    committer = GroupCommitter(interval=60)
+    for name in ["a", "b", "c"]:
+        committer.add(tmpdir.joinpath(name))
+
+    assert fsynced == []
+    committer.flush()
+    assert fsynced == [tmpdir.joinpath(name) for name in ["a", "b", "c"]] + [tmpdir]
+
+
+def test_group_commit_in_background(mkdir_before, rmdir_after, fsynced):
+    committer = GroupCommitter(interval=0.05)
+    committer.add(tmpdir.joinpath("a"))
+
+    time.sleep(0.5)
+    assert fsynced == [tmpdir.joinpath("a"), tmpdir]
+
+
+def test_group_commit_when_max_pending_is_reached(mkdir_before, rmdir_after, fsynced):
+    committer = GroupCommitter(interval=60, max_pending=2)
+    committer.add(tmpdir.joinpath("a"))
+    committer.add(tmpdir.joinpath("b"))
+
+    time.sleep(0.5)
+    assert len(fsynced) == 3
+
+
+def test_flush_waits_for_the_batch_committed_in_background(mkdir_before, rmdir_after, monkeypatch):
+    committing, release = threading.Event(), threading.Event()
+    fsynced = []
+
+    def fsync_path(path):
+        if threading.current_thread().name == "checkpointing-group-commit":
+            committing.set()
+            release.wait()
+        fsynced.append(path)
+
+    monkeypatch.setattr(durability, "fsync_path", fsync_path)
+    committer = GroupCommitter(interval=0, max_pending=1)
+    committer.add(tmpdir.joinpath("a"))
+    assert committing.wait(5)
+
+    flusher = threading.Thread(target=committer.flush)
+    flusher.start()
+    flusher.join(0.2)
+    assert flusher.is_alive()
+
+    release.set()
+    flusher.join(5)
+    assert not flusher.is_alive()
+    assert fsynced == [tmpdir.joinpath("a"), tmpdir]
+
+
+@mark.parametrize("level", ["none", "fsync", "group"])
+def test_cache_with_durability(rmdir_before, rmdir_after, level):
+    cache = PickleFileCache(tmpdir, durability=level)
+    cache.save("0", 1)
+    cache.flush()
+    assert cache.retrieve("0") == 1
+
+
+def test_invalid_durability(rmdir_after):
+    with raises(ValueError):
+        PickleFileCache(tmpdir, durability="always")
@@ -0,0 +1,49 @@
+from checkpointing.util.hash_ring import HashRing
+from collections import Counter
+from pytest import raises
+
+keys = [str(i) for i in range(10000)]
+
+
+def test_even_distribution():
+    ring = HashRing(["a", "b", "c", "d"])
+    counts = Counter(ring.get(key) for key in keys)
+
+    assert set(counts) == {"a", "b", "c", "d"}
+    assert all(1500 < count < 3500 for count in counts.values())
+
+
+def test_weights():
+    ring = HashRing()
+    ring.add("a", 1)
+    ring.add("b", 3)
+    counts = Counter(ring.get(key) for key in keys)
+
+    assert 2 < counts["b"] / counts["a"] < 4.5
+    assert ring.weight("b") == 3
+
+
+def test_add_remaps_to_new_node_only():
+    ring = HashRing(["a", "b", "c"])
+    before = {key: ring.get(key) for key in keys}
+
+    ring.add("d")
+    after = {key: ring.get(key) for key in keys}
+    moved = [key for key in keys if before[key] != after[key]]
+
+    assert all(after[key] == "d" for key in moved)
+    assert 1500 < len(moved) < 3500
+
+
+def test_remove_and_copy():
+    ring = HashRing(["a", "b"])
+    copy = ring.copy()
+    ring.remove("a")
+
+    assert all(ring.get(key) == "b" for key in keys[:100])
+    assert "a" in copy and "a" not in ring
+    assert len(copy) == 2
+
+    ring.remove("b")
+    with raises(LookupError):
+        ring.get("key")
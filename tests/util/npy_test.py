@@ -0,0 +1,60 @@
+from checkpointing.util import npy
+from testutils import rmdir_after, tmpdir, mkdir_before
+import numpy as np
+from pytest import mark
+
+
+def roundtrip(obj, mmap_mode=None):
+    with open(tmpdir.joinpath("arrays.npy"), "wb") as f:
+        npy.dump(obj, f)
+
+    with open(tmpdir.joinpath("arrays.npy"), "rb") as f:
+        return npy.load(f, mmap_mode)
+
+
+def test_is_array_result():
+    assert npy.is_array_result(np.arange(3))
+    assert npy.is_array_result((np.arange(3), np.zeros((2, 2))))
+    assert npy.is_array_result({"a": np.arange(3)})
+
+    assert not npy.is_array_result(np.array([1, "a"], dtype=object))
+    assert not npy.is_array_result(np.ma.masked_array([1, 2]))
+    assert not npy.is_array_result((np.arange(3), 1))
+    assert not npy.is_array_result({1: np.arange(3)})
+    assert not npy.is_array_result(())
+    assert not npy.is_array_result([1, 2])
+
+
+@mark.parametrize("mmap_mode", [None, "r"])
+def test_single_array_roundtrip(mkdir_before, rmdir_after, mmap_mode):
+    arr = np.asfortranarray(np.arange(12, dtype=np.float32).reshape(3, 4))
+    res = roundtrip(arr, mmap_mode)
+
+    assert np.array_equal(res, arr)
+    assert res.dtype == arr.dtype
+    assert res.flags.f_contiguous
+
+
+def test_single_array_is_plain_npy(mkdir_before, rmdir_after):
+    arr = np.arange(5)
+    roundtrip(arr)
+    assert np.array_equal(np.load(tmpdir.joinpath("arrays.npy")), arr)
+
+
+@mark.parametrize("mmap_mode", [None, "r"])
+def test_container_roundtrip(mkdir_before, rmdir_after, mmap_mode):
+    t = roundtrip((np.arange(3), np.zeros(0), np.array(1.5)), mmap_mode)
+    assert type(t) is tuple and len(t) == 3
+    assert np.array_equal(t[0], np.arange(3)) and t[1].shape == (0,) and t[2] == 1.5
+
+    d = roundtrip({"b": np.arange(3), "a": np.ones(2)}, mmap_mode)
+    assert list(d.keys()) == ["b", "a"]
+    assert np.array_equal(d["a"], np.ones(2))
+
+    assert type(roundtrip([np.arange(3)], mmap_mode)) is list
+
+
+def test_read_only_memory_map(mkdir_before, rmdir_after):
+    res = roundtrip(np.arange(3), "r")
+    assert isinstance(res, np.memmap)
+    assert not res.flags.writeable
@@ -0,0 +1,52 @@
+from checkpointing.util.sizeof import get_sizeof, register_sizeof, sizeof
+import pytest
+import sys
+
+
+def test_sizeof_recurses_into_containers():
+    data = b"x" * 10000
+    assert sizeof([data]) >= 10000
+    assert sizeof({"key": [data, (data,)]}) < 2 * 10000  # Counted once
+
+
+def test_sizeof_objects():
+    class Point:
+        def __init__(self):
+            self.data = b"x" * 10000
+
+    class Slotted:
+        __slots__ = ["data"]
+
+        def __init__(self):
+            self.data = b"x" * 10000
+
+    assert sizeof(Point()) > 10000
+    assert sizeof(Slotted()) > 10000
+
+
+def test_sizeof_cycle():
+    a = []
+    a.append(a)
+    assert sizeof(a) == sys.getsizeof(a)
+
+
+def test_register_sizeof():
+    class Custom:
+        pass
+
+    assert get_sizeof(Custom) is None
+    register_sizeof(Custom, lambda obj: 42)
+    assert sizeof(Custom()) == 42
+    assert sizeof([Custom()]) == sys.getsizeof([None]) + 42
+
+
+def test_sizeof_numpy():
+    np = pytest.importorskip("numpy")
+    assert sizeof(np.zeros(1000)) == 8000
+
+
+def test_sizeof_pandas():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({"a": range(1000), "b": ["x" * 100] * 1000})
+    assert sizeof(df) == df.memory_usage(deep=True).sum()
+    assert sizeof(df["b"]) == df["b"].memory_usage(deep=True)